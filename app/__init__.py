@@ -53,7 +53,25 @@ def create_app():
         },
         UPLOAD_FOLDER=os.path.join(app.root_path, 'static', 'uploads'),
         MAX_CONTENT_LENGTH=16 * 1024 * 1024,  # Limite de taille des fichiers à 16 MB
-        HR_PASSWORD=os.environ.get('HR_PASSWORD', 'hr_password_change_this')  # Mot de passe simple pour l'accès RH
+        HR_PASSWORD=os.environ.get('HR_PASSWORD', 'hr_password_change_this'),  # Mot de passe simple pour l'accès RH
+        # File d'attente des analyses de CV (voir `flask analysis-worker`)
+        ANALYSIS_WORKER_POLL_INTERVAL=float(os.environ.get('ANALYSIS_WORKER_POLL_INTERVAL', '2')),
+        ANALYSIS_JOB_TIMEOUT=int(os.environ.get('ANALYSIS_JOB_TIMEOUT', '600')),  # Au-delà, un job RUNNING est considéré abandonné
+        ANALYSIS_JOB_MAX_ATTEMPTS=int(os.environ.get('ANALYSIS_JOB_MAX_ATTEMPTS', '3')),
+        ANALYSIS_WORKER_CONCURRENCY=int(os.environ.get('ANALYSIS_WORKER_CONCURRENCY', '4')),  # Appels simultanés au modèle par worker
+        # Cache des résultats d'analyse (voir app.utils.analysis_cache)
+        ANALYSIS_CACHE_MAX_ENTRIES=int(os.environ.get('ANALYSIS_CACHE_MAX_ENTRIES', '5000')),
+        ANALYSIS_CACHE_MAX_AGE_DAYS=int(os.environ.get('ANALYSIS_CACHE_MAX_AGE_DAYS', '90')),
+        # Artefacts des CV précalculés au téléversement (voir app.utils.cv_artifacts)
+        CV_ARTIFACTS_FOLDER=os.environ.get('CV_ARTIFACTS_FOLDER', os.path.join(app.instance_path, 'cv_artifacts')),
+        CV_INGEST_WORKERS=int(os.environ.get('CV_INGEST_WORKERS', '2')),
+        # Compression des réponses JSON de l'API (voir app.utils.compression)
+        API_COMPRESS_MIN_SIZE=int(os.environ.get('API_COMPRESS_MIN_SIZE', '1024')),
+        API_COMPRESS_LEVEL=int(os.environ.get('API_COMPRESS_LEVEL', '6')),
+        # Cache des départements, rôles et statuts (voir app.utils.reference_data)
+        REFERENCE_DATA_CHECK_INTERVAL=int(os.environ.get('REFERENCE_DATA_CHECK_INTERVAL', '30')),  # Secondes entre deux contrôles de version
+        # Durée de cache des versions de tokens JWT (voir app.utils.identity)
+        TOKEN_VERSION_CACHE_TTL=int(os.environ.get('TOKEN_VERSION_CACHE_TTL', '30'))
     )
     
     # Assurez-vous que le dossier instance existe
@@ -80,6 +98,14 @@ def create_app():
     from app.utils import template_filters
     template_filters.init_app(app)
     
+    # Compression gzip / brotli des réponses JSON de l'API
+    from app.utils import compression
+    compression.init_app(app)
+    
+    # Enregistrement des commandes CLI (workers d'analyse, etc.)
+    from app import commands
+    commands.init_app(app)
+    
     @login_manager.user_loader
     def load_user(user_id):
         from app.models.auth_models import User
@@ -89,9 +115,9 @@ def create_app():
     CORS(app, 
          resources={r"/api/*": {"origins": ["http://localhost:3000", "http://127.0.0.1:3000"]}},
          supports_credentials=True,
-         allow_headers=["Content-Type", "Authorization", "Access-Control-Allow-Credentials"],
+         allow_headers=["Content-Type", "Authorization", "Access-Control-Allow-Credentials", "If-None-Match"],
          methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-         expose_headers=["Content-Type", "Authorization"],
+         expose_headers=["Content-Type", "Authorization", "ETag"],
          origins=["http://localhost:3000", "http://127.0.0.1:3000"],
          send_wildcard=False,
          always_send=True)
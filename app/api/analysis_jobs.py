@@ -0,0 +1,126 @@
+from flask import request, jsonify, url_for
+from flask_jwt_extended import jwt_required
+from .. import db
+from ..models.models import AnalysisJob, AnalysisJobStatus, AnalysisBatch
+from ..utils.identity import current_identity
+from ..utils.scoping import scope_by_application, scope_by_job, scoped_job
+from ..utils.analysis_cache import cache_stats
+from ..utils.analysis_queue import enqueue_job_analyses, batch_progress
+from . import api_bp
+
+
+def analysis_job_to_dict(job):
+    """Sérialise un job d'analyse pour l'API"""
+    data = {
+        'id': job.id,
+        'application_id': job.application_id,
+        'batch_id': job.batch_id,
+        'status': job.status.lower(),  # queued, running, done, failed
+        'attempts': job.attempts,
+        'created_at': job.created_at.strftime('%Y-%m-%dT%H:%M:%S') if job.created_at else None,
+        'started_at': job.started_at.strftime('%Y-%m-%dT%H:%M:%S') if job.started_at else None,
+        'finished_at': job.finished_at.strftime('%Y-%m-%dT%H:%M:%S') if job.finished_at else None,
+        'analysis_route': job.analysis_route,
+        'pages_sent': job.pages_sent,
+        'image_bytes': job.image_bytes,
+        'payload_bytes': job.payload_bytes,
+        'result': None,
+        'error': None
+    }
+
+    if job.status == AnalysisJobStatus.DONE:
+        data['result'] = {
+            'ai_analysis': job.ai_analysis,
+            'ai_score': job.ai_score
+        }
+    elif job.status == AnalysisJobStatus.FAILED:
+        data['error'] = job.error_message
+
+    return data
+
+
+@api_bp.route('/analysis-jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_analysis_job(job_id):
+    """Récupérer l'état d'un job d'analyse de CV"""
+    user = current_identity()
+
+    if not user:
+        return jsonify({'message': 'Utilisateur non trouvé'}), 404
+
+    # Une seule requête : un job d'une candidature hors du département est introuvable
+    job = scope_by_application(AnalysisJob.query, user, AnalysisJob.application_id) \
+        .filter(AnalysisJob.id == job_id).first_or_404()
+
+    return jsonify(analysis_job_to_dict(job)), 200
+
+
+@api_bp.route('/analysis-cache/stats', methods=['GET'])
+@jwt_required()
+def get_analysis_cache_stats():
+    """Statistiques du cache des analyses (réservé aux RH)"""
+    user = current_identity()
+
+    if not user or not user.is_hr():
+        return jsonify({'message': 'Accès non autorisé'}), 403
+
+    return jsonify(cache_stats()), 200
+
+
+def analysis_batch_to_dict(batch):
+    """Sérialise un lot d'analyses et son avancement pour l'API"""
+    return {
+        'id': batch.id,
+        'job_position_id': batch.job_position_id,
+        'requested_by': batch.requested_by,
+        'created_at': batch.created_at.strftime('%Y-%m-%dT%H:%M:%S') if batch.created_at else None,
+        'progress': batch_progress(batch)
+    }
+
+
+@api_bp.route('/jobs/<int:job_id>/analyze-all', methods=['POST'])
+@jwt_required()
+def analyze_all_job_applications(job_id):
+    """Mettre en file d'attente l'analyse de toutes les candidatures sans score (ou au score obsolète) d'une offre"""
+    user = current_identity()
+
+    if not user:
+        return jsonify({'message': 'Utilisateur non trouvé'}), 404
+
+    # Une offre hors du département de l'utilisateur est introuvable pour lui
+    position = scoped_job(user, job_id)
+    if position is None:
+        return jsonify({'message': 'Offre d\'emploi non trouvée'}), 404
+
+    data = request.get_json(silent=True) or {}
+    # force : réanalyser aussi les candidatures dont le score est à jour
+    force = bool(data.get('force')) or request.args.get('force', '').lower() in ('1', 'true')
+
+    try:
+        batch = enqueue_job_analyses(position, requested_by=user.id, force=force)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'Erreur lors de la mise en file d\'attente des analyses: {str(e)}'}), 500
+
+    if batch is None:
+        return jsonify({'message': 'Aucune candidature à analyser : toutes ont un score à jour ou une analyse en cours', 'batch': None}), 200
+
+    return jsonify({
+        'message': f'{batch.total} analyse(s) mise(s) en file d\'attente',
+        'batch': analysis_batch_to_dict(batch)
+    }), 202, {'Location': url_for('api.get_analysis_batch', batch_id=batch.id)}
+
+
+@api_bp.route('/analysis-batches/<int:batch_id>', methods=['GET'])
+@jwt_required()
+def get_analysis_batch(batch_id):
+    """Récupérer l'avancement d'un lot d'analyses"""
+    user = current_identity()
+
+    if not user:
+        return jsonify({'message': 'Utilisateur non trouvé'}), 404
+
+    batch = scope_by_job(AnalysisBatch.query, user, AnalysisBatch.job_position_id) \
+        .filter(AnalysisBatch.id == batch_id).first_or_404()
+
+    return jsonify(analysis_batch_to_dict(batch)), 200
@@ -1,143 +1,321 @@
-from flask import request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import request, jsonify, current_app, url_for, Response, stream_with_context, abort
+from flask_jwt_extended import jwt_required
+from werkzeug.datastructures import MultiDict
 from werkzeug.utils import secure_filename
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, load_only
 from .. import db
-from ..models.auth_models import User
-from ..models.models import JobPosition, Application, Candidate, ApplicationStatus, Department
-from ..utils.ai_analysis import analyze_cv
+from ..models.models import JobPosition, Application, Candidate, ApplicationStatus, AnalysisJobStatus
+from ..utils.identity import current_identity
+from ..utils.scoping import is_unrestricted, scope_applications, scoped_application, application_scope_condition
+from ..utils.returning import update_returning, update_returning_ids
+from ..utils import reference_data
+from ..utils.analysis_queue import enqueue_analysis
+from ..utils.cv_artifacts import schedule_ingest
+from ..utils.analysis_stream import stream_application_analysis
+from ..utils.pagination import paginated_response
+from ..utils.http_cache import collection_etag, conditional_json
+from ..utils.fieldsets import (Field, FieldsetError, requested_fields, requested_includes,
+                               load_columns, serialize_fields)
 from . import api_bp
+from .analysis_jobs import analysis_job_to_dict
+
+# Champs d'une candidature (paramètre fields) : colonnes de Application et valeur sérialisée
+APPLICATION_FIELDS = {
+    'id': Field(('id',), lambda application: application.id),
+    'status': Field(('status_id',), lambda application: application.status),
+    'status_text': Field(('status_id',), lambda application: ApplicationStatus.get_name(application.status)),
+    'cover_letter': Field(('cover_letter',), lambda application: application.cover_letter),
+    'cv_filename': Field(('cv_filename',), lambda application: application.cv_filename),
+    'ai_analysis': Field(('ai_analysis',), lambda application: application.ai_analysis),
+    'ai_score': Field(('ai_score',), lambda application: application.ai_score),
+    'created_at': Field(('created_at',), lambda application: application.created_at.strftime('%Y-%m-%d'))
+}
+
+# Listes : sans les gros textes (analyse IA, lettre de motivation), lus sur la fiche
+APPLICATION_LIST_FIELDS = ('id', 'status', 'status_text', 'cv_filename', 'ai_score', 'created_at')
+
+# Objets liés (paramètre include), inclus par défaut
+APPLICATION_INCLUDES = ('candidate', 'job')
+
+
+def applications_query(fields, includes, extra=(), job_details=False):
+    """
+    Requête de base des candidatures
+
+    Seules les colonnes des champs demandés sont lues ; le candidat et l'offre, s'ils sont
+    demandés, sont chargés dans la même requête SQL (jointures) au lieu d'une requête par
+    candidature et par relation. Le nom du département vient du cache des données de référence.
+
+    Args:
+        fields: Champs de APPLICATION_FIELDS à charger
+        includes: Objets liés à charger (candidate, job)
+        extra: Colonnes supplémentaires de Application (clé de tri)
+        job_details: Charger aussi la description et les prérequis de l'offre
+    """
+    options = [load_only(*load_columns(Application, APPLICATION_FIELDS, fields,
+                                       extra=('candidate_id', 'job_position_id', *extra)))]
+    if 'candidate' in includes:
+        options.append(joinedload(Application.candidate).load_only(
+            Candidate.id, Candidate.first_name, Candidate.last_name, Candidate.email, Candidate.phone))
+    if 'job' in includes:
+        job_columns = [JobPosition.id, JobPosition.title, JobPosition.department_id]
+        if job_details:
+            job_columns += [JobPosition.description, JobPosition.requirements]
+        options.append(joinedload(Application.job_position).load_only(*job_columns))
+    return Application.query.options(*options)
+
+
+def application_to_dict(application, fields, includes, job_details=False):
+    """
+    Sérialise une candidature pour l'API
+
+    Les colonnes des champs et les objets liés doivent avoir été chargés avec la
+    candidature (voir applications_query) pour ne pas déclencher de requête.
+
+    Args:
+        application: Candidature à sérialiser
+        fields: Champs à renvoyer
+        includes: Objets liés à renvoyer (candidate, job)
+        job_details: Inclure la description et les prérequis de l'offre
+    """
+    data = serialize_fields(application, APPLICATION_FIELDS, fields)
+
+    if 'candidate' in includes:
+        candidate = application.candidate
+        data['candidate'] = {
+            'id': candidate.id,
+            'first_name': candidate.first_name,
+            'last_name': candidate.last_name,
+            'email': candidate.email,
+            'phone': candidate.phone
+        }
+
+    if 'job' in includes:
+        job = application.job_position
+        data['job'] = {
+            'id': job.id,
+            'title': job.title,
+            'department_id': job.department_id,
+            'department_name': reference_data.department_name(job.department_id)
+        }
+        if job_details:
+            data['job']['description'] = job.description
+            data['job']['requirements'] = job.requirements
+
+    return data
+
+
+# Clés de tri de la liste des candidatures (préfixe "-" : ordre décroissant)
+APPLICATION_SORT_KEYS = {
+    'created_at': Application.created_at,
+    'score': Application.ai_score
+}
+
+# Mise à jour en masse des statuts : critères du filtre et nombre maximal d'identifiants
+# (SQL Server accepte au plus 2100 paramètres par requête)
+BULK_STATUS_FILTERS = ('status', 'job_id', 'department_id', 'min_score', 'max_score', 'created_from', 'created_to')
+BULK_STATUS_MAX_IDS = 1000
+
+
+def _parse_float(name, value):
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f'Le paramètre {name} doit être un nombre')
+
+
+def _parse_date(name, value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f'Le paramètre {name} doit être une date au format AAAA-MM-JJ')
+
+
+def _parse_statuses(value):
+    """Statuts séparés par des virgules, par identifiant (3) ou par nom (interview)"""
+    statuses = []
+    for item in value.split(','):
+        item = item.strip()
+        if item.isdigit():
+            statuses.append(int(item))
+        elif item and hasattr(ApplicationStatus, item.upper()):
+            statuses.append(getattr(ApplicationStatus, item.upper()))
+        else:
+            raise ValueError(f'Statut invalide : {item}')
+    return statuses
+
+
+def application_conditions(args):
+    """
+    Prédicats SQL des filtres de candidatures passés en paramètres
+
+    Chaque filtre devient un prédicat sur une colonne indexée de Application :
+    status (identifiants ou noms séparés par des virgules), job_id, department_id,
+    min_score / max_score (bornes incluses), created_from / created_to (AAAA-MM-JJ, bornes incluses).
+    Les prédicats n'ajoutent pas de jointure : ils servent aussi dans un UPDATE.
+
+    Args:
+        args: Paramètres (MultiDict, ex. request.args)
+
+    Raises:
+        ValueError: si un paramètre est invalide (message destiné au client)
+    """
+    conditions = []
+    if args.get('status'):
+        conditions.append(Application.status_id.in_(_parse_statuses(args['status'])))
+
+    if args.get('job_id'):
+        job_id = args.get('job_id', type=int)
+        if job_id is None:
+            raise ValueError('Le paramètre job_id doit être un entier')
+        conditions.append(Application.job_position_id == job_id)
+
+    if args.get('department_id'):
+        department_id = args.get('department_id', type=int)
+        if department_id is None:
+            raise ValueError('Le paramètre department_id doit être un entier')
+        conditions.append(Application.job_position.has(JobPosition.department_id == department_id))
+
+    if args.get('min_score'):
+        conditions.append(Application.ai_score >= _parse_float('min_score', args['min_score']))
+    if args.get('max_score'):
+        conditions.append(Application.ai_score <= _parse_float('max_score', args['max_score']))
+
+    if args.get('created_from'):
+        conditions.append(Application.created_at >= _parse_date('created_from', args['created_from']))
+    if args.get('created_to'):
+        # Borne incluse : toute la journée de created_to
+        created_to = _parse_date('created_to', args['created_to']) + timedelta(days=1)
+        conditions.append(Application.created_at < created_to)
+
+    return conditions
+
+
+def filter_applications(query, args):
+    """
+    Applique à la requête les filtres passés en paramètres de l'URL (voir application_conditions)
+
+    Raises:
+        ValueError: si un paramètre est invalide (message destiné au client)
+    """
+    return query.filter(*application_conditions(args))
+
+
+def application_order(sort):
+    """
+    Clé de tri keyset de la liste des candidatures pour le paramètre sort
+    (created_at, -created_at, score, -score ; -created_at par défaut)
+
+    Raises:
+        ValueError: si la clé de tri est inconnue
+    """
+    sort = sort or '-created_at'
+    descending = sort.startswith('-')
+    column = APPLICATION_SORT_KEYS.get(sort.lstrip('-'))
+    if column is None:
+        raise ValueError(f'Tri invalide : {sort} (valeurs possibles : {", ".join(APPLICATION_SORT_KEYS)})')
+    return [(column, descending), (Application.id, descending)]
+
+
+def list_applications(user, query_filter=None):
+    """
+    Page de candidatures selon les paramètres de la requête (filtres, tri, pagination, champs)
+
+    Les candidatures sont limitées au périmètre de l'utilisateur dans la requête SQL (voir
+    app.utils.scoping). La réponse porte un ETag (voir app.utils.http_cache) calculé sur les
+    candidatures filtrées et les candidats / offres inclus : une liste inchangée est renvoyée en 304.
+
+    Args:
+        user: Identité de l'utilisateur
+        query_filter: Critère SQL supplémentaire (ex. département demandé)
+
+    Returns:
+        Response: réponse JSON (400 si un paramètre est invalide)
+    """
+    try:
+        fields = requested_fields(APPLICATION_FIELDS, APPLICATION_LIST_FIELDS)
+        includes = requested_includes(APPLICATION_INCLUDES, APPLICATION_INCLUDES)
+        order = application_order(request.args.get('sort'))
+        query = scope_applications(
+            applications_query(fields, includes, extra=[column.key for column, _ in order]), user)
+        if query_filter is not None:
+            query = query.filter(query_filter)
+        query = filter_applications(query, request.args)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    # Le candidat et l'offre (avec le nom de son département) figurent dans la réponse :
+    # leurs modifications changent l'ETag
+    validator = query
+    aggregates = [func.max(Application.updated_at)]
+    if 'candidate' in includes:
+        validator = validator.join(Application.candidate)
+        aggregates.append(func.max(Candidate.updated_at))
+    scope = 'hr' if is_unrestricted(user) else user.department_id
+    if 'job' in includes:
+        # JobPosition est déjà jointe par scope_applications pour un manager
+        if is_unrestricted(user):
+            validator = validator.join(Application.job_position)
+        aggregates.append(func.max(JobPosition.updated_at))
+        scope = [scope, reference_data.current_version()]
+    etag = collection_etag(validator, *aggregates, scope=scope)
+
+    def serialize(applications):
+        return [application_to_dict(application, fields, includes) for application in applications]
+
+    return conditional_json(etag, lambda: paginated_response(query, order, serialize))
 
 @api_bp.route('/applications', methods=['GET'])
 @jwt_required()
 def get_applications():
     """Récupérer les candidatures (filtré selon le rôle de l'utilisateur)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_identity()
     
     if not user:
         return jsonify({'message': 'Utilisateur non trouvé'}), 404
     
-    # Si l'utilisateur est RH, il peut voir toutes les candidatures
-    if user.is_hr():
-        applications = Application.query.all()
-    # Sinon, il ne voit que les candidatures pour son département
-    elif user.department_id:  # Vérifier que l'utilisateur a un département attribué
-        job_positions = JobPosition.query.filter_by(department_id=user.department_id).all()
-        job_ids = [job.id for job in job_positions]
-        applications = Application.query.filter(Application.job_position_id.in_(job_ids)).all()
-    else:
-        # Si l'utilisateur n'a pas de département, renvoyer une liste vide
-        applications = []
-    
-    result = []
-    for app in applications:
-        candidate = Candidate.query.get(app.candidate_id)
-        job = JobPosition.query.get(app.job_position_id)
-        
-        # Récupérer le nom du département
-        department_name = "Non spécifié"
-        if job.department_id:
-            department = Department.query.get(job.department_id)
-            if department:
-                department_name = department.name
-        
-        result.append({
-            'id': app.id,
-            'candidate': {
-                'id': candidate.id,
-                'first_name': candidate.first_name,
-                'last_name': candidate.last_name,
-                'email': candidate.email,
-                'phone': candidate.phone
-            },
-            'job': {
-                'id': job.id,
-                'title': job.title,
-                'department_id': job.department_id,
-                'department_name': department_name
-            },
-            'status': app.status,
-            'status_text': ApplicationStatus.get_name(app.status),
-            'cover_letter': app.cover_letter,
-            'cv_filename': app.cv_filename,
-            'ai_analysis': app.ai_analysis,
-            'ai_score': app.ai_score,
-            'created_at': app.created_at.strftime('%Y-%m-%d')
-        })
-    
-    return jsonify(result), 200
+    # Si l'utilisateur n'a pas de département (et n'est pas RH), renvoyer une liste vide
+    if not user.is_hr() and not user.department_id:
+        return jsonify({'items': [], 'next_cursor': None}), 200
+    
+    # Périmètre (toutes les candidatures pour les RH, celles du département sinon), filtres,
+    # tri et champs : voir scope_applications, filter_applications, application_order et APPLICATION_FIELDS
+    return list_applications(user)
 
 @api_bp.route('/applications/<int:application_id>', methods=['GET'])
 @jwt_required()
 def get_application(application_id):
     """Récupérer une candidature spécifique"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_identity()
     
     if not user:
         return jsonify({'message': 'Utilisateur non trouvé'}), 404
     
-    application = Application.query.get_or_404(application_id)
-    job = JobPosition.query.get(application.job_position_id)
-    
-    # Vérifier les autorisations
-    if not user.is_hr() and job.department_id != user.department_id:
-        return jsonify({'message': 'Accès non autorisé'}), 403
-    
-    candidate = Candidate.query.get(application.candidate_id)
+    # Fiche : tous les champs par défaut, y compris les textes
+    try:
+        fields = requested_fields(APPLICATION_FIELDS, APPLICATION_FIELDS)
+        includes = requested_includes(APPLICATION_INCLUDES, APPLICATION_INCLUDES)
+    except FieldsetError as e:
+        return jsonify({'message': str(e)}), 400
     
-    # Récupérer le nom du département
-    department_name = "Non spécifié"
-    if job.department_id:
-        department = Department.query.get(job.department_id)
-        if department:
-            department_name = department.name
+    # Une candidature hors du département de l'utilisateur est introuvable pour lui
+    application = scope_applications(applications_query(fields, includes, job_details=True), user) \
+        .filter(Application.id == application_id).first_or_404()
     
-    return jsonify({
-        'id': application.id,
-        'candidate': {
-            'id': candidate.id,
-            'first_name': candidate.first_name,
-            'last_name': candidate.last_name,
-            'email': candidate.email,
-            'phone': candidate.phone
-        },
-        'job': {
-            'id': job.id,
-            'title': job.title,
-            'description': job.description,
-            'requirements': job.requirements,
-            'department_id': job.department_id,
-            'department_name': department_name
-        },
-        'status': application.status,
-        'status_text': ApplicationStatus.get_name(application.status),
-        'cover_letter': application.cover_letter,
-        'cv_filename': application.cv_filename,
-        'ai_analysis': application.ai_analysis,
-        'ai_score': application.ai_score,
-        'created_at': application.created_at.strftime('%Y-%m-%d')
-    }), 200
+    return jsonify(application_to_dict(application, fields, includes, job_details=True)), 200
 
 @api_bp.route('/applications/<int:application_id>/status', methods=['PUT'])
 @jwt_required()
 def update_application_status(application_id):
     """Mettre à jour le statut d'une candidature"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_identity()
     
     if not user:
         return jsonify({'message': 'Utilisateur non trouvé'}), 404
     
-    application = Application.query.get_or_404(application_id)
-    job = JobPosition.query.get(application.job_position_id)
-    
-    # Vérifier les autorisations
-    if not user.is_hr() and job.department_id != user.department_id:
-        return jsonify({'message': 'Accès non autorisé'}), 403
-    
     data = request.get_json()
     
     if not data or 'status' not in data:
@@ -158,25 +336,119 @@ def update_application_status(application_id):
         return jsonify({'message': 'Statut invalide'}), 400
     
     try:
-        # Utiliser une requête de mise à jour directe plutôt que de modifier l'objet
-        # Cela évite les problèmes de concurrence et de StaleDataError
-        db.session.execute(
-            db.update(Application)
-            .where(Application.id == application_id)
-            .values(status_id=new_status)
-        )
-        db.session.commit()
+        # Mise à jour, contrôle du périmètre et relecture de la ligne en une requête :
+        # hors du département, la candidature est introuvable
+        updated = update_returning(Application, db.update(Application)
+                                   .where(Application.id == application_id, application_scope_condition(user))
+                                   .values(status_id=new_status))
+        if not updated:
+            db.session.rollback()
+            return jsonify({'message': 'Candidature non trouvée'}), 404
         
-        # Rafraîchir l'objet pour obtenir les dernières valeurs
-        db.session.refresh(application)
+        # Réponse construite avant le commit, qui expire les objets de la session
+        application = updated[0]
+        response = {
+            'message': 'Statut mis à jour avec succès',
+            'status': application.status,
+            'status_text': ApplicationStatus.get_name(application.status),
+            'updated_at': application.updated_at.isoformat() if application.updated_at else None
+        }
+        db.session.commit()
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': f'Erreur lors de la mise à jour du statut: {str(e)}'}), 500
     
+    return jsonify(response), 200
+
+def _bulk_filter_args(data):
+    """Filtre JSON de la mise à jour en masse, sous la forme des paramètres d'URL des listes"""
+    if not isinstance(data, dict):
+        raise ValueError('Le filtre doit être un objet')
+    unknown = set(data) - set(BULK_STATUS_FILTERS)
+    if unknown:
+        raise ValueError(f'Filtre inconnu : {", ".join(sorted(unknown))} '
+                         f'(valeurs possibles : {", ".join(BULK_STATUS_FILTERS)})')
+    args = MultiDict()
+    for name, value in data.items():
+        if isinstance(value, list):
+            value = ','.join(str(item) for item in value)
+        if value is not None and value != '':
+            args[name] = str(value)
+    if not args:
+        raise ValueError('Le filtre doit contenir au moins un critère')
+    return args
+
+
+def _bulk_ids(value):
+    if not isinstance(value, list) or not value \
+            or not all(isinstance(item, int) and not isinstance(item, bool) for item in value):
+        raise ValueError('ids doit être une liste non vide d\'identifiants entiers')
+    if len(value) > BULK_STATUS_MAX_IDS:
+        raise ValueError(f'Au plus {BULK_STATUS_MAX_IDS} identifiants par appel (utiliser un filtre)')
+    return sorted(set(value))
+
+
+@api_bp.route('/applications/status', methods=['PUT'])
+@jwt_required()
+def update_applications_status():
+    """
+    Mettre à jour le statut de plusieurs candidatures en une requête
+
+    Corps JSON : {"status": 4 ou "rejected", "ids": [1, 2, ...]} ou
+    {"status": ..., "filter": {"job_id": 3, "max_score": 40, "status": "submitted,under_review"}}
+    (filtres des listes de candidatures, voir application_conditions).
+
+    Un seul UPDATE, limité au périmètre de l'utilisateur ; les candidatures qui ont déjà ce
+    statut ne sont pas modifiées. Renvoie les identifiants des candidatures modifiées.
+    """
+    user = current_identity()
+    
+    if not user:
+        return jsonify({'message': 'Utilisateur non trouvé'}), 404
+    
+    data = request.get_json(silent=True)
+    if not data or 'status' not in data:
+        return jsonify({'message': 'Statut manquant'}), 400
+    if ('ids' in data) == ('filter' in data):
+        return jsonify({'message': 'Indiquer soit ids, soit filter'}), 400
+    
+    try:
+        statuses = _parse_statuses(str(data['status']))
+        valid_statuses = [
+            ApplicationStatus.SUBMITTED,
+            ApplicationStatus.UNDER_REVIEW,
+            ApplicationStatus.INTERVIEW,
+            ApplicationStatus.REJECTED,
+            ApplicationStatus.ACCEPTED
+        ]
+        if len(statuses) != 1 or statuses[0] not in valid_statuses:
+            raise ValueError(f'Statut invalide : {data["status"]}')
+        new_status = statuses[0]
+        
+        if 'ids' in data:
+            conditions = [Application.id.in_(_bulk_ids(data['ids']))]
+        else:
+            conditions = application_conditions(_bulk_filter_args(data['filter']))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    try:
+        updated_ids = update_returning_ids(Application, db.update(Application)
+                                           .where(application_scope_condition(user),
+                                                  Application.status_id != new_status,
+                                                  *conditions)
+                                           .values(status_id=new_status))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'Erreur lors de la mise à jour des statuts: {str(e)}'}), 500
+    
     return jsonify({
-        'message': 'Statut mis à jour avec succès',
-        'status': application.status,
-        'status_text': ApplicationStatus.get_name(application.status)
+        'message': f'{len(updated_ids)} candidature(s) mise(s) à jour',
+        'status': new_status,
+        'status_text': ApplicationStatus.get_name(new_status),
+        'updated_ids': updated_ids,
+        'count': len(updated_ids)
     }), 200
 
 @api_bp.route('/applications', methods=['POST'])
@@ -223,7 +495,7 @@ def create_application():
             cv_filename = f"{timestamp}_{filename}"
             
             # Créer le dossier uploads s'il n'existe pas
-            uploads_dir = os.path.join('app', 'static', 'uploads')
+            uploads_dir = current_app.config['UPLOAD_FOLDER']
             os.makedirs(uploads_dir, exist_ok=True)
             
             # Sauvegarder le fichier
@@ -241,6 +513,10 @@ def create_application():
     db.session.add(application)
     db.session.commit()
     
+    # Précalculer le texte et les pages du CV pour l'analyse
+    if cv_filename:
+        schedule_ingest(os.path.join(uploads_dir, cv_filename))
+    
     return jsonify({
         'message': 'Candidature soumise avec succès',
         'application_id': application.id
@@ -250,8 +526,7 @@ def create_application():
 @jwt_required()
 def get_applications_by_department(department_id):
     """Récupérer les candidatures pour un département spécifique"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_identity()
     
     if not user:
         return jsonify({'message': 'Utilisateur non trouvé'}), 404
@@ -261,106 +536,82 @@ def get_applications_by_department(department_id):
         return jsonify({'message': 'Accès non autorisé'}), 403
     
     # Vérifier que le département existe
-    department = Department.query.get_or_404(department_id)
-    
-    # Récupérer toutes les offres d'emploi pour ce département
-    job_positions = JobPosition.query.filter_by(department_id=department_id).all()
-    job_ids = [job.id for job in job_positions]
-    
-    # Récupérer les candidatures pour ces offres
-    applications = Application.query.filter(Application.job_position_id.in_(job_ids)).all() if job_ids else []
+    if reference_data.get_department(department_id) is None:
+        abort(404)
     
-    result = []
-    for app in applications:
-        candidate = Candidate.query.get(app.candidate_id)
-        job = JobPosition.query.get(app.job_position_id)
-        
-        result.append({
-            'id': app.id,
-            'candidate': {
-                'id': candidate.id,
-                'first_name': candidate.first_name,
-                'last_name': candidate.last_name,
-                'email': candidate.email,
-                'phone': candidate.phone
-            },
-            'job': {
-                'id': job.id,
-                'title': job.title,
-                'department_id': job.department_id,
-                'department_name': department.name
-            },
-            'status': app.status,
-            'status_text': ApplicationStatus.get_name(app.status),
-            'cover_letter': app.cover_letter,
-            'cv_filename': app.cv_filename,
-            'ai_analysis': app.ai_analysis,
-            'ai_score': app.ai_score,
-            'created_at': app.created_at.strftime('%Y-%m-%d')
-        })
-    
-    return jsonify(result), 200
+    # Récupérer les candidatures des offres de ce département (déjà le périmètre d'un manager)
+    query_filter = Application.job_position.has(JobPosition.department_id == department_id) \
+        if user.is_hr() else None
+    return list_applications(user, query_filter)
 
 @api_bp.route('/applications/<int:application_id>/analyze', methods=['POST'])
 @jwt_required()
 def analyze_application_cv(application_id):
     """Analyser le CV d'une candidature avec l'IA"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_identity()
     
     if not user:
         return jsonify({'message': 'Utilisateur non trouvé'}), 404
     
-    application = Application.query.get_or_404(application_id)
-    job = JobPosition.query.get(application.job_position_id)
-    
-    # Vérifier les autorisations
-    if not user.is_hr() and job.department_id != user.department_id:
-        return jsonify({'message': 'Accès non autorisé'}), 403
+    # Existence et autorisation en une requête : hors du département, la candidature est introuvable
+    # (avec l'offre, utilisée par enqueue_analysis sans nouvelle lecture de la candidature)
+    application = scoped_application(user, application_id, Application.cv_filename, Application.job_position_id)
+    if application is None:
+        return jsonify({'message': 'Candidature non trouvée'}), 404
     
     # Vérifier que le CV existe
     if not application.cv_filename:
         return jsonify({'message': 'Aucun CV trouvé pour cette candidature'}), 400
     
     # Chemin du CV
-    cv_path = os.path.join('app', 'static', 'uploads', application.cv_filename)
+    cv_path = os.path.join(current_app.config['UPLOAD_FOLDER'], application.cv_filename)
     
     # Vérifier que le fichier CV existe
     if not os.path.exists(cv_path):
         return jsonify({'message': 'Le fichier CV n\'a pas été trouvé'}), 404
     
     try:
-        # Appel à la fonction d'analyse IA
-        analysis_result, score = analyze_cv(cv_path, job.description, job.requirements)
-        
-        # S'assurer que l'analyse est en UTF-8 pour éviter les problèmes d'encodage
-        if isinstance(analysis_result, str):
-            # Remplacer les apostrophes typographiques par des apostrophes simples
-            analysis_result = analysis_result.replace('\u2019', "'")
-            # Autres remplacements possibles si nécessaire
-            analysis_result = analysis_result.replace('\u2018', "'")
-            analysis_result = analysis_result.replace('\u201c', '"')
-            analysis_result = analysis_result.replace('\u201d', '"')
-        
-        # Mise à jour des résultats de l'analyse
-        db.session.query(Application).filter_by(id=application_id).update(
-            {
-                'ai_analysis': analysis_result,
-                'ai_score': score
-            },
-            synchronize_session='evaluate'
-        )
-        
-        # Commit des changements
-        db.session.commit()
-        
-        # Rafraîchir l'objet pour obtenir les dernières valeurs
-        application = Application.query.get(application_id)
-        
+        # L'analyse est exécutée par un worker (`flask analysis-worker`) : on se contente
+        # de la mettre en file d'attente pour libérer immédiatement la requête
+        analysis_job = enqueue_analysis(application_id)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'Erreur lors de la mise en file d\'attente de l\'analyse: {str(e)}'}), 500
+    
+    # Résultat déjà en cache : l'analyse est disponible immédiatement
+    if analysis_job.status == AnalysisJobStatus.DONE:
         return jsonify({
             'message': 'Analyse du CV effectuée avec succès',
-            'ai_analysis': application.ai_analysis,
-            'ai_score': application.ai_score
+            'job': analysis_job_to_dict(analysis_job),
+            'ai_analysis': analysis_job.ai_analysis,
+            'ai_score': analysis_job.ai_score
         }), 200
-    except Exception as e:
-        return jsonify({'message': f'Erreur lors de l\'analyse du CV: {str(e)}'}), 500
+    
+    return jsonify({
+        'message': 'Analyse du CV mise en file d\'attente',
+        'job': analysis_job_to_dict(analysis_job)
+    }), 202, {'Location': url_for('api.get_analysis_job', job_id=analysis_job.id)}
+
+@api_bp.route('/applications/<int:application_id>/analyze/stream', methods=['POST'])
+@jwt_required()
+def stream_application_cv_analysis(application_id):
+    """Analyser le CV d'une candidature en diffusant le texte au fil de sa génération (server-sent events)"""
+    user = current_identity()
+    
+    if not user:
+        return jsonify({'message': 'Utilisateur non trouvé'}), 404
+    
+    # Existence et autorisation en une requête : hors du département, la candidature est introuvable
+    application = scoped_application(user, application_id, Application.cv_filename)
+    if application is None:
+        return jsonify({'message': 'Candidature non trouvée'}), 404
+    
+    # Vérifier que le CV existe
+    if not application.cv_filename:
+        return jsonify({'message': 'Aucun CV trouvé pour cette candidature'}), 400
+    
+    return Response(
+        stream_with_context(stream_application_analysis(application_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -6,7 +6,8 @@ import json
 import traceback
 from .. import db
 from ..models.auth_models import User
-from ..models.models import Department
+from ..utils import reference_data
+from ..utils.identity import identity_claims
 from . import api_bp
 
 # Configurer le logger pour l'authentification
@@ -25,14 +26,8 @@ def login():
     if not user or not user.check_password(data.get('password')):
         return jsonify({'message': 'Identifiants incorrects'}), 401
     
-    # Créer les tokens avec des informations supplémentaires
-    additional_claims = {
-        'username': user.username,
-        'email': user.email,
-        'role_id': user.role_id,
-        'is_hr': user.is_hr(),
-        'sub': str(user.id)  # Ajouter explicitement le sujet comme chaîne
-    }
+    # Créer les tokens avec des informations supplémentaires (droits lus par current_identity)
+    additional_claims = identity_claims(user)
     
     auth_logger.debug(f"Claims supplémentaires pour le token: {additional_claims}")
     
@@ -66,11 +61,7 @@ def login():
         auth_logger.debug(traceback.format_exc())
     
     # Récupérer le nom du département si l'utilisateur a un département attribué
-    department_name = None
-    if user.department_id:
-        department = Department.query.get(user.department_id)
-        if department:
-            department_name = department.name
+    department_name = reference_data.department_name(user.department_id, default=None)
 
     return jsonify({
         'access_token': access_token,
@@ -98,14 +89,8 @@ def refresh():
     if not user:
         return jsonify({'message': 'Utilisateur non trouvé'}), 404
     
-    # Créer un nouveau token d'accès avec les mêmes claims supplémentaires
-    additional_claims = {
-        'username': user.username,
-        'email': user.email,
-        'role_id': user.role_id,
-        'is_hr': user.is_hr(),
-        'sub': str(identity)  # Ajouter explicitement le sujet comme chaîne
-    }
+    # Créer un nouveau token d'accès avec des claims relus en base (rôle, département, version)
+    additional_claims = identity_claims(user)
     
     auth_logger.debug(f"Claims pour le refresh token: {additional_claims}")
     auth_logger.debug(f"Type de l'identité: {type(identity).__name__}, Valeur: {identity}")
@@ -170,11 +155,7 @@ def me():
     current_app.logger.info(f"Utilisateur {user.username} récupéré avec succès")
     
     # Récupérer le nom du département si l'utilisateur a un département attribué
-    department_name = None
-    if user.department_id:
-        department = Department.query.get(user.department_id)
-        if department:
-            department_name = department.name
+    department_name = reference_data.department_name(user.department_id, default=None)
 
     return jsonify({
         'id': user.id,
@@ -1,41 +1,47 @@
 from flask import request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func
 from .. import db
-from ..models.auth_models import User
 from ..models.models import Candidate, Application
+from ..utils.identity import current_identity
+from ..utils.pagination import paginated_response, created_at_order
 from . import api_bp
 
 @api_bp.route('/candidates', methods=['GET'])
 @jwt_required()
 def get_candidates():
     """Récupérer tous les candidats (réservé aux utilisateurs authentifiés)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_identity()
     
     if not user:
         return jsonify({'message': 'Utilisateur non trouvé'}), 404
     
-    candidates = Candidate.query.all()
-    
-    result = []
-    for candidate in candidates:
-        result.append({
-            'id': candidate.id,
-            'first_name': candidate.first_name,
-            'last_name': candidate.last_name,
-            'email': candidate.email,
-            'phone': candidate.phone,
-            'applications_count': Application.query.filter_by(candidate_id=candidate.id).count()
-        })
+    body, status = paginated_response(Candidate.query, created_at_order(Candidate), serialize_candidates)
+    return jsonify(body), status
+
+def serialize_candidates(candidates):
+    """Sérialise une page de candidats avec leur nombre de candidatures (une seule requête de comptage)"""
+    counts = dict(
+        db.session.query(Application.candidate_id, func.count(Application.id))
+        .filter(Application.candidate_id.in_([candidate.id for candidate in candidates]))
+        .group_by(Application.candidate_id)
+        .all()
+    ) if candidates else {}
     
-    return jsonify(result), 200
+    return [{
+        'id': candidate.id,
+        'first_name': candidate.first_name,
+        'last_name': candidate.last_name,
+        'email': candidate.email,
+        'phone': candidate.phone,
+        'applications_count': counts.get(candidate.id, 0)
+    } for candidate in candidates]
 
 @api_bp.route('/candidates/<int:candidate_id>', methods=['GET'])
 @jwt_required()
 def get_candidate(candidate_id):
     """Récupérer un candidat spécifique avec ses candidatures"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_identity()
     
     if not user:
         return jsonify({'message': 'Utilisateur non trouvé'}), 404
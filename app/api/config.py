@@ -4,6 +4,7 @@ from datetime import timedelta
 import os
 import logging
 import traceback
+from app.utils.identity import is_token_revoked
 
 def configure_api(app):
     
@@ -69,6 +70,20 @@ def configure_api(app):
             "error": "authorization_required"
         }), 401
     
+    # Tokens d'accès émis avant un changement de rôle, de département ou de mot de passe
+    @jwt.token_in_blocklist_loader
+    def token_revoked_check(jwt_header, jwt_payload):
+        return is_token_revoked(jwt_payload)
+    
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        logger.info(f"Token périmé refusé pour l'utilisateur {jwt_payload.get('sub')}")
+        
+        return jsonify({
+            "message": "Les droits de l'utilisateur ont changé, le token doit être rafraîchi",
+            "error": "token_revoked"
+        }), 401
+    
     # Ajouter un décorateur pour logger les tokens reçus
     @app.before_request
     def log_jwt_token():
@@ -1,42 +1,32 @@
-from flask import request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import request, jsonify, abort
+from flask_jwt_extended import jwt_required
 from .. import db
-from ..models.auth_models import User
 from ..models.models import Department
+from ..utils.identity import current_identity
+from ..utils import reference_data
 from . import api_bp
 
 @api_bp.route('/departments', methods=['GET'])
 def get_departments():
-    """Récupérer tous les départements"""
-    departments = Department.query.all()
-    
-    result = []
-    for dept in departments:
-        result.append({
-            'id': dept.id,
-            'name': dept.name,
-            'description': dept.description
-        })
+    """Récupérer tous les départements (depuis le cache des données de référence)"""
+    result = [dept._asdict() for dept in reference_data.departments()]
     
     return jsonify(result), 200
 
 @api_bp.route('/departments/<int:department_id>', methods=['GET'])
 def get_department(department_id):
     """Récupérer un département spécifique"""
-    dept = Department.query.get_or_404(department_id)
+    dept = reference_data.get_department(department_id)
+    if dept is None:
+        abort(404)
     
-    return jsonify({
-        'id': dept.id,
-        'name': dept.name,
-        'description': dept.description
-    }), 200
+    return jsonify(dept._asdict()), 200
 
 @api_bp.route('/departments', methods=['POST'])
 @jwt_required()
 def create_department():
     """Créer un nouveau département (réservé aux RH)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_identity()
     
     if not user or not user.is_hr():
         return jsonify({'message': 'Accès non autorisé'}), 403
@@ -57,6 +47,7 @@ def create_department():
     )
     
     db.session.add(new_dept)
+    reference_data.bump_version()
     db.session.commit()
     
     return jsonify({
@@ -68,8 +59,7 @@ def create_department():
 @jwt_required()
 def update_department(department_id):
     """Mettre à jour un département (réservé aux RH)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_identity()
     
     if not user or not user.is_hr():
         return jsonify({'message': 'Accès non autorisé'}), 403
@@ -96,6 +86,7 @@ def update_department(department_id):
                 .where(Department.id == department_id)
                 .values(**update_data)
             )
+            reference_data.bump_version()
             db.session.commit()
             
             # Rafraîchir l'objet pour obtenir les dernières valeurs
@@ -110,8 +101,7 @@ def update_department(department_id):
 @jwt_required()
 def seed_departments():
     """Initialiser les départements standards (réservé aux RH)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_identity()
     
     if not user or not user.is_hr():
         return jsonify({'message': 'Accès non autorisé'}), 403
@@ -142,6 +132,8 @@ def seed_departments():
             db.session.add(new_dept)
             created_count += 1
     
+    if created_count:
+        reference_data.bump_version()
     db.session.commit()
     
     return jsonify({
@@ -1,39 +1,67 @@
-from flask import request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import request, jsonify, current_app
+from flask_jwt_extended import jwt_required
 from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 from .. import db
 from ..models.auth_models import User, InterviewRequest
-from ..models.models import Application, Candidate, JobPosition
+from ..models.models import Application, ApplicationStatus, Candidate, JobPosition
+from ..utils.identity import current_identity
+from ..utils.scoping import scoped_application, scope_interview_requests
+from ..utils.returning import update_returning
+from ..utils.http_cache import collection_etag, conditional_json
+from ..utils.pagination import paginated_response, created_at_order
 from . import api_bp
 
+def interview_requests_query():
+    """Demandes d'entretien avec le manager, la candidature, le candidat et l'offre (jointures)"""
+    return InterviewRequest.query.options(
+        joinedload(InterviewRequest.manager),
+        joinedload(InterviewRequest.application).joinedload(Application.candidate),
+        joinedload(InterviewRequest.application).joinedload(Application.job_position)
+    )
+
 @api_bp.route('/interview-requests', methods=['GET'])
 @jwt_required()
 def get_interview_requests():
     """Récupérer les demandes d'entretien (filtré selon le rôle de l'utilisateur)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_identity()
     
     if not user:
         return jsonify({'message': 'Utilisateur non trouvé'}), 404
     
     # Si l'utilisateur est RH, il peut voir toutes les demandes
-    if user.is_hr():
-        requests = InterviewRequest.query.all()
     # Sinon, il ne voit que ses propres demandes
-    else:
-        requests = InterviewRequest.query.filter_by(manager_id=user.id).all()
+    query = scope_interview_requests(interview_requests_query(), user)
+    
+    # ETag : demandes, managers, candidatures, candidats et offres repris dans la réponse
+    validator = query.join(InterviewRequest.manager) \
+        .join(InterviewRequest.application) \
+        .join(Application.candidate) \
+        .join(Application.job_position)
+    etag = collection_etag(validator,
+                           func.max(InterviewRequest.updated_at),
+                           func.max(User.updated_at),
+                           func.max(Application.updated_at),
+                           func.max(Candidate.updated_at),
+                           func.max(JobPosition.updated_at),
+                           scope='hr' if user.is_hr() else user.id)
     
+    return conditional_json(etag, lambda: paginated_response(
+        query, created_at_order(InterviewRequest), serialize_interview_requests))
+
+def serialize_interview_requests(interview_requests):
+    """Sérialise une page de demandes d'entretien (relations chargées avec la page)"""
     result = []
-    for req in requests:
-        application = Application.query.get(req.application_id)
-        candidate = Candidate.query.get(application.candidate_id)
-        job = JobPosition.query.get(application.job_position_id)
+    for req in interview_requests:
+        candidate = req.application.candidate
+        job = req.application.job_position
         
         result.append({
             'id': req.id,
             'application_id': req.application_id,
             'manager_id': req.manager_id,
-            'manager_name': f"{User.query.get(req.manager_id).username}",
+            'manager_name': f"{req.manager.username}",
             'candidate': {
                 'id': candidate.id,
                 'name': f"{candidate.first_name} {candidate.last_name}",
@@ -49,62 +77,38 @@ def get_interview_requests():
             'created_at': req.created_at.strftime('%Y-%m-%d')
         })
     
-    return jsonify(result), 200
+    return result
 
 @api_bp.route('/interview-requests/<int:request_id>', methods=['GET'])
 @jwt_required()
 def get_interview_request(request_id):
     """Récupérer une demande d'entretien spécifique"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_identity()
     
     if not user:
         return jsonify({'message': 'Utilisateur non trouvé'}), 404
     
-    req = InterviewRequest.query.get_or_404(request_id)
-    
-    # Vérifier les autorisations
-    if not user.is_hr() and req.manager_id != user.id:
-        return jsonify({'message': 'Accès non autorisé'}), 403
+    # Une seule requête : une demande d'un autre manager est introuvable pour lui
+    req = scope_interview_requests(interview_requests_query(), user) \
+        .filter(InterviewRequest.id == request_id).first_or_404()
     
-    application = Application.query.get(req.application_id)
-    candidate = Candidate.query.get(application.candidate_id)
-    job = JobPosition.query.get(application.job_position_id)
-    
-    return jsonify({
-        'id': req.id,
-        'application_id': req.application_id,
-        'manager_id': req.manager_id,
-        'manager_name': f"{User.query.get(req.manager_id).username}",
-        'candidate': {
-            'id': candidate.id,
-            'name': f"{candidate.first_name} {candidate.last_name}",
-            'email': candidate.email
-        },
-        'job': {
-            'id': job.id,
-            'title': job.title
-        },
-        'requested_date': req.requested_date.strftime('%Y-%m-%dT%H:%M'),
-        'status': req.status,
-        'comments': req.comments,
-        'created_at': req.created_at.strftime('%Y-%m-%d')
-    }), 200
+    return jsonify(serialize_interview_requests([req])[0]), 200
 
 @api_bp.route('/interview-requests', methods=['POST'])
 @jwt_required()
 def create_interview_request():
     """Créer une nouvelle demande d'entretien"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_identity()
     
     print(f"===== Début de la création d'une demande d'entretien =====")
-    print(f"Utilisateur: ID={user_id}, Nom={user.username if user else 'Non trouvé'}, Département={user.department_id if user else 'N/A'}")
     
     if not user:
         print(f"Erreur: Utilisateur non trouvé")
         return jsonify({'message': 'Utilisateur non trouvé'}), 404
     
+    current_app.logger.debug(f"Demande d'entretien de l'utilisateur {user.id} ({user.username}, "
+                             f"département {user.department_id})")
+    
     data = request.get_json()
     print(f"Données reçues: {data}")
     
@@ -126,27 +130,16 @@ def create_interview_request():
     
     print(f"application_id: {application_id}, requested_date: {requested_date}, comments: {comments}")
     
-    # Vérifier que la candidature existe
-    application = Application.query.get(application_id)
+    # Vérifier que la candidature existe et appartient au périmètre de l'utilisateur
+    # (si l'utilisateur est manager, l'offre doit être de son département), en une requête
+    application = scoped_application(user, application_id, Application.candidate_id, Application.job_position_id)
     if not application:
-        print(f"Erreur: Candidature {application_id} non trouvée")
+        current_app.logger.warning(f"Demande d'entretien refusée : candidature {application_id} hors du "
+                                   f"périmètre de l'utilisateur {user.id} (ou inexistante)")
         return jsonify({'message': 'Candidature non trouvée'}), 404
         
     print(f"Candidature trouvée: ID={application.id}, Candidat={application.candidate_id}, Job={application.job_position_id}")
     
-    # Vérifier les autorisations (si l'utilisateur est manager, il doit être du même département que l'offre d'emploi)
-    job = JobPosition.query.get(application.job_position_id)
-    
-    print(f"Job: ID={job.id}, Titre={job.title}, Département={job.department_id}")
-    print(f"Vérification des autorisations: user.is_hr()={user.is_hr()}, job.department_id={job.department_id}, user.department_id={user.department_id}")
-    
-    # Après la refactorisation des départements, nous devons comparer les department_id
-    if not user.is_hr() and job.department_id != user.department_id:
-        print(f"Accès refusé: job.department_id={job.department_id}, user.department_id={user.department_id}")
-        return jsonify({'message': 'Accès non autorisé'}), 403
-        
-    print("Vérification des autorisations: OK")
-    
     # Vérifier si une demande existe déjà pour cette candidature
     existing_request = InterviewRequest.query.filter_by(application_id=application_id).first()
     if existing_request:
@@ -219,13 +212,11 @@ def create_interview_request():
 @jwt_required()
 def update_interview_request_status(request_id):
     """Mettre à jour le statut d'une demande d'entretien (réservé aux RH)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_identity()
     
     if not user or not user.is_hr():
         return jsonify({'message': 'Accès non autorisé'}), 403
     
-    req = InterviewRequest.query.get_or_404(request_id)
     data = request.get_json()
     
     if not data or 'status' not in data:
@@ -238,16 +229,34 @@ def update_interview_request_status(request_id):
     if new_status not in valid_statuses:
         return jsonify({'message': 'Statut invalide'}), 400
     
-    req.status = new_status
-    
-    # Si la demande est approuvée, mettre à jour le statut de la candidature
-    if new_status == 'APPROVED':
-        application = Application.query.get(req.application_id)
-        application.status = 3  # INTERVIEW
+    try:
+        # Mise à jour directe relue dans la même requête : la table a un trigger (updated_at),
+        # ce qui provoque des StaleDataError avec une mise à jour par l'ORM
+        updated = update_returning(InterviewRequest, db.update(InterviewRequest)
+                                   .where(InterviewRequest.id == request_id)
+                                   .values(status=new_status))
+        if not updated:
+            db.session.rollback()
+            return jsonify({'message': 'Demande d\'entretien non trouvée'}), 404
+        req = updated[0]
+        
+        # Si la demande est approuvée, mettre à jour le statut de la candidature (même transaction)
+        if new_status == 'APPROVED':
+            db.session.execute(
+                db.update(Application)
+                .where(Application.id == req.application_id)
+                .values(status_id=ApplicationStatus.INTERVIEW)
+            )
         
-    db.session.commit()
+        # Réponse construite avant le commit, qui expire les objets de la session
+        response = {
+            'message': 'Statut mis à jour avec succès',
+            'status': req.status,
+            'updated_at': req.updated_at.isoformat() if req.updated_at else None
+        }
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'Erreur lors de la mise à jour du statut: {str(e)}'}), 500
     
-    return jsonify({
-        'message': 'Statut mis à jour avec succès',
-        'status': req.status
-    }), 200
+    return jsonify(response), 200
@@ -1,74 +1,113 @@
-from flask import request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import request, jsonify, abort
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, load_only
 from .. import db
-from ..models.auth_models import User
-from ..models.models import JobPosition, Department, Application
+from ..models.models import JobPosition, JobStats
+from ..utils.identity import current_identity
+from ..utils.scoping import scope_jobs
+from ..utils import reference_data
+from ..utils.job_stats import application_count, job_stats_to_dict
+from ..utils.pagination import paginated_response, created_at_order
+from ..utils.http_cache import collection_etag, conditional_json
+from ..utils.fieldsets import Field, FieldsetError, requested_fields, load_columns, serialize_fields
 from . import api_bp
 
+# Champs d'une offre (paramètre fields) : colonnes de JobPosition et valeur sérialisée ;
+# department_name est lu dans le cache des données de référence, application_count dans JobStats
+JOB_FIELDS = {
+    'id': Field(('id',), lambda job: job.id),
+    'title': Field(('title',), lambda job: job.title),
+    'description': Field(('description',), lambda job: job.description),
+    'requirements': Field(('requirements',), lambda job: job.requirements),
+    'department_id': Field(('department_id',), lambda job: job.department_id),
+    'department_name': Field(('department_id',), lambda job: reference_data.department_name(job.department_id)),
+    'created_at': Field(('created_at',), lambda job: job.created_at.strftime('%Y-%m-%d')),
+    'is_active': Field(('is_active',), lambda job: job.is_active),
+    'application_count': Field((), application_count)  # Lu dans JobStats
+}
+
+# Listes : sans la description ni les prérequis, lus sur la fiche de l'offre
+JOB_LIST_FIELDS = ('id', 'title', 'department_id', 'department_name', 'created_at', 'is_active', 'application_count')
+
+
+def jobs_query(fields, extra=()):
+    """Requête des offres ne chargeant que les colonnes et jointures des champs demandés"""
+    options = [load_only(*load_columns(JobPosition, JOB_FIELDS, fields, extra))]
+    if 'application_count' in fields:
+        options.append(joinedload(JobPosition.stats).load_only(JobStats.total))
+    return JobPosition.query.options(*options)
+
 @api_bp.route('/jobs', methods=['GET'])
 def get_jobs():
     """Récupérer toutes les offres d'emploi (actives et inactives)"""
-    jobs = JobPosition.query.all()
-    
-    result = []
-    for job in jobs:
-        # Récupérer le nom du département à partir de l'ID
-        department_name = "Non spécifié"
-        if job.department_id:
-            department = Department.query.get(job.department_id)
-            if department:
-                department_name = department.name
-        
-        # Compter le nombre de candidatures pour cette offre
-        application_count = Application.query.filter_by(job_position_id=job.id).count()
-        
-        result.append({
-            'id': job.id,
-            'title': job.title,
-            'description': job.description,
-            'requirements': job.requirements,
-            'department_id': job.department_id,
-            'department_name': department_name,
-            'created_at': job.created_at.strftime('%Y-%m-%d'),
-            'is_active': job.is_active,
-            'application_count': application_count  # Ajouter le nombre de candidatures
-        })
-    
-    return jsonify(result), 200
+    try:
+        fields = requested_fields(JOB_FIELDS, JOB_LIST_FIELDS)
+    except FieldsetError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    # La clé de tri doit être chargée pour calculer le curseur
+    query = jobs_query(fields, extra=('created_at',))
+    
+    # ETag : offres, compteurs de candidatures (JobStats) et version des noms de départements
+    validator = query.outerjoin(JobPosition.stats)
+    etag = collection_etag(validator,
+                           func.max(JobPosition.updated_at),
+                           func.sum(JobStats.total),
+                           func.max(JobStats.last_application_at),
+                           scope=reference_data.current_version())
+    
+    return conditional_json(etag, lambda: paginated_response(
+        query, created_at_order(JobPosition),
+        lambda jobs: [serialize_fields(job, JOB_FIELDS, fields) for job in jobs]))
 
 @api_bp.route('/jobs/<int:job_id>', methods=['GET'])
 def get_job(job_id):
     """Récupérer une offre d'emploi spécifique"""
-    job = JobPosition.query.get_or_404(job_id)
+    # Fiche : tous les champs par défaut, y compris la description et les prérequis
+    try:
+        fields = requested_fields(JOB_FIELDS, JOB_FIELDS)
+    except FieldsetError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    job = jobs_query(fields).filter(JobPosition.id == job_id).first_or_404()
+    return jsonify(serialize_fields(job, JOB_FIELDS, fields)), 200
+
+@api_bp.route('/jobs/stats', methods=['GET'])
+@jwt_required()
+def get_jobs_stats():
+    """Statistiques des candidatures par offre (toutes les offres pour les RH, celles du département sinon)"""
+    user = current_identity()
     
-    # Récupérer le nom du département à partir de l'ID
-    department_name = "Non spécifié"
-    if job.department_id:
-        department = Department.query.get(job.department_id)
-        if department:
-            department_name = department.name
+    if not user:
+        return jsonify({'message': 'Utilisateur non trouvé'}), 404
     
-    # Compter le nombre de candidatures pour cette offre
-    application_count = Application.query.filter_by(job_position_id=job.id).count()
+    # Une seule requête : offres et statistiques (jointure externe, une offre sans candidature n'a pas de ligne)
+    query = scope_jobs(db.session.query(JobPosition.id, JobStats)
+                       .outerjoin(JobStats, JobStats.job_position_id == JobPosition.id), user)
     
-    return jsonify({
-        'id': job.id,
-        'title': job.title,
-        'description': job.description,
-        'requirements': job.requirements,
-        'department_id': job.department_id, 
-        'department_name': department_name,
-        'created_at': job.created_at.strftime('%Y-%m-%d'),
-        'is_active': job.is_active,
-        'application_count': application_count  # Ajouter le nombre de candidatures
-    }), 200
+    return jsonify([job_stats_to_dict(job_id, stats) for job_id, stats in query.all()]), 200
+
+@api_bp.route('/jobs/<int:job_id>/stats', methods=['GET'])
+@jwt_required()
+def get_job_stats(job_id):
+    """Statistiques des candidatures d'une offre"""
+    user = current_identity()
+    
+    if not user:
+        return jsonify({'message': 'Utilisateur non trouvé'}), 404
+    
+    # Une offre hors du département de l'utilisateur est introuvable pour lui
+    job = scope_jobs(JobPosition.query.options(joinedload(JobPosition.stats)), user) \
+        .filter(JobPosition.id == job_id).first_or_404()
+    
+    return jsonify(job_stats_to_dict(job.id, job.stats)), 200
 
 @api_bp.route('/jobs', methods=['POST'])
 @jwt_required()
 def create_job():
     """Créer une nouvelle offre d'emploi (réservé aux RH)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_identity()
     
     if not user or not user.is_hr():
         return jsonify({'message': 'Accès non autorisé'}), 403
@@ -79,8 +118,7 @@ def create_job():
         return jsonify({'message': 'Données manquantes (titre, description, et department_id sont requis)'}), 400
     
     # Vérifier que le département existe
-    department = Department.query.get(data.get('department_id'))
-    if not department:
+    if not reference_data.get_department(data.get('department_id')):
         return jsonify({'message': 'Le département spécifié n\'existe pas'}), 404
     
     new_job = JobPosition(
@@ -103,8 +141,7 @@ def create_job():
 @jwt_required()
 def update_job(job_id):
     """Mettre à jour une offre d'emploi (réservé aux RH)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_identity()
     
     if not user or not user.is_hr():
         return jsonify({'message': 'Accès non autorisé'}), 403
@@ -123,8 +160,7 @@ def update_job(job_id):
             update_data['requirements'] = data.get('requirements')
         if data.get('department_id') is not None:
             # Vérifier que le département existe
-            department = Department.query.get(data.get('department_id'))
-            if not department:
+            if not reference_data.get_department(data.get('department_id')):
                 return jsonify({'message': 'Le département spécifié n\'existe pas'}), 404
             update_data['department_id'] = data.get('department_id')
         if data.get('is_active') is not None:
@@ -152,8 +188,7 @@ def update_job(job_id):
 @jwt_required()
 def delete_job(job_id):
     """Supprimer une offre d'emploi (réservé aux RH)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_identity()
     
     if not user or not user.is_hr():
         return jsonify({'message': 'Accès non autorisé'}), 403
@@ -169,24 +204,14 @@ def delete_job(job_id):
 def get_jobs_by_department(department_id):
     """Récupérer les offres d'emploi par département"""
     # Vérifier que le département existe
-    department = Department.query.get_or_404(department_id)
-    jobs = JobPosition.query.filter_by(department_id=department_id, is_active=True).all()
+    if reference_data.get_department(department_id) is None:
+        abort(404)
     
-    result = []
-    for job in jobs:
-        # Compter le nombre de candidatures pour cette offre
-        application_count = Application.query.filter_by(job_position_id=job.id).count()
-        
-        result.append({
-            'id': job.id,
-            'title': job.title,
-            'description': job.description,
-            'requirements': job.requirements,
-            'department_id': job.department_id,
-            'department_name': department.name,  # Utiliser le nom du département récupéré précédemment
-            'created_at': job.created_at.strftime('%Y-%m-%d'),
-            'is_active': job.is_active,
-            'application_count': application_count  # Ajouter le nombre de candidatures
-        })
-    
-    return jsonify(result), 200
+    try:
+        fields = requested_fields(JOB_FIELDS, JOB_LIST_FIELDS)
+    except FieldsetError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    jobs = jobs_query(fields).filter_by(department_id=department_id, is_active=True).all()
+    
+    return jsonify([serialize_fields(job, JOB_FIELDS, fields) for job in jobs]), 200
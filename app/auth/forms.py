@@ -17,7 +17,7 @@ class RegisterForm(FlaskForm):
     password = PasswordField('Mot de passe', validators=[DataRequired(), Length(min=6)])
     password2 = PasswordField('Confirmer le mot de passe', validators=[DataRequired(), EqualTo('password')])
     role = SelectField('Rôle', coerce=int, validators=[DataRequired()])
-    department = StringField('Département', validators=[Length(max=50)])
+    department = SelectField('Département', coerce=int)  # 0 : aucun département
     submit = SubmitField('Enregistrer')
     
     def validate_username(self, username):
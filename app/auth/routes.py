@@ -2,7 +2,8 @@ from flask import render_template, redirect, url_for, flash, request, session, c
 from flask_login import login_user, logout_user, login_required, current_user
 from app import db
 from app.auth import bp
-from app.models.auth_models import User, Role
+from app.models.auth_models import User
+from app.utils import reference_data
 from app.auth.forms import LoginForm, RegisterForm
 from functools import wraps
 
@@ -82,15 +83,16 @@ def register():
     """Route d'enregistrement d'un nouvel utilisateur (réservée aux RH)"""
     form = RegisterForm()
     
-    # Récupération des rôles pour le formulaire
-    form.role.choices = [(r.id, r.name) for r in Role.query.all()]
+    # Rôles et départements du formulaire, lus dans le cache des données de référence
+    form.role.choices = [(r.id, r.name) for r in reference_data.roles()]
+    form.department.choices = [(0, 'Aucun')] + [(d.id, d.name) for d in reference_data.departments()]
     
     if form.validate_on_submit():
         user = User(
             username=form.username.data,
             email=form.email.data,
             role_id=form.role.data,
-            department=form.department.data
+            department_id=form.department.data or None
         )
         user.set_password(form.password.data)
         
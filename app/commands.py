@@ -0,0 +1,108 @@
+"""
+Commandes Flask CLI de l'application
+"""
+import click
+from flask.cli import with_appcontext
+
+
+@click.command('analysis-worker')
+@click.option('--worker-id', default=None, help="Identifiant du worker (par défaut machine:pid)")
+@click.option('--poll-interval', default=None, type=float, help="Attente en secondes lorsque la file est vide")
+@click.option('--once', is_flag=True, help="Vider la file d'attente puis s'arrêter")
+@click.option('--concurrency', default=None, type=int, help="Nombre d'appels simultanés au modèle")
+@with_appcontext
+def analysis_worker_command(worker_id, poll_interval, once, concurrency):
+    """Exécute les analyses de CV mises en file d'attente"""
+    from app.utils.analysis_queue import run_worker, default_worker_id
+
+    worker_id = worker_id or default_worker_id()
+    click.echo(f"Démarrage du worker d'analyse {worker_id}")
+    try:
+        processed = run_worker(worker_id=worker_id, poll_interval=poll_interval, once=once,
+                               concurrency=concurrency)
+        click.echo(f"{processed} analyse(s) traitée(s)")
+    except KeyboardInterrupt:
+        click.echo("Arrêt du worker d'analyse")
+
+
+@click.command('prune-analysis-cache')
+@with_appcontext
+def prune_analysis_cache_command():
+    """Supprime les entrées expirées ou excédentaires du cache des analyses"""
+    from app.utils.analysis_cache import prune_cache
+
+    removed = prune_cache()
+    click.echo(f"{removed} entrée(s) supprimée(s) du cache des analyses")
+
+
+@click.command('backfill-cv-artifacts')
+@click.option('--workers', default=4, show_default=True, help="Nombre de processus d'ingestion en parallèle")
+@with_appcontext
+def backfill_cv_artifacts_command(workers):
+    """Précalcule les artefacts des CV déjà téléversés"""
+    import os
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from flask import current_app
+    from app.models.models import db, Application
+    from app.utils.cv_artifacts import artifacts_folder, ingest_cv
+
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    filenames = [row[0] for row in db.session.query(Application.cv_filename)
+                 .filter(Application.cv_filename.isnot(None)).distinct()]
+    cv_paths = [os.path.join(upload_folder, name) for name in filenames]
+    cv_paths = [path for path in cv_paths if os.path.exists(path)]
+    click.echo(f"{len(cv_paths)} CV à traiter avec {workers} processus")
+
+    folder = artifacts_folder()
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(ingest_cv, path, folder): path for path in cv_paths}
+        for future in as_completed(futures):
+            try:
+                meta = future.result()
+                click.echo(f"{os.path.basename(futures[future])}: {meta['route']}, {meta['pages']} page(s)")
+            except Exception as e:
+                failed += 1
+                click.echo(f"{os.path.basename(futures[future])}: échec ({e})", err=True)
+
+    click.echo(f"{len(cv_paths) - failed} CV traité(s), {failed} échec(s)")
+
+
+@click.command('rebuild-job-stats')
+@with_appcontext
+def rebuild_job_stats_command():
+    """Recalcule entièrement les statistiques des candidatures par offre (table JobStats)"""
+    from app.utils.job_stats import rebuild_job_stats
+
+    count = rebuild_job_stats()
+    click.echo(f"Statistiques recalculées pour {count} offre(s)")
+
+
+@click.command('db-upgrade')
+@click.option('--dry-run', is_flag=True, help="Lister les scripts en attente sans les appliquer")
+@with_appcontext
+def db_upgrade_command(dry_run):
+    """Applique les scripts SQL du dossier migrations/ non encore appliqués (table SchemaMigration)"""
+    from app.utils.schema_migrations import pending_migrations, modified_migrations, upgrade
+
+    for name in modified_migrations():
+        click.echo(f"Attention : {name} a été modifié depuis son application (non réappliqué)", err=True)
+
+    if dry_run:
+        pending = pending_migrations()
+        for name in pending:
+            click.echo(name)
+        click.echo(f"{len(pending)} script(s) en attente")
+        return
+
+    applied = upgrade(on_apply=lambda name: click.echo(f"Application de {name}"))
+    click.echo(f"{len(applied)} script(s) appliqué(s)")
+
+
+def init_app(app):
+    """Enregistre les commandes CLI sur l'application Flask"""
+    app.cli.add_command(analysis_worker_command)
+    app.cli.add_command(prune_analysis_cache_command)
+    app.cli.add_command(backfill_cv_artifacts_command)
+    app.cli.add_command(rebuild_job_stats_command)
+    app.cli.add_command(db_upgrade_command)
@@ -5,6 +5,9 @@ from app import db
 from app.manager import bp
 from app.models.models import JobPosition, Application, Candidate
 from app.models.auth_models import InterviewRequest
+from app.utils.scoping import scope_jobs, scope_applications
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 from app.auth.routes import manager_required
 from app.manager.forms import InterviewRequestForm
 import os
@@ -15,38 +18,61 @@ import os
 def dashboard():
     """Tableau de bord du manager"""
     # Récupérer les postes du département du manager
-    department_jobs = JobPosition.query.filter_by(department=current_user.department).all()
-    
-    # Récupérer les candidatures pour ces postes
-    job_ids = [job.id for job in department_jobs]
-    applications = Application.query.filter(Application.job_position_id.in_(job_ids)).all()
-    
-    # Récupérer les demandes d'entretien du manager
-    interview_requests = InterviewRequest.query.filter_by(manager_id=current_user.id).all()
+    department_jobs = scope_jobs(JobPosition.query, current_user) \
+        .order_by(JobPosition.created_at.desc()).all()
+    
+    # Nombre de candidatures par poste et par statut, compté en SQL (GROUP BY) : une ligne
+    # par couple (poste, statut) au lieu d'une ligne par candidature
+    counts = scope_applications(
+        db.session.query(Application.job_position_id, Application.status_id, func.count(Application.id)),
+        current_user
+    ).group_by(Application.job_position_id, Application.status_id).all()
+    
+    job_counts = {}
+    status_counts = {}
+    for job_position_id, status_id, count in counts:
+        job_counts[job_position_id] = job_counts.get(job_position_id, 0) + count
+        status_counts[status_id] = status_counts.get(status_id, 0) + count
+    
+    # Dernières candidatures, avec le candidat et le poste (jointures)
+    recent_applications = scope_applications(Application.query.options(
+        joinedload(Application.candidate),
+        joinedload(Application.job_position)
+    ), current_user).order_by(Application.created_at.desc(), Application.id.desc()).limit(5).all()
+    
+    # Demandes d'entretien du manager : nombre et plus récentes
+    interview_query = InterviewRequest.query.filter_by(manager_id=current_user.id)
+    interview_request_count = interview_query.count()
+    recent_interview_requests = interview_query \
+        .order_by(InterviewRequest.created_at.desc(), InterviewRequest.id.desc()).limit(5).all()
     
     return render_template('manager/dashboard.html', 
                           title='Tableau de bord Manager',
                           jobs=department_jobs,
-                          applications=applications,
-                          interview_requests=interview_requests)
+                          job_counts=job_counts,
+                          status_counts=status_counts,
+                          application_count=sum(job_counts.values()),
+                          recent_applications=recent_applications,
+                          interview_request_count=interview_request_count,
+                          recent_interview_requests=recent_interview_requests)
 
 @bp.route('/applications')
 @login_required
 @manager_required
 def applications():
     """Liste des candidatures pour le département du manager"""
-    # Récupérer les postes du département du manager
-    department_jobs = JobPosition.query.filter_by(department=current_user.department).all()
-    job_ids = [job.id for job in department_jobs]
-    
-    # Récupérer les candidatures pour ces postes
-    applications = Application.query.filter(Application.job_position_id.in_(job_ids)).all()
+    # Candidatures des postes du département du manager, avec le candidat et le poste,
+    # en une seule requête
+    applications = scope_applications(Application.query.options(
+        joinedload(Application.candidate),
+        joinedload(Application.job_position)
+    ), current_user).order_by(Application.created_at.desc()).all()
     
     # Préparer les données pour l'affichage
     application_data = []
     for app in applications:
-        job = JobPosition.query.get(app.job_position_id)
-        candidate = Candidate.query.get(app.candidate_id)
+        job = app.job_position
+        candidate = app.candidate
         application_data.append({
             'id': app.id,
             'candidate_name': f"{candidate.first_name} {candidate.last_name}",
@@ -64,15 +90,18 @@ def applications():
 @manager_required
 def view_application(application_id):
     """Voir les détails d'une candidature"""
-    application = Application.query.get_or_404(application_id)
-    job = JobPosition.query.get(application.job_position_id)
+    # Candidature, candidat et poste en une requête, limitée au département du manager
+    application = scope_applications(Application.query.options(
+        joinedload(Application.candidate),
+        joinedload(Application.job_position)
+    ), current_user).filter(Application.id == application_id).first()
     
-    # Vérifier que le job appartient au département du manager
-    if job.department != current_user.department:
+    if application is None:
         flash('Vous n\'avez pas accès à cette candidature.', 'danger')
         return redirect(url_for('manager.applications'))
     
-    candidate = Candidate.query.get(application.candidate_id)
+    job = application.job_position
+    candidate = application.candidate
     
     # Vérifier si une demande d'entretien existe déjà
     existing_request = InterviewRequest.query.filter_by(
@@ -101,11 +130,11 @@ def view_application(application_id):
 @manager_required
 def request_interview(application_id):
     """Demander un entretien pour une candidature"""
-    application = Application.query.get_or_404(application_id)
-    job = JobPosition.query.get(application.job_position_id)
+    # Candidature limitée au département du manager
+    application = scope_applications(Application.query, current_user) \
+        .filter(Application.id == application_id).first()
     
-    # Vérifier que le job appartient au département du manager
-    if job.department != current_user.department:
+    if application is None:
         flash('Vous n\'avez pas accès à cette candidature.', 'danger')
         return redirect(url_for('manager.applications'))
     
@@ -141,23 +170,34 @@ def request_interview(application_id):
 @manager_required
 def interview_requests():
     """Liste des demandes d'entretien du manager"""
-    requests = InterviewRequest.query.filter_by(manager_id=current_user.id).all()
+    # Demandes du manager avec candidat et poste : une seule requête
+    rows = db.session.query(
+        InterviewRequest.id,
+        InterviewRequest.application_id,
+        InterviewRequest.requested_date,
+        InterviewRequest.status,
+        InterviewRequest.created_at,
+        Candidate.first_name,
+        Candidate.last_name,
+        JobPosition.title
+    ).join(Application, Application.id == InterviewRequest.application_id) \
+        .join(Candidate, Candidate.id == Application.candidate_id) \
+        .join(JobPosition, JobPosition.id == Application.job_position_id) \
+        .filter(InterviewRequest.manager_id == current_user.id) \
+        .order_by(InterviewRequest.created_at.desc(), InterviewRequest.id.desc()) \
+        .all()
     
     # Préparer les données pour l'affichage
     request_data = []
-    for req in requests:
-        application = Application.query.get(req.application_id)
-        candidate = Candidate.query.get(application.candidate_id)
-        job = JobPosition.query.get(application.job_position_id)
-        
+    for row in rows:
         request_data.append({
-            'id': req.id,
-            'application_id': req.application_id,
-            'candidate_name': f"{candidate.first_name} {candidate.last_name}",
-            'job_title': job.title,
-            'requested_date': req.requested_date,
-            'status': req.status,
-            'created_at': req.created_at
+            'id': row.id,
+            'application_id': row.application_id,
+            'candidate_name': f"{row.first_name} {row.last_name}",
+            'job_title': row.title,
+            'requested_date': row.requested_date,
+            'status': row.status,
+            'created_at': row.created_at
         })
     
     return render_template('manager/interview_requests.html',
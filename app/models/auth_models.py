@@ -36,6 +36,9 @@ class User(UserMixin, db.Model):
                           server_default=func.getdate(),
                           server_onupdate=func.getdate(),
                           nullable=False)
+    # Version des tokens JWT, incrémentée par le trigger TR_User_TokenVersion quand le rôle,
+    # le département ou le mot de passe change (voir app.utils.identity)
+    token_version = db.Column(db.Integer, nullable=False, server_default='1')
     
     # Relation avec InterviewRequest
     interview_requests = db.relationship('InterviewRequest', backref='requester', lazy='dynamic', overlaps="managed_interview_requests,manager")
@@ -77,6 +80,11 @@ class InterviewRequest(db.Model):
     status = db.Column(db.String(20), default='PENDING')  # PENDING, APPROVED, REFUSED, COMPLETED
     comments = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Géré côté serveur (trigger TR_InterviewRequest_UpdatedAt), utilisé pour les ETags de l'API
+    updated_at = db.Column(db.DateTime, 
+                          server_default=func.getdate(),
+                          server_onupdate=func.getdate(),
+                          nullable=False)
     
     # Relations
     application = db.relationship('Application', backref='interview_requests')
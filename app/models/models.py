@@ -33,6 +33,19 @@ class ApplicationStatusModel(db.Model):
     name = db.Column(db.String(50), nullable=False)
     description = db.Column(db.String(100), nullable=True)
 
+class ReferenceDataVersion(db.Model):
+    """
+    Version des tables de référence (Department, Role, ApplicationStatus)
+
+    Incrémentée à chaque modification de ces tables : chaque processus compare la version
+    de son cache en mémoire à celle-ci et le recharge si elle a changé (voir app.utils.reference_data).
+    """
+    __tablename__ = 'ReferenceDataVersion'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class Candidate(db.Model):
     """Modèle pour les informations des candidats"""
     __tablename__ = 'Candidate'
@@ -111,6 +124,9 @@ class JobPosition(db.Model):
 class Application(db.Model):
     """Modèle pour les candidatures"""
     __tablename__ = 'Application'
+    # La table a un trigger AFTER INSERT (TR_Application_JobStats) : SQL Server refuse alors
+    # INSERT ... OUTPUT inserted.* sans INTO ; l'identifiant est lu par SCOPE_IDENTITY()
+    __table_args__ = {'implicit_returning': False}
     
     id = db.Column(db.Integer, primary_key=True)
     candidate_id = db.Column(db.Integer, db.ForeignKey('Candidate.id'), nullable=False)
@@ -139,3 +155,131 @@ class Application(db.Model):
     
     def __repr__(self):
         return f'<Application {self.id}>'
+
+
+
+class JobStats(db.Model):
+    """
+    Statistiques des candidatures d'une offre (une ligne par offre)
+
+    Table de synthèse tenue à jour par le trigger TR_Application_JobStats dans la même
+    transaction que l'insertion, la modification ou la suppression des candidatures
+    (voir migrations/008_create_job_stats.sql). `flask rebuild-job-stats` la recalcule
+    entièrement. Ne pas la modifier depuis l'application.
+    """
+    __tablename__ = 'JobStats'
+    
+    job_position_id = db.Column(db.Integer, db.ForeignKey('JobPosition.id'), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    # Candidatures par statut (voir ApplicationStatus)
+    submitted = db.Column(db.Integer, nullable=False, default=0)
+    under_review = db.Column(db.Integer, nullable=False, default=0)
+    interview = db.Column(db.Integer, nullable=False, default=0)
+    rejected = db.Column(db.Integer, nullable=False, default=0)
+    accepted = db.Column(db.Integer, nullable=False, default=0)
+    # Scores IA : la moyenne se déduit de la somme et du nombre de candidatures notées
+    scored_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    max_score = db.Column(db.Float, nullable=True)
+    last_application_at = db.Column(db.DateTime, nullable=True)
+    
+    # Relations
+    # La ligne est supprimée avec l'offre par ON DELETE CASCADE : l'ORM ne doit ni la charger
+    # ni vider sa clé primaire (y compris quand offre.stats a déjà été lu dans la session)
+    job_position = db.relationship('JobPosition', backref=db.backref('stats', uselist=False, passive_deletes='all'))
+    
+    # Colonne de comptage de chaque statut
+    STATUS_COLUMNS = {
+        ApplicationStatus.SUBMITTED: 'submitted',
+        ApplicationStatus.UNDER_REVIEW: 'under_review',
+        ApplicationStatus.INTERVIEW: 'interview',
+        ApplicationStatus.REJECTED: 'rejected',
+        ApplicationStatus.ACCEPTED: 'accepted'
+    }
+    
+    @property
+    def average_score(self):
+        return self.score_sum / self.scored_count if self.scored_count else None
+    
+    def __repr__(self):
+        return f'<JobStats for JobPosition {self.job_position_id} ({self.total})>'
+
+
+class AnalysisJobStatus:
+    """Statuts possibles d'un job d'analyse de CV"""
+    QUEUED = 'QUEUED'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+
+
+class AnalysisJob(db.Model):
+    """Modèle pour la file d'attente des analyses IA de CV"""
+    __tablename__ = 'AnalysisJob'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    application_id = db.Column(db.Integer, db.ForeignKey('Application.id'), nullable=False)
+    batch_id = db.Column(db.Integer, db.ForeignKey('AnalysisBatch.id'), nullable=True)  # Analyse groupée d'une offre
+    status = db.Column(db.String(20), nullable=False, default=AnalysisJobStatus.QUEUED)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker_id = db.Column(db.String(100), nullable=True)
+    error_message = db.Column(db.Text, nullable=True)
+    # Copie du résultat, pour que le endpoint de suivi n'ait pas à relire la candidature
+    ai_analysis = db.Column(db.Text, nullable=True)
+    ai_score = db.Column(db.Float, nullable=True)
+    # Empreinte de l'offre (description + exigences) analysée, pour repérer les scores obsolètes
+    job_hash = db.Column(db.String(64), nullable=True)
+    # text, vision, text_fallback ou cache (voir app.utils.ai_analysis.AnalysisRoute)
+    analysis_route = db.Column(db.String(20), nullable=True)
+    # Taille de la requête envoyée au modèle (None si le résultat venait du cache)
+    pages_sent = db.Column(db.Integer, nullable=True)
+    image_bytes = db.Column(db.Integer, nullable=True)  # JPEG, avant encodage base64
+    payload_bytes = db.Column(db.Integer, nullable=True)  # Corps JSON complet
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    # Relations
+    application = db.relationship('Application', backref=db.backref('analysis_jobs', lazy='dynamic'))
+    
+    def __repr__(self):
+        return f'<AnalysisJob {self.id} for Application {self.application_id} ({self.status})>'
+
+
+class AnalysisBatch(db.Model):
+    """Modèle pour les analyses groupées de toutes les candidatures d'une offre"""
+    __tablename__ = 'AnalysisBatch'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_position_id = db.Column(db.Integer, db.ForeignKey('JobPosition.id'), nullable=False)
+    requested_by = db.Column(db.Integer, db.ForeignKey('User.id'), nullable=True)
+    total = db.Column(db.Integer, nullable=False, default=0)  # Nombre de jobs mis en file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relations
+    job_position = db.relationship('JobPosition', backref=db.backref('analysis_batches', lazy='dynamic'))
+    jobs = db.relationship('AnalysisJob', backref='batch', lazy='dynamic')
+    
+    def __repr__(self):
+        return f'<AnalysisBatch {self.id} for JobPosition {self.job_position_id}>'
+
+
+class AnalysisCache(db.Model):
+    """Modèle pour le cache des résultats d'analyse IA, indexé par le contenu du CV et de l'offre"""
+    __tablename__ = 'AnalysisCache'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # sha256(CV + description + exigences + modèle + version du prompt), voir app.utils.analysis_cache
+    cache_key = db.Column(db.String(64), nullable=False, unique=True)
+    cv_sha256 = db.Column(db.String(64), nullable=False)
+    model = db.Column(db.String(50), nullable=False)
+    prompt_version = db.Column(db.Integer, nullable=False)
+    analysis_route = db.Column(db.String(20), nullable=True)  # Chemin suivi par l'analyse d'origine
+    ai_analysis = db.Column(db.Text, nullable=False)
+    ai_score = db.Column(db.Float, nullable=True)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)  # Création ou dernier hit, pour l'éviction LRU
+    
+    def __repr__(self):
+        return f'<AnalysisCache {self.cache_key[:12]}>'
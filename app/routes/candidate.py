@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from app.models.models import Candidate, JobPosition, Application, ApplicationStatus
 from app import db
 from app.forms import ApplicationForm
+from app.utils.cv_artifacts import schedule_ingest
 from werkzeug.utils import secure_filename
 import os
 import uuid
@@ -50,6 +51,9 @@ def apply(job_id):
             db.session.add(application)
             db.session.commit()
             
+            # Précalculer le texte et les pages du CV pour l'analyse
+            schedule_ingest(cv_path)
+            
             flash('Votre candidature a été soumise avec succès!', 'success')
             # Stocker l'ID de candidature dans la session pour la page de confirmation
             session['last_application_id'] = application.id
@@ -1,13 +1,34 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, session, abort
-from app.models.models import JobPosition, Application, ApplicationStatus, Candidate
-from app.models.auth_models import User
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, session, abort, Response, stream_with_context
+from app.models.models import JobPosition, Application, ApplicationStatus, Candidate, AnalysisJobStatus, JobStats
 from app import db
+from sqlalchemy import or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
 from app.forms import JobPositionForm, HrLoginForm
-from app.utils.ai_analysis import analyze_cv
+from app.utils import reference_data
+from app.utils.batch_loader import prime
+from app.utils.html_pagination import paginate_query
+from app.utils.returning import update_returning
+from app.utils.analysis_stream import stream_application_analysis
+from app.utils.analysis_queue import (enqueue_analysis, latest_analysis_job, PENDING_STATUSES,
+                                      enqueue_job_analyses, latest_analysis_batch, batch_progress)
 import os
 
 bp = Blueprint('hr', __name__, url_prefix='/hr')
 
+# Tris des listes HTML (paramètre sort ; id départage les égalités pour des pages stables)
+APPLICATION_SORTS = {
+    '-created_at': (Application.created_at.desc(), Application.id.desc()),
+    'created_at': (Application.created_at.asc(), Application.id.asc()),
+    '-score': (Application.ai_score.desc(), Application.id.desc()),
+    'score': (Application.ai_score.asc(), Application.id.asc())
+}
+JOB_SORTS = {
+    '-created_at': (JobPosition.created_at.desc(), JobPosition.id.desc()),
+    'created_at': (JobPosition.created_at.asc(), JobPosition.id.asc()),
+    'title': (JobPosition.title.asc(), JobPosition.id.asc())
+}
+
 # Décorateur pour vérifier si l'accès RH est autorisé
 def hr_login_required(view_function):
     def decorated_function(*args, **kwargs):
@@ -37,7 +58,8 @@ def dashboard():
     """Tableau de bord RH"""
     # Récupérer les statistiques
     job_count = JobPosition.query.count()
-    application_count = Application.query.count()
+    # Somme des compteurs de JobStats (une ligne par offre) plutôt qu'un COUNT sur Application
+    application_count = db.session.query(db.func.coalesce(db.func.sum(JobStats.total), 0)).scalar()
     
     # Récupérer les dernières candidatures
     recent_applications = Application.query.order_by(Application.created_at.desc()).limit(5).all()
@@ -56,9 +78,26 @@ def actions():
 @bp.route('/job_positions')
 @hr_login_required
 def job_positions():
-    """Liste des offres d'emploi"""
-    jobs = JobPosition.query.all()
-    return render_template('hr/job_positions.html', jobs=jobs)
+    """Liste des offres d'emploi (paginée, avec recherche sur le titre et tri)"""
+    search = request.args.get('q', '').strip()
+    sort = request.args.get('sort', '-created_at')
+    if sort not in JOB_SORTS:
+        sort = '-created_at'
+    
+    query = JobPosition.query.options(joinedload(JobPosition.stats))
+    if search:
+        query = query.filter(JobPosition.title.contains(search, autoescape=True))
+    
+    pagination = paginate_query(query.order_by(*JOB_SORTS[sort]))
+    return render_template('hr/job_positions.html',
+                          jobs=pagination.items,
+                          pagination=pagination,
+                          search=search,
+                          current_sort=sort)
+
+def department_choices():
+    """Choix (id, nom) des départements pour les formulaires d'offre"""
+    return [(d.id, d.name) for d in reference_data.departments()]
 
 @bp.route('/job/add', methods=['GET', 'POST'])
 @hr_login_required
@@ -66,19 +105,15 @@ def add_job():
     """Ajout d'une nouvelle offre d'emploi"""
     form = JobPositionForm()
     
-    # Récupérer les départements existants pour le menu déroulant
-    departments = db.session.query(User.department).filter(User.department.isnot(None)).distinct().all()
-    department_list = [dept[0] for dept in departments]
-    
-    # Ajouter une option vide pour les postes sans département spécifique
-    form.department.choices = [(d, d) for d in sorted(department_list)] + [('', 'Aucun département')]
+    # Départements du menu déroulant, lus dans le cache des données de référence
+    form.department.choices = department_choices()
     
     if form.validate_on_submit():
         job = JobPosition(
             title=form.title.data,
             description=form.description.data,
             requirements=form.requirements.data,
-            department=form.department.data,
+            department_id=form.department.data,
             is_active=form.is_active.data
         )
         
@@ -98,16 +133,8 @@ def edit_job(job_id):
     job = JobPosition.query.get_or_404(job_id)
     form = JobPositionForm()
     
-    # Récupérer les départements existants pour le menu déroulant
-    departments = db.session.query(User.department).filter(User.department.isnot(None)).distinct().all()
-    department_list = [dept[0] for dept in departments]
-    
-    # Ajouter le département actuel du poste s'il n'est pas dans la liste
-    if job.department and job.department not in department_list:
-        department_list.append(job.department)
-    
-    # Ajouter une option vide pour les postes sans département spécifique
-    form.department.choices = [(d, d) for d in sorted(department_list)] + [('', 'Aucun département')]
+    # Départements du menu déroulant, lus dans le cache des données de référence
+    form.department.choices = department_choices()
     
     if form.validate_on_submit():
         try:
@@ -119,7 +146,7 @@ def edit_job(job_id):
                     'title': form.title.data,
                     'description': form.description.data,
                     'requirements': form.requirements.data,
-                    'department': form.department.data,
+                    'department_id': form.department.data,
                     'is_active': form.is_active.data
                 },
                 synchronize_session='evaluate'  # Option clé pour éviter StaleDataError
@@ -143,7 +170,7 @@ def edit_job(job_id):
         form.title.data = job.title
         form.description.data = job.description
         form.requirements.data = job.requirements
-        form.department.data = job.department
+        form.department.data = job.department_id
         form.is_active.data = job.is_active
     
     return render_template('hr/job_form.html', form=form, title="Modifier l'offre d'emploi")
@@ -154,6 +181,10 @@ def applications():
     """Liste de toutes les candidatures"""
     job_id = request.args.get('job_id', type=int)
     status = request.args.get('status')
+    search = request.args.get('q', '').strip()
+    sort = request.args.get('sort', '-created_at')
+    if sort not in APPLICATION_SORTS:
+        sort = '-created_at'
     
     # Filtrage des candidatures
     query = Application.query
@@ -163,10 +194,30 @@ def applications():
     
     if status and hasattr(ApplicationStatus, status.upper()):
         status_enum = getattr(ApplicationStatus, status.upper())
-        query = query.filter_by(status=status_enum)
+        # status est une propriété : filtrer sur la colonne status_id
+        query = query.filter(Application.status_id == status_enum)
+    
+    # Recherche sur le nom, le prénom ou l'email du candidat
+    if search:
+        query = query.join(Application.candidate).filter(or_(
+            Candidate.first_name.contains(search, autoescape=True),
+            Candidate.last_name.contains(search, autoescape=True),
+            Candidate.email.contains(search, autoescape=True)
+        ))
+    
+    pagination = paginate_query(query.order_by(*APPLICATION_SORTS[sort]))
+    applications = pagination.items
     
-    applications = query.all()
-    jobs = JobPosition.query.all()
+    # Menu déroulant des postes : identifiant et titre seulement
+    jobs = db.session.query(JobPosition.id, JobPosition.title).order_by(JobPosition.title).all()
+    
+    # Candidats et offres de la page lus par les filtres du template : une requête par modèle
+    prime(Candidate, {application.candidate_id for application in applications})
+    prime(JobPosition, {application.job_position_id for application in applications})
+    
+    # Avancement de la dernière analyse groupée de l'offre sélectionnée
+    analysis_batch = latest_analysis_batch(job_id) if job_id else None
+    analysis_progress = batch_progress(analysis_batch) if analysis_batch else None
     
     # Création d'une liste des statuts pour le template
     statuses = [
@@ -179,11 +230,16 @@ def applications():
     
     return render_template('hr/applications.html', 
                           applications=applications, 
+                          pagination=pagination,
                           jobs=jobs,
+                          search=search,
+                          current_sort=sort,
                           ApplicationStatus=ApplicationStatus,
                           statuses=statuses,
                           current_job_id=job_id,
-                          current_status=status)
+                          current_status=status,
+                          analysis_batch=analysis_batch,
+                          analysis_progress=analysis_progress)
 
 @bp.route('/application/<int:application_id>')
 @hr_login_required
@@ -204,37 +260,42 @@ def view_application(application_id):
         {'id': ApplicationStatus.ACCEPTED, 'name': 'accepted', 'display_name': 'Acceptée'}
     ]
     
+    # Dernière analyse demandée, pour signaler une analyse en cours
+    analysis_job = latest_analysis_job(application_id)
+    analysis_pending = analysis_job is not None and analysis_job.status in PENDING_STATUSES
+    
     return render_template('hr/application_detail.html', 
                           application=application,
                           candidate=candidate,
                           ApplicationStatus=ApplicationStatus,
-                          statuses=statuses)
+                          statuses=statuses,
+                          analysis_job=analysis_job,
+                          analysis_pending=analysis_pending)
 
 @bp.route('/application/<int:application_id>/update_status', methods=['POST'])
 @hr_login_required
 def update_application_status(application_id):
     """Mise à jour du statut d'une candidature"""
-    application = Application.query.get_or_404(application_id)
-    
     new_status = request.form.get('status')
     if new_status and hasattr(ApplicationStatus, new_status.upper()):
         status_enum = getattr(ApplicationStatus, new_status.upper())
         
         try:
-            # Utilisation de l'approche bulk update pour éviter les erreurs StaleDataError
-            db.session.query(Application).filter_by(id=application_id).update(
-                {'status_id': status_enum},  # Mise à jour de status_id au lieu de status
-                synchronize_session='evaluate'
-            )
+            # Mise à jour directe (évite les StaleDataError) relue dans la même requête :
+            # pas de lecture préalable ni de refresh() après le commit
+            updated = update_returning(Application, db.update(Application)
+                                       .where(Application.id == application_id)
+                                       .values(status_id=status_enum))  # status_id au lieu de status
+            if not updated:
+                db.session.rollback()
+                abort(404)
             
             # Commit des changements
             db.session.commit()
             
-            # Rafraîchir l'objet pour obtenir les dernières valeurs
-            db.session.refresh(application)
-            
             flash('Le statut de la candidature a été mis à jour.', 'success')
-        except Exception as e:
+        except SQLAlchemyError as e:
+            db.session.rollback()
             current_app.logger.error(f"Erreur lors de la mise à jour du statut: {str(e)}")
             flash(f"Erreur lors de la mise à jour du statut: {str(e)}", 'danger')
     else:
@@ -245,9 +306,8 @@ def update_application_status(application_id):
 @bp.route('/application/<int:application_id>/analyze', methods=['POST'])
 @hr_login_required
 def analyze_application(application_id):
-    """Analyse d'une candidature par l'IA"""
+    """Mise en file d'attente de l'analyse d'une candidature par l'IA"""
     application = Application.query.get_or_404(application_id)
-    job = JobPosition.query.get(application.job_position_id)
     
     # Chemin du CV
     cv_path = os.path.join(current_app.config['UPLOAD_FOLDER'], application.cv_filename)
@@ -258,28 +318,49 @@ def analyze_application(application_id):
         return redirect(url_for('hr.view_application', application_id=application_id))
     
     try:
-        # Appel à la fonction d'analyse IA
-        analysis_result, score = analyze_cv(cv_path, job.description, job.requirements)
-        
-        # Mise à jour des résultats de l'analyse en utilisant l'approche bulk update
-        # pour éviter l'erreur StaleDataError
-        db.session.query(Application).filter_by(id=application_id).update(
-            {
-                'ai_analysis': analysis_result,
-                'ai_score': score
-            },
-            synchronize_session='evaluate'  # Option clé pour éviter StaleDataError
-        )
-        
-        # Commit des changements
-        db.session.commit()
-        
-        # Rafraîchir l'objet pour obtenir les dernières valeurs depuis la base de données
-        db.session.refresh(application)
-        
-        flash('L\'analyse du CV a été effectuée avec succès.', 'success')
+        # L'analyse est exécutée en arrière-plan par un worker (`flask analysis-worker`)
+        analysis_job = enqueue_analysis(application_id)
+        if analysis_job.status == AnalysisJobStatus.DONE:
+            flash('L\'analyse du CV a été effectuée avec succès.', 'success')
+        else:
+            flash('L\'analyse du CV a été mise en file d\'attente. Le résultat apparaîtra sur cette page dès qu\'il sera disponible.', 'info')
     except Exception as e:
-        current_app.logger.error(f"Erreur lors de l'analyse du CV: {str(e)}")
-        flash(f'Erreur lors de l\'analyse du CV: {str(e)}', 'danger')
+        db.session.rollback()
+        current_app.logger.error(f"Erreur lors de la mise en file d'attente de l'analyse: {str(e)}")
+        flash(f'Erreur lors de la mise en file d\'attente de l\'analyse: {str(e)}', 'danger')
     
     return redirect(url_for('hr.view_application', application_id=application_id))
+
+@bp.route('/application/<int:application_id>/analyze/stream')
+@hr_login_required
+def stream_application_analysis_events(application_id):
+    """Analyse d'une candidature diffusée en direct (server-sent events, consommé par EventSource)"""
+    # GET délibéré malgré l'appel payant au modèle et l'écriture du résultat : EventSource
+    # n'envoie que des requêtes GET. La route exige la session RH, et une analyse déjà en
+    # file ou en cours n'est pas relancée (voir stream_application_analysis).
+    Application.query.get_or_404(application_id)
+    return Response(
+        stream_with_context(stream_application_analysis(application_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@bp.route('/job/<int:job_id>/analyze_all', methods=['POST'])
+@hr_login_required
+def analyze_all_applications(job_id):
+    """Mise en file d'attente de l'analyse de toutes les candidatures sans score (ou au score obsolète) d'une offre"""
+    from flask_login import current_user
+    job = JobPosition.query.get_or_404(job_id)
+    
+    try:
+        batch = enqueue_job_analyses(job, requested_by=current_user.id)
+        if batch is None:
+            flash('Aucune candidature à analyser : toutes ont un score à jour ou une analyse en cours.', 'info')
+        else:
+            flash(f'{batch.total} analyse(s) mise(s) en file d\'attente. L\'avancement est affiché ci-dessous.', 'info')
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Erreur lors de la mise en file d'attente des analyses: {str(e)}")
+        flash(f'Erreur lors de la mise en file d\'attente des analyses: {str(e)}', 'danger')
+    
+    return redirect(url_for('hr.applications', job_id=job_id))
@@ -1,9 +1,13 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, abort
 from app.models.models import Application, Candidate, JobPosition
 from app.models.auth_models import InterviewRequest, User
 from app import db
 from app.routes.hr import hr_login_required
+from app.utils import reference_data
+from app.utils.returning import update_returning
 from datetime import datetime
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
 
 bp = Blueprint('hr_interview', __name__, url_prefix='/hr/interviews')
 
@@ -11,27 +15,38 @@ bp = Blueprint('hr_interview', __name__, url_prefix='/hr/interviews')
 @hr_login_required
 def interview_requests():
     """Liste des demandes d'entretien"""
-    # Récupérer toutes les demandes d'entretien
-    requests = InterviewRequest.query.all()
+    # Toutes les demandes d'entretien avec candidat, offre et manager : une seule requête
+    rows = db.session.query(
+        InterviewRequest.id,
+        InterviewRequest.application_id,
+        InterviewRequest.requested_date,
+        InterviewRequest.status,
+        InterviewRequest.created_at,
+        Candidate.first_name,
+        Candidate.last_name,
+        JobPosition.title,
+        JobPosition.department_id,
+        User.username
+    ).join(Application, Application.id == InterviewRequest.application_id) \
+        .join(Candidate, Candidate.id == Application.candidate_id) \
+        .join(JobPosition, JobPosition.id == Application.job_position_id) \
+        .join(User, User.id == InterviewRequest.manager_id) \
+        .order_by(InterviewRequest.created_at.desc(), InterviewRequest.id.desc()) \
+        .all()
     
     # Préparer les données pour l'affichage
     request_data = []
-    for req in requests:
-        application = Application.query.get(req.application_id)
-        candidate = Candidate.query.get(application.candidate_id)
-        job = JobPosition.query.get(application.job_position_id)
-        manager = User.query.get(req.manager_id)
-        
+    for row in rows:
         request_data.append({
-            'id': req.id,
-            'candidate_name': f"{candidate.first_name} {candidate.last_name}",
-            'job_title': job.title,
-            'department': job.department,
-            'manager_name': manager.username,
-            'requested_date': req.requested_date,
-            'status': req.status,
-            'created_at': req.created_at,
-            'application_id': application.id
+            'id': row.id,
+            'candidate_name': f"{row.first_name} {row.last_name}",
+            'job_title': row.title,
+            'department': reference_data.department_name(row.department_id),
+            'manager_name': row.username,
+            'requested_date': row.requested_date,
+            'status': row.status,
+            'created_at': row.created_at,
+            'application_id': row.application_id
         })
     
     return render_template('hr/interview_requests.html',
@@ -42,11 +57,16 @@ def interview_requests():
 @hr_login_required
 def view_interview_request(request_id):
     """Voir les détails d'une demande d'entretien"""
-    interview_request = InterviewRequest.query.get_or_404(request_id)
-    application = Application.query.get(interview_request.application_id)
-    candidate = Candidate.query.get(application.candidate_id)
-    job = JobPosition.query.get(application.job_position_id)
-    manager = User.query.get(interview_request.manager_id)
+    # Demande, candidature, candidat, offre et manager en une requête (jointures)
+    interview_request = InterviewRequest.query.options(
+        joinedload(InterviewRequest.manager),
+        joinedload(InterviewRequest.application).joinedload(Application.candidate),
+        joinedload(InterviewRequest.application).joinedload(Application.job_position)
+    ).filter(InterviewRequest.id == request_id).first_or_404()
+    application = interview_request.application
+    candidate = application.candidate
+    job = application.job_position
+    manager = interview_request.manager
     
     return render_template('hr/interview_request_detail.html',
                           title=f'Demande d\'entretien pour {candidate.first_name} {candidate.last_name}',
@@ -60,33 +80,32 @@ def view_interview_request(request_id):
 @hr_login_required
 def update_interview_status(request_id):
     """Mise à jour du statut d'une demande d'entretien"""
-    interview_request = InterviewRequest.query.get_or_404(request_id)
-    
     new_status = request.form.get('status')
     if new_status in ['APPROVED', 'REFUSED', 'COMPLETED']:
         try:
-            # Utilisation de l'approche bulk update pour éviter les erreurs StaleDataError
-            db.session.query(InterviewRequest).filter_by(id=request_id).update(
-                {'status': new_status},
-                synchronize_session='evaluate'
-            )
+            # Mise à jour directe (évite les StaleDataError), relue dans la même requête :
+            # l'identifiant de la candidature est connu sans lecture préalable de la demande
+            updated = update_returning(InterviewRequest, db.update(InterviewRequest)
+                                       .where(InterviewRequest.id == request_id)
+                                       .values(status=new_status))
+            if not updated:
+                db.session.rollback()
+                abort(404)
             
-            # Si approuvé, mettre à jour le statut de la candidature à "INTERVIEW"
+            # Si approuvé, mettre à jour le statut de la candidature à "INTERVIEW" (même transaction)
             if new_status == 'APPROVED':
-                application_id = interview_request.application_id
-                db.session.query(Application).filter_by(id=application_id).update(
-                    {'status_id': 3},  # 3 = INTERVIEW dans ApplicationStatus
-                    synchronize_session='evaluate'
+                db.session.execute(
+                    db.update(Application)
+                    .where(Application.id == updated[0].application_id)
+                    .values(status_id=3)  # 3 = INTERVIEW dans ApplicationStatus
                 )
             
             # Commit des changements
             db.session.commit()
             
-            # Rafraîchir l'objet pour obtenir les dernières valeurs
-            db.session.refresh(interview_request)
-            
             flash('Le statut de la demande d\'entretien a été mis à jour.', 'success')
-        except Exception as e:
+        except SQLAlchemyError as e:
+            db.session.rollback()
             current_app.logger.error(f"Erreur lors de la mise à jour du statut: {str(e)}")
             flash(f"Erreur lors de la mise à jour du statut: {str(e)}", 'danger')
     else:
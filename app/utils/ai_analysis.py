@@ -4,67 +4,386 @@ import PyPDF2
 from pdf2image import convert_from_path
 from PIL import Image
 import io
+import re
 import tempfile
-import requests
 import json
+import time
 from dotenv import load_dotenv
-import urllib3
-
-# Désactiver les avertissements liés à la désactivation de la vérification SSL
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from app.utils.openai_client import chat_completion, chat_completion_stream
 
 # Chargement des variables d'environnement
 load_dotenv()
 
-def convert_pdf_to_images(pdf_path, dpi=300):
+# Modèles utilisés pour l'analyse
+VISION_MODEL = "gpt-4o"  # Utilisation du nouveau modèle qui remplace gpt-4-vision-preview
+TEXT_MODEL = "gpt-3.5-turbo"
+
+# Version des prompts : à incrémenter à chaque modification des prompts ci-dessous,
+# afin d'invalider les résultats mis en cache (voir app.utils.analysis_cache)
+PROMPT_VERSION = 1
+
+# Préfixes des messages renvoyés à la place d'une analyse lorsque celle-ci échoue
+ERROR_PREFIXES = ("Erreur", "Impossible d'analyser")
+
+UNREADABLE_CV_MESSAGE = "Impossible d'analyser le CV. Veuillez vérifier le format du fichier."
+
+def is_error_result(analysis, score):
+    """Indique si le résultat d'analyse_cv correspond à un message d'erreur plutôt qu'à une analyse"""
+    return not analysis or (not score and analysis.startswith(ERROR_PREFIXES))
+
+def extract_score(analysis):
+    """
+    Extrait le score de la ligne "SCORE: xx" de la réponse du modèle
+    
+    Returns:
+        float: score sur 100 (0 si absent ou illisible)
+    """
+    if "SCORE:" not in analysis:
+        return 0
+    try:
+        score_line = [line for line in analysis.split('\n') if "SCORE:" in line][0]
+        score_text = score_line.split("SCORE:")[1].strip().split()[0]
+        
+        # Extraire uniquement les chiffres avant tout caractère non numérique
+        score_match = re.search(r'(\d+)', score_text)
+        if score_match:
+            return float(score_match.group(1))
+    except Exception as e:
+        print(f"Erreur lors de l'extraction du score: {e}")
+    return 0
+
+def add_timing(stats, stage, seconds):
+    """Cumule la durée d'une étape de l'analyse dans stats['timings'] (en secondes)"""
+    if stats is not None:
+        timings = stats.setdefault('timings', {})
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+def _render_setting(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return value.lower() == 'yes'
+    return type(default)(value)
+
+class RenderProfile:
     """
-    Convertit un PDF en une liste d'images
+    Paramètres de rendu des pages du CV envoyées au modèle Vision
+    
+    Le modèle redimensionne de toute façon les images reçues (côté le plus court ramené à
+    768 px) : rendre et envoyer des pages A4 à 300 dpi ne fait qu'alourdir la requête.
+    Le profil fixe un nombre maximal de pixels par page et un budget d'octets pour
+    l'ensemble des pages ; la qualité JPEG est abaissée par paliers jusqu'à le respecter.
+    """
+    
+    def __init__(self, max_pages=5, dpi=300, max_pixels=1_200_000, max_bitmap_mb=48.0,
+                 budget_kb=1500, grayscale=False, qualities=(80, 70, 60, 50, 40)):
+        self.max_pages = max_pages          # Seules les premières pages sont envoyées
+        self.dpi = dpi                      # Résolution maximale de rendu
+        self.max_pixels = max_pixels        # Nombre maximal de pixels par page
+        self.max_bitmap_mb = max_bitmap_mb  # Plafond de mémoire d'une page rendue (bitmap RGB)
+        self.budget_kb = budget_kb          # Budget JPEG total de la requête, toutes pages confondues
+        self.grayscale = grayscale          # Envoyer les pages en niveaux de gris
+        self.qualities = tuple(qualities)   # Paliers de qualité JPEG, du meilleur au plus compact
+    
+    @classmethod
+    def from_env(cls):
+        """Profil configuré par les variables d'environnement CV_*"""
+        defaults = cls()
+        return cls(
+            max_pages=_render_setting('CV_MAX_PAGES', defaults.max_pages),
+            dpi=_render_setting('CV_RENDER_DPI', defaults.dpi),
+            max_pixels=_render_setting('CV_IMAGE_MAX_PIXELS', defaults.max_pixels),
+            max_bitmap_mb=_render_setting('CV_MAX_BITMAP_MB', defaults.max_bitmap_mb),
+            budget_kb=_render_setting('CV_IMAGE_BUDGET_KB', defaults.budget_kb),
+            grayscale=_render_setting('CV_IMAGE_GRAYSCALE', defaults.grayscale)
+        )
+    
+    def fingerprint(self):
+        """Empreinte des paramètres qui influencent les images produites"""
+        return (f"p{self.max_pages}-d{self.dpi}-px{self.max_pixels}-m{self.max_bitmap_mb}"
+                f"-b{self.budget_kb}-g{int(self.grayscale)}-q{'.'.join(map(str, self.qualities))}")
+    
+    def page_dpi(self, page_size):
+        """
+        Résolution de rendu d'une page : la plus haute qui respecte à la fois dpi,
+        max_pixels et le plafond de mémoire du bitmap
+        """
+        area_in2 = (page_size[0] / 72) * (page_size[1] / 72)
+        max_pixels = min(self.max_pixels, self.max_bitmap_mb * 1024 * 1024 / 3)
+        return max(36, min(self.dpi, int((max_pixels / area_in2) ** 0.5)))
+
+# Profil par défaut
+DEFAULT_PROFILE = RenderProfile.from_env()
+
+# Chemin vers les binaires Poppler (chemin spécifique en fallback si Poppler n'est pas dans le PATH)
+# Ancien chemin temporaire (commenté) : r"C:\poppler\poppler-24.08.0\Library\bin"
+POPPLER_FALLBACK_PATH = r"C:\Program Files\poppler\bin"
+
+# Chemin Poppler retenu après le premier rendu réussi (None = PATH système)
+_poppler_path = None
+
+# Taille d'une page A4 en points, utilisée si les dimensions ne peuvent pas être lues
+A4_SIZE_POINTS = (595.0, 842.0)
+
+def _page_sizes(pdf_path, max_pages):
+    """
+    Dimensions (en points) des premières pages du PDF
+    
+    Returns:
+        list: [(largeur, hauteur), ...] limitée à max_pages
+    """
+    try:
+        reader = PyPDF2.PdfReader(pdf_path)
+        sizes = []
+        for page in reader.pages[:max_pages]:
+            box = page.mediabox
+            sizes.append((float(box.width), float(box.height)))
+        return sizes
+    except Exception as e:
+        print(f"Lecture des dimensions du PDF impossible, format A4 supposé: {e}")
+        from pdf2image import pdfinfo_from_path
+        info = pdfinfo_from_path(pdf_path, poppler_path=_poppler_path)
+        return [A4_SIZE_POINTS] * min(max_pages, int(info.get('Pages', 0)))
+
+def _render_page(pdf_path, page_number, dpi):
+    """Rend une seule page du PDF (numérotée à partir de 1) en image PIL"""
+    global _poppler_path
+    try:
+        # Essayer d'abord avec Poppler dans le PATH du système (ou le chemin déjà retenu)
+        images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number,
+                                   poppler_path=_poppler_path)
+    except Exception as path_error:
+        if _poppler_path is not None:
+            raise
+        print(f"Poppler non trouvé dans le PATH, tentative avec le chemin spécifique: {path_error}")
+        images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number,
+                                   poppler_path=POPPLER_FALLBACK_PATH)
+        _poppler_path = POPPLER_FALLBACK_PATH
+    return images[0] if images else None
+
+def iter_pdf_pages(pdf_path, profile=None, page_sizes=None):
+    """
+    Génère les premières pages d'un PDF une par une, sous forme d'images PIL
+    
+    Seules les pages demandées sont rendues (first_page/last_page de pdf2image) et chaque
+    bitmap est libéré avant le rendu de la page suivante : la mémoire consommée reste celle
+    d'une seule page, quelle que soit la longueur du document.
     
     Args:
         pdf_path: Chemin vers le fichier PDF
-        dpi: Résolution des images (plus élevé = meilleure qualité mais fichiers plus grands)
+        profile: RenderProfile (DEFAULT_PROFILE par défaut)
+        page_sizes: Dimensions des pages si elles ont déjà été lues
         
+    Yields:
+        PIL.Image: page rendue, fermée dès que l'appelant passe à la suivante
+    """
+    profile = profile or DEFAULT_PROFILE
+    if page_sizes is None:
+        page_sizes = _page_sizes(pdf_path, profile.max_pages)
+    for page_number, page_size in enumerate(page_sizes, start=1):
+        image = _render_page(pdf_path, page_number, profile.page_dpi(page_size))
+        if image is None:
+            break
+        try:
+            yield image
+        finally:
+            image.close()
+
+def _jpeg_bytes(image, quality):
+    buffered = io.BytesIO()
+    image.save(buffered, format="JPEG", quality=quality, optimize=True)
+    return buffered.getvalue()
+
+def encode_page_within_budget(image, budget_bytes, profile=None):
+    """
+    Encode une page en JPEG en respectant un budget d'octets
+    
+    La qualité JPEG est abaissée par paliers ; si le palier le plus bas ne suffit pas,
+    l'image est réduite de 20 % et les paliers sont repris.
+    
     Returns:
-        list: Liste d'objets PIL Image
+        bytes: image JPEG
     """
+    profile = profile or DEFAULT_PROFILE
+    owned = []  # Images intermédiaires à libérer
     try:
-        # Essayer d'abord avec Poppler dans le PATH du système
-        try:
-            # Utiliser pdf2image sans spécifier le chemin Poppler (utilise le PATH système)
-            images = convert_from_path(pdf_path, dpi=dpi)
-            return images
-        except Exception as path_error:
-            print(f"Poppler non trouvé dans le PATH, tentative avec le chemin spécifique: {path_error}")
-            
-            # Chemin vers les binaires Poppler (chemin spécifique en fallback)
-            # Ancien chemin temporaire (commenté) : r"C:\poppler\poppler-24.08.0\Library\bin"
-            # Utiliser le chemin système
-            poppler_path = r"C:\Program Files\poppler\bin"
-            
-            # Utiliser pdf2image pour convertir le PDF en images en spécifiant le chemin vers Poppler
-            images = convert_from_path(pdf_path, dpi=dpi, poppler_path=poppler_path)
-            return images
-    except Exception as e:
-        print(f"Erreur lors de la conversion du PDF en images: {e}")
-        return []
+        if profile.grayscale and image.mode != 'L':
+            image = image.convert('L')
+            owned.append(image)
+        elif image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+            owned.append(image)
+        
+        if image.width * image.height > profile.max_pixels:
+            ratio = (profile.max_pixels / (image.width * image.height)) ** 0.5
+            image = image.resize((int(image.width * ratio), int(image.height * ratio)), Image.LANCZOS)
+            owned.append(image)
+        
+        while True:
+            for quality in profile.qualities:
+                data = _jpeg_bytes(image, quality)
+                if len(data) <= budget_bytes:
+                    return data
+            # En dessous de cette largeur, le texte du CV ne serait plus lisible
+            if image.width < 500:
+                return data
+            image = image.resize((int(image.width * 0.8), int(image.height * 0.8)), Image.LANCZOS)
+            owned.append(image)
+    finally:
+        for intermediate in owned:
+            intermediate.close()
 
-def encode_image_to_base64(image):
+def iter_page_jpegs(pdf_path, profile=None, stats=None):
     """
-    Encode une image PIL en base64 pour l'envoi à l'API
+    Génère les premières pages d'un PDF encodées en JPEG, une par une
+    
+    Le budget total du profil est réparti entre les pages restantes : une page compacte
+    laisse plus de place aux suivantes.
     
     Args:
-        image: Objet PIL Image
+        pdf_path: Chemin vers le fichier PDF
+        profile: RenderProfile (DEFAULT_PROFILE par défaut)
+        stats: Dictionnaire optionnel complété avec le nombre de pages et d'octets JPEG
         
+    Yields:
+        bytes: image JPEG de la page
+    """
+    profile = profile or DEFAULT_PROFILE
+    started = time.perf_counter()
+    page_sizes = _page_sizes(pdf_path, profile.max_pages)
+    add_timing(stats, 'rasterize', time.perf_counter() - started)
+    
+    remaining_bytes = profile.budget_kb * 1024
+    pages = iter_pdf_pages(pdf_path, profile, page_sizes)
+    for index in range(len(page_sizes)):
+        started = time.perf_counter()
+        image = next(pages, None)
+        add_timing(stats, 'rasterize', time.perf_counter() - started)
+        if image is None:
+            break
+        
+        started = time.perf_counter()
+        page_budget = remaining_bytes / (len(page_sizes) - index)
+        data = encode_page_within_budget(image, page_budget, profile)
+        add_timing(stats, 'encode', time.perf_counter() - started)
+        remaining_bytes -= len(data)
+        if stats is not None:
+            stats['pages_sent'] = stats.get('pages_sent', 0) + 1
+            stats['image_bytes'] = stats.get('image_bytes', 0) + len(data)
+        yield data
+    pages.close()
+
+def iter_encoded_pages(pdf_path, profile=None, stats=None):
+    """
+    Génère les premières pages d'un PDF encodées en JPEG base64, une par une
+    (voir iter_page_jpegs)
+    
+    Yields:
+        str: Chaîne base64 de la page
+    """
+    for data in iter_page_jpegs(pdf_path, profile, stats):
+        started = time.perf_counter()
+        encoded = base64.b64encode(data).decode('utf-8')
+        add_timing(stats, 'encode', time.perf_counter() - started)
+        yield encoded
+
+def _encode_page_files(page_files, stats):
+    """Encode en base64 des pages déjà rendues (artefacts d'ingestion)"""
+    started = time.perf_counter()
+    encoded_pages = []
+    for page_file in page_files:
+        with open(page_file, 'rb') as file:
+            data = file.read()
+        stats['pages_sent'] = stats.get('pages_sent', 0) + 1
+        stats['image_bytes'] = stats.get('image_bytes', 0) + len(data)
+        encoded_pages.append(base64.b64encode(data).decode('utf-8'))
+    add_timing(stats, 'encode', time.perf_counter() - started)
+    return encoded_pages
+
+class AnalysisRoute:
+    """Chemin suivi par une analyse, enregistré avec son résultat"""
+    TEXT = 'text'                    # CV natif numérique : texte extrait envoyé au modèle
+    VISION = 'vision'                # CV scanné ou graphique : pages rendues en images
+    TEXT_FALLBACK = 'text_fallback'  # Échec du rendu ou de l'API Vision, repli sur le texte
+    CACHE = 'cache'                  # Résultat repris du cache des analyses
+
+# Seuils du tri préalable (voir classify_cv)
+TEXT_MIN_CHARS_PER_PAGE = _render_setting('CV_TEXT_MIN_CHARS_PER_PAGE', 400)
+TEXT_MAX_IMAGE_COVERAGE = _render_setting('CV_TEXT_MAX_IMAGE_COVERAGE', 0.5)
+TEXT_MAX_CHARS = _render_setting('CV_TEXT_MAX_CHARS', 12000)
+
+def _read_page(page):
+    """
+    Texte d'une page et part de sa surface occupée par des images (entre 0 et 1)
+    
+    La surface d'une image est celle du carré unité transformé par la matrice courante au
+    moment de l'opérateur Do. Une page scannée contient une image de la taille de la page et
+    obtient une couverture proche de 1.
+    """
+    try:
+        xobjects = page['/Resources']['/XObject'].get_object()
+    except (KeyError, TypeError):
+        xobjects = {}
+    
+    image_area = [0.0]
+    
+    def visit(operator, operands, cm, tm):
+        if operator != b'Do' or not operands or operands[0] not in xobjects:
+            return
+        if xobjects[operands[0]].get_object().get('/Subtype') != '/Image':
+            return
+        image_area[0] += abs(cm[0] * cm[3] - cm[1] * cm[2])
+    
+    text = page.extract_text(visitor_operand_before=visit) or ''
+    page_area = float(page.mediabox.width) * float(page.mediabox.height)
+    coverage = min(1.0, image_area[0] / page_area) if page_area > 0 else 0.0
+    return text, coverage
+
+def classify_cv(pdf_path, max_pages=None):
+    """
+    Tri préalable d'un CV : analyse du texte seul ou rendu des pages pour le modèle Vision
+    
+    Un CV produit par un traitement de texte possède une couche texte complète : l'envoyer
+    en texte est bien plus rapide et moins coûteux que rasteriser ses pages. Les documents
+    scannés (pas ou peu de texte) ou très graphiques (images couvrant la page) sont réservés
+    au modèle Vision.
+    
     Returns:
-        str: Chaîne base64 de l'image
+        dict: route (AnalysisRoute.TEXT ou VISION), pages, chars_per_page, image_coverage
+              et text (texte extrait, vide si route == VISION)
     """
-    # Convertir l'image en bytes
-    buffered = io.BytesIO()
-    image.save(buffered, format="JPEG", quality=80) # Qualité réduite pour limiter la taille
-    img_bytes = buffered.getvalue()
+    max_pages = max_pages or DEFAULT_PROFILE.max_pages
+    result = {'route': AnalysisRoute.VISION, 'pages': 0, 'chars_per_page': 0,
+              'image_coverage': 0.0, 'text': ''}
+    try:
+        reader = PyPDF2.PdfReader(pdf_path)
+        pages = reader.pages[:max_pages]
+        read_pages = [_read_page(page) for page in pages]
+    except Exception as e:
+        print(f"Tri préalable du CV impossible, analyse par le modèle Vision: {e}")
+        return result
+    
+    if not read_pages:
+        return result
     
-    # Encoder en base64
-    return base64.b64encode(img_bytes).decode('utf-8')
+    texts = [text for text, _ in read_pages]
+    coverages = [coverage for _, coverage in read_pages]
+    
+    # Les caractères de contrôle ou non imprimables trahissent une couche texte inexploitable
+    chars = sum(sum(1 for char in text if char.isprintable() and not char.isspace()) for text in texts)
+    result['pages'] = len(reader.pages)
+    result['chars_per_page'] = chars // len(pages)
+    result['image_coverage'] = round(max(coverages), 2)
+    
+    # Chaque page doit porter du texte : une page scannée au milieu du CV serait perdue
+    text_rich = all(len(text.strip()) > 0 for text in texts) \
+        and result['chars_per_page'] >= TEXT_MIN_CHARS_PER_PAGE \
+        and result['image_coverage'] <= TEXT_MAX_IMAGE_COVERAGE
+    if text_rich:
+        result['route'] = AnalysisRoute.TEXT
+        result['text'] = "\n".join(texts)
+    return result
 
 def extract_text_from_pdf(pdf_path):
     """
@@ -82,161 +401,85 @@ def extract_text_from_pdf(pdf_path):
     
     return text
 
-def analyze_cv(cv_path, job_description, job_requirements):
+def build_vision_payload(encoded_pages, job_description, job_requirements):
     """
-    Analyser un CV par rapport à une description de poste en utilisant l'API Vision d'OpenAI
+    Requête chat/completions pour l'analyse des pages du CV par le modèle Vision
     
     Args:
-        cv_path: Chemin vers le fichier PDF du CV
+        encoded_pages: Pages du CV en JPEG base64
         job_description: Description du poste
         job_requirements: Exigences du poste
-        
-    Returns:
-        tuple: (analyse détaillée, score de correspondance)
     """
-    # Vérifier que la clé API est disponible
-    api_key = os.environ.get('OPENAI_API_KEY')
-    if not api_key:
-        raise ValueError("La clé API OpenAI n'est pas configurée. Veuillez définir la variable d'environnement OPENAI_API_KEY.")
-    
-    # Convertir le PDF en images
-    pdf_images = convert_pdf_to_images(cv_path)
-    
-    if not pdf_images:
-        # Si la conversion échoue, revenir à l'extraction de texte
-        print("Conversion du PDF en images échouée, retour à l'extraction de texte")
-        cv_text = extract_text_from_pdf(cv_path)
-        if not cv_text or cv_text.startswith("Erreur"):
-            return "Impossible d'analyser le CV. Veuillez vérifier le format du fichier.", 0
-            
-        # Utiliser la méthode classique
-        return analyze_cv_with_text(cv_text, job_description, job_requirements, api_key)
+    # Le nombre de pages est déjà limité par le profil de rendu pour ne pas dépasser les limites de l'API
+    max_pages = len(encoded_pages)
     
-    # Limiter le nombre d'images à traiter pour ne pas dépasser les limites de l'API
-    max_pages = min(5, len(pdf_images))  # Limiter à 5 pages maximum
+    # Construire le message avec les images du CV
+    messages = [
+        {"role": "system", "content": "Vous êtes un expert RH spécialisé dans l'analyse de CV."}
+    ]
     
-    try:
-        # Utiliser les requêtes HTTP directes plutôt que le client OpenAI
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
-
-        # Construire le message avec les images du CV
-        messages = [
-            {"role": "system", "content": "Vous êtes un expert RH spécialisé dans l'analyse de CV."}
-        ]
-        
-        # Premier message contenant le contexte et la première image
-        content = [
-            {"type": "text", "text": f"""
-            Vous êtes un expert RH chargé d'analyser la correspondance entre un CV et une offre d'emploi.
-            
-            Description du poste:
-            {job_description}
-            
-            Exigences du poste:
-            {job_requirements}
-            
-            Voici le CV du candidat (les pages suivent). Analysez-le en détail.
-            """}
-        ]
-        
-        # Ajouter les images du CV
-        for i, image in enumerate(pdf_images[:max_pages]):
-            base64_image = encode_image_to_base64(image)
-            content.append({
-                "type": "image_url",
-                "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}
-            })
-            
-            # Si on a plusieurs pages, les envoyer comme des messages séparés
-            if i < max_pages - 1 and i > 0 and i % 2 == 1:
-                messages.append({"role": "user", "content": content})
-                content = [{"type": "text", "text": f"Suite du CV (page {i+2})"}]
-        
-        # Ajouter le dernier message s'il reste du contenu
-        if content:
-            messages.append({"role": "user", "content": content})
-        
-        # Ajouter un message final demandant l'analyse
-        messages.append({"role": "user", "content": """
-        Après avoir analysé ce CV par rapport à la description du poste et aux exigences, veuillez fournir:
-        1. Une évaluation générale de l'adéquation entre le profil du candidat et le poste (sur 100)
-        2. Les points forts du candidat par rapport au poste
-        3. Les compétences manquantes ou à développer
-        4. Une recommandation (inviter à un entretien, demander plus d'informations, ou refuser poliment)
+    # Premier message contenant le contexte et la première image
+    content = [
+        {"type": "text", "text": f"""
+        Vous êtes un expert RH chargé d'analyser la correspondance entre un CV et une offre d'emploi.
         
-        Format de réponse souhaité:
-        SCORE: [score numérique sur 100]
+        Description du poste:
+        {job_description}
         
-        ANALYSE:
-        [votre analyse détaillée]
-        """})
+        Exigences du poste:
+        {job_requirements}
         
-        # Préparer la payload pour l'API
-        payload = {
-            "model": "gpt-4o",  # Utilisation du nouveau modèle qui remplace gpt-4-vision-preview
-            "messages": messages,
-            "max_tokens": 1500,
-            "temperature": 0.2
-        }
-        
-        # Appel direct à l'API OpenAI avec désactivation de la vérification SSL
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=payload,
-            verify=False  # Désactiver la vérification SSL
-        )
-        
-        # Vérifier la réponse
-        if response.status_code != 200:
-            raise Exception(f"Erreur API OpenAI: {response.status_code} - {response.text}")
-            
-        # Extraire la réponse
-        response_data = response.json()
-        analysis = response_data["choices"][0]["message"]["content"].strip()
-        
-        # Extraire le score
-        score = 0
-        if "SCORE:" in analysis:
-            try:
-                score_line = [line for line in analysis.split('\n') if "SCORE:" in line][0]
-                score_text = score_line.split("SCORE:")[1].strip().split()[0]
-                
-                # Extraire uniquement les chiffres avant tout caractère non numérique
-                import re
-                score_match = re.search(r'(\d+)', score_text)
-                if score_match:
-                    score = float(score_match.group(1))
-                else:
-                    score = 0
-            except Exception as e:
-                print(f"Erreur lors de l'extraction du score: {e}")
-                score = 0
-        
-        return analysis, score
+        Voici le CV du candidat (les pages suivent). Analysez-le en détail.
+        """}
+    ]
+    
+    # Ajouter les images du CV
+    for i, base64_image in enumerate(encoded_pages):
+        content.append({
+            "type": "image_url",
+            "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}
+        })
         
-    except Exception as e:
-        import traceback
-        error_message = f"Erreur lors de l'analyse du CV avec l'API Vision: {str(e)}"
-        print(error_message)
-        traceback.print_exc()
-        # En cas d'échec, essayer la méthode classique
-        print("Tentative d'analyse avec la méthode classique d'extraction de texte")
-        cv_text = extract_text_from_pdf(cv_path)
-        return analyze_cv_with_text(cv_text, job_description, job_requirements, api_key)
+        # Si on a plusieurs pages, les envoyer comme des messages séparés
+        if i < max_pages - 1 and i > 0 and i % 2 == 1:
+            messages.append({"role": "user", "content": content})
+            content = [{"type": "text", "text": f"Suite du CV (page {i+2})"}]
+    
+    # Ajouter le dernier message s'il reste du contenu
+    if content:
+        messages.append({"role": "user", "content": content})
+    
+    # Ajouter un message final demandant l'analyse
+    messages.append({"role": "user", "content": """
+    Après avoir analysé ce CV par rapport à la description du poste et aux exigences, veuillez fournir:
+    1. Une évaluation générale de l'adéquation entre le profil du candidat et le poste (sur 100)
+    2. Les points forts du candidat par rapport au poste
+    3. Les compétences manquantes ou à développer
+    4. Une recommandation (inviter à un entretien, demander plus d'informations, ou refuser poliment)
+    
+    Format de réponse souhaité:
+    SCORE: [score numérique sur 100]
+    
+    ANALYSE:
+    [votre analyse détaillée]
+    """})
+    
+    # Préparer la payload pour l'API
+    payload = {
+        "model": VISION_MODEL,
+        "messages": messages,
+        "max_tokens": 1500,
+        "temperature": 0.2
+    }
+    
+    return payload
 
-def analyze_cv_with_text(cv_text, job_description, job_requirements, api_key):
+def build_text_payload(cv_text, job_description, job_requirements, model=TEXT_MODEL, max_chars=4000):
     """
-    Méthode de secours qui utilise l'extraction de texte classique
+    Requête chat/completions pour l'analyse du texte extrait du CV
     """
-    if not cv_text or cv_text.startswith("Erreur"):
-        return cv_text, 0
-    
     # Limiter la taille du texte pour éviter de dépasser les limites de l'API
-    cv_text = cv_text[:4000]  # Limiter à 4000 caractères
+    cv_text = cv_text[:max_chars]
     
     # Préparer le prompt pour l'API
     prompt = f"""
@@ -264,57 +507,188 @@ def analyze_cv_with_text(cv_text, job_description, job_requirements, api_key):
     [votre analyse détaillée]
     """
     
+    # Préparer la payload pour l'API
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": "Vous êtes un expert RH spécialisé dans l'analyse de CV."},
+            {"role": "user", "content": prompt}
+        ],
+        "max_tokens": 1000,
+        "temperature": 0.5
+    }
+
+def _get_api_key():
+    # Vérifier que la clé API est disponible
+    api_key = os.environ.get('OPENAI_API_KEY')
+    if not api_key:
+        raise ValueError("La clé API OpenAI n'est pas configurée. Veuillez définir la variable d'environnement OPENAI_API_KEY.")
+    return api_key
+
+def _fallback_text_payload(cv_path, job_description, job_requirements, stats):
+    """Requête de secours sur le texte extrait, ou None si le PDF n'en contient pas"""
+    cv_text = extract_text_from_pdf(cv_path)
+    if not cv_text or cv_text.startswith("Erreur"):
+        return None
+    stats['route'] = AnalysisRoute.TEXT_FALLBACK
+    payload = build_text_payload(cv_text, job_description, job_requirements)
+    stats['payload_bytes'] = len(json.dumps(payload))
+    return payload
+
+def prepare_analysis_payload(cv_path, job_description, job_requirements, stats, artifacts=None):
+    """
+    Construit la requête d'analyse d'un CV : texte seul pour les CV natifs numériques
+    (voir classify_cv), pages rendues pour le modèle Vision sinon
+    
+    Returns:
+        dict: payload chat/completions, ou None si le CV ne peut pas être analysé
+    """
+    started = time.perf_counter()
+    triage = artifacts or classify_cv(cv_path)
+    add_timing(stats, 'triage', time.perf_counter() - started)
+    if triage['route'] == AnalysisRoute.TEXT:
+        stats['route'] = AnalysisRoute.TEXT
+        payload = build_text_payload(triage['text'], job_description, job_requirements,
+                                     model=VISION_MODEL, max_chars=TEXT_MAX_CHARS)
+        stats['payload_bytes'] = len(json.dumps(payload))
+        return payload
+    
+    stats['route'] = AnalysisRoute.VISION
+    # Convertir les premières pages du PDF en JPEG base64, une page à la fois
     try:
-        # Utiliser les requêtes HTTP directes
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
-        
-        # Préparer la payload pour l'API
-        payload = {
-            "model": "gpt-3.5-turbo",
-            "messages": [
-                {"role": "system", "content": "Vous êtes un expert RH spécialisé dans l'analyse de CV."},
-                {"role": "user", "content": prompt}
-            ],
-            "max_tokens": 1000,
-            "temperature": 0.5
-        }
+        if artifacts and artifacts.get('page_files'):
+            encoded_pages = _encode_page_files(artifacts['page_files'], stats)
+        else:
+            encoded_pages = list(iter_encoded_pages(cv_path, stats=stats))
+    except Exception as e:
+        print(f"Erreur lors de la conversion du PDF en images: {e}")
+        encoded_pages = []
+    
+    if not encoded_pages:
+        # Si la conversion échoue, revenir à l'extraction de texte
+        print("Conversion du PDF en images échouée, retour à l'extraction de texte")
+        return _fallback_text_payload(cv_path, job_description, job_requirements, stats)
+    
+    payload = build_vision_payload(encoded_pages, job_description, job_requirements)
+    stats['payload_bytes'] = len(json.dumps(payload))
+    return payload
+
+def analyze_cv(cv_path, job_description, job_requirements, stats=None, artifacts=None):
+    """
+    Analyser un CV par rapport à une description de poste
+    
+    Les CV dont la couche texte est exploitable sont analysés en texte seul (voir classify_cv) ;
+    les autres passent par l'API Vision d'OpenAI.
+    
+    Args:
+        cv_path: Chemin vers le fichier PDF du CV
+        job_description: Description du poste
+        job_requirements: Exigences du poste
+        stats: Dictionnaire optionnel complété avec les mesures de l'analyse
+               (route, pages_sent, image_bytes, payload_bytes et timings : durée en secondes
+               des étapes triage, rasterize, encode, http et parse)
+        artifacts: Artefacts précalculés à l'ingestion (voir app.utils.cv_artifacts) : route,
+                   text et page_files. Sans artefacts, le tri et le rendu sont faits ici.
         
-        # Appel direct à l'API OpenAI avec désactivation de la vérification SSL
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=payload,
-            verify=False  # Désactiver la vérification SSL
-        )
+    Returns:
+        tuple: (analyse détaillée, score de correspondance)
+    """
+    api_key = _get_api_key()
+    if stats is None:
+        stats = {}
+    
+    payload = prepare_analysis_payload(cv_path, job_description, job_requirements, stats, artifacts)
+    if payload is None:
+        return UNREADABLE_CV_MESSAGE, 0
+    
+    try:
+        # Appel à l'API OpenAI via le client partagé (pool de connexions, timeouts, nouvelles tentatives)
+        started = time.perf_counter()
+        response_data = chat_completion(payload, api_key)
+        add_timing(stats, 'http', time.perf_counter() - started)
         
-        # Vérifier la réponse
-        if response.status_code != 200:
-            raise Exception(f"Erreur API OpenAI: {response.status_code} - {response.text}")
-            
-        # Extraire la réponse
-        response_data = response.json()
+        started = time.perf_counter()
         analysis = response_data["choices"][0]["message"]["content"].strip()
+        score = extract_score(analysis)
+        add_timing(stats, 'parse', time.perf_counter() - started)
+        
+        return analysis, score
+        
+    except Exception as e:
+        import traceback
+        if stats['route'] != AnalysisRoute.VISION:
+            error_message = f"Erreur lors de l'analyse du CV avec l'API OpenAI: {str(e)}"
+            print(error_message)
+            traceback.print_exc()
+            return error_message, 0
+        
+        error_message = f"Erreur lors de l'analyse du CV avec l'API Vision: {str(e)}"
+        print(error_message)
+        traceback.print_exc()
+        # En cas d'échec, essayer la méthode classique
+        print("Tentative d'analyse avec la méthode classique d'extraction de texte")
+        cv_text = extract_text_from_pdf(cv_path)
+        stats['route'] = AnalysisRoute.TEXT_FALLBACK
+        return analyze_cv_with_text(cv_text, job_description, job_requirements, api_key, stats=stats)
+
+def stream_analysis(cv_path, job_description, job_requirements, stats=None, artifacts=None):
+    """
+    Analyse d'un CV en streaming : génère le texte au fur et à mesure de sa production
+    par le modèle (mêmes requêtes que analyze_cv, avec "stream": true)
+    
+    Si l'API Vision échoue avant d'avoir produit le moindre texte, l'analyse est relancée
+    sur le texte extrait, comme dans analyze_cv.
+    
+    Yields:
+        str: fragments successifs de l'analyse
         
-        # Extraire le score
-        score = 0
-        if "SCORE:" in analysis:
-            try:
-                score_line = [line for line in analysis.split('\n') if "SCORE:" in line][0]
-                score_text = score_line.split("SCORE:")[1].strip().split()[0]
-                
-                # Extraire uniquement les chiffres avant tout caractère non numérique
-                import re
-                score_match = re.search(r'(\d+)', score_text)
-                if score_match:
-                    score = float(score_match.group(1))
-                else:
-                    score = 0
-            except Exception as e:
-                print(f"Erreur lors de l'extraction du score dans analyze_cv_with_text: {e}")
-                score = 0
+    Raises:
+        ValueError: si le CV ne peut pas être analysé
+    """
+    api_key = _get_api_key()
+    if stats is None:
+        stats = {}
+    
+    payload = prepare_analysis_payload(cv_path, job_description, job_requirements, stats, artifacts)
+    if payload is None:
+        raise ValueError(UNREADABLE_CV_MESSAGE)
+    
+    started = False
+    try:
+        for delta in chat_completion_stream(payload, api_key):
+            started = True
+            yield delta
+    except Exception as e:
+        if started or stats['route'] != AnalysisRoute.VISION:
+            raise
+        print(f"Erreur lors de l'analyse du CV avec l'API Vision: {str(e)}")
+        payload = _fallback_text_payload(cv_path, job_description, job_requirements, stats)
+        if payload is None:
+            raise
+        yield from chat_completion_stream(payload, api_key)
+
+def analyze_cv_with_text(cv_text, job_description, job_requirements, api_key,
+                         model=TEXT_MODEL, max_chars=4000, stats=None):
+    """
+    Analyse du texte extrait du CV : méthode de secours si l'API Vision échoue
+    """
+    if not cv_text or cv_text.startswith("Erreur"):
+        return cv_text, 0
+    
+    try:
+        payload = build_text_payload(cv_text, job_description, job_requirements, model, max_chars)
+        if stats is not None:
+            stats['payload_bytes'] = len(json.dumps(payload))
+        
+        # Appel à l'API OpenAI via le client partagé (pool de connexions, timeouts, nouvelles tentatives)
+        started = time.perf_counter()
+        response_data = chat_completion(payload, api_key)
+        add_timing(stats, 'http', time.perf_counter() - started)
+        
+        started = time.perf_counter()
+        analysis = response_data["choices"][0]["message"]["content"].strip()
+        score = extract_score(analysis)
+        add_timing(stats, 'parse', time.perf_counter() - started)
         
         return analysis, score
         
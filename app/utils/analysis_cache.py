@@ -0,0 +1,152 @@
+"""
+Cache persistant des résultats d'analyse IA
+
+Un résultat est identifié par le contenu du CV (sha256 des octets du fichier), le texte de
+l'offre (description + exigences), le modèle et la version du prompt. Réanalyser le même
+CV pour la même offre, même téléversé sous un autre nom, ne coûte donc qu'une lecture en base.
+"""
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app.models.models import db, AnalysisCache
+from app.utils.ai_analysis import VISION_MODEL, PROMPT_VERSION, is_error_result
+
+# Compteurs du processus courant (les hits cumulés sont aussi persistés dans hit_count)
+_stats = {'hits': 0, 'misses': 0, 'stores': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def file_sha256(path):
+    """Calcule le sha256 d'un fichier par blocs"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def job_hash(job_description, job_requirements):
+    """Empreinte du texte de l'offre d'emploi"""
+    text = f"{job_description or ''}\0{job_requirements or ''}"
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def cache_key(cv_sha256, job_description, job_requirements):
+    """Clé de cache : CV + offre + modèle + version du prompt"""
+    parts = [cv_sha256, job_hash(job_description, job_requirements), VISION_MODEL, str(PROMPT_VERSION)]
+    return hashlib.sha256(':'.join(parts).encode('utf-8')).hexdigest()
+
+
+def get_cached_analysis(cv_path, job_description, job_requirements):
+    """
+    Recherche un résultat d'analyse en cache
+
+    Returns:
+        tuple: (analyse, score) ou None si absent ou expiré
+    """
+    key = cache_key(file_sha256(cv_path), job_description, job_requirements)
+    max_age = timedelta(days=current_app.config['ANALYSIS_CACHE_MAX_AGE_DAYS'])
+
+    entry = AnalysisCache.query.filter_by(cache_key=key).first()
+    if not entry or entry.created_at < datetime.utcnow() - max_age:
+        _count('misses')
+        return None
+
+    # Mise à jour directe : pas besoin de recharger l'objet
+    db.session.query(AnalysisCache).filter_by(id=entry.id).update(
+        {
+            'hit_count': AnalysisCache.hit_count + 1,
+            'last_used_at': datetime.utcnow()
+        },
+        synchronize_session=False
+    )
+    db.session.commit()
+    _count('hits')
+    return entry.ai_analysis, entry.ai_score
+
+
+def store_analysis(cv_path, job_description, job_requirements, analysis, score, route=None):
+    """
+    Enregistre un résultat d'analyse dans le cache
+
+    Les messages d'erreur ne sont pas mis en cache, pour que l'analyse soit retentée.
+
+    Returns:
+        bool: True si le résultat a été enregistré
+    """
+    if is_error_result(analysis, score):
+        return False
+
+    cv_sha256 = file_sha256(cv_path)
+    key = cache_key(cv_sha256, job_description, job_requirements)
+    if AnalysisCache.query.filter_by(cache_key=key).first():
+        return False
+
+    db.session.add(AnalysisCache(
+        cache_key=key,
+        cv_sha256=cv_sha256,
+        model=VISION_MODEL,
+        prompt_version=PROMPT_VERSION,
+        analysis_route=route,
+        ai_analysis=analysis,
+        ai_score=score
+    ))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Un autre worker a enregistré le même résultat entre-temps
+        db.session.rollback()
+        return False
+
+    _count('stores')
+    return True
+
+
+def prune_cache():
+    """
+    Éviction des entrées expirées, puis des moins récemment utilisées au-delà de la taille maximale
+
+    Returns:
+        int: nombre d'entrées supprimées
+    """
+    max_age = timedelta(days=current_app.config['ANALYSIS_CACHE_MAX_AGE_DAYS'])
+    max_entries = current_app.config['ANALYSIS_CACHE_MAX_ENTRIES']
+
+    removed = AnalysisCache.query.filter(
+        AnalysisCache.created_at < datetime.utcnow() - max_age
+    ).delete(synchronize_session=False)
+
+    excess = AnalysisCache.query.count() - max_entries
+    if excess > 0:
+        oldest_ids = db.select(AnalysisCache.id).order_by(AnalysisCache.last_used_at).limit(excess)
+        removed += AnalysisCache.query.filter(AnalysisCache.id.in_(oldest_ids)) \
+            .delete(synchronize_session=False)
+
+    db.session.commit()
+    return removed
+
+
+def cache_stats():
+    """Statistiques du cache : compteurs du processus et totaux persistés"""
+    entries, total_hits = db.session.query(
+        db.func.count(AnalysisCache.id),
+        db.func.coalesce(db.func.sum(AnalysisCache.hit_count), 0)
+    ).one()
+
+    with _stats_lock:
+        process = dict(_stats)
+
+    return {
+        'process': process,
+        'entries': entries,
+        'total_hits': int(total_hits),
+        'max_entries': current_app.config['ANALYSIS_CACHE_MAX_ENTRIES'],
+        'max_age_days': current_app.config['ANALYSIS_CACHE_MAX_AGE_DAYS']
+    }
@@ -0,0 +1,641 @@
+"""
+File d'attente des analyses de CV
+
+Les routes HTML et REST ne font qu'insérer un job dans la table AnalysisJob ;
+l'analyse elle-même est exécutée par des processus séparés (`flask analysis-worker`).
+Plusieurs workers, éventuellement sur plusieurs machines, peuvent consommer la file :
+chaque job est réclamé avec un verrou de ligne (UPDLOCK + READPAST sous SQL Server).
+
+Un worker réclame autant de jobs qu'il exécute d'appels au modèle en parallèle
+(--concurrency) ; les résultats d'un paquet sont écrits en une seule requête UPDATE
+exécutée avec executemany (fast_executemany sous pyodbc). Un job n'est enregistré que s'il
+est toujours RUNNING pour ce worker : au-delà d'ANALYSIS_JOB_TIMEOUT, il a pu être remis en
+file et réclamé par un autre worker.
+"""
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, or_, bindparam
+from app.models.models import db, Application, JobPosition, AnalysisJob, AnalysisJobStatus, AnalysisBatch
+from app.utils.ai_analysis import analyze_cv, AnalysisRoute, is_error_result, ERROR_PREFIXES
+from app.utils.analysis_cache import get_cached_analysis, store_analysis, prune_cache, job_hash
+from app.utils.cv_artifacts import get_artifacts
+from app.utils.returning import update_returning, update_returning_ids
+
+# Verrouille la ligne réclamée et ignore celles déjà verrouillées par un autre worker
+CLAIM_HINT = 'WITH (UPDLOCK, READPAST, ROWLOCK)'
+
+# Statuts pour lesquels un job est considéré comme toujours en cours
+PENDING_STATUSES = [AnalysisJobStatus.QUEUED, AnalysisJobStatus.RUNNING]
+
+EMPTY_ANALYSIS_MESSAGE = "L'analyse n'a renvoyé aucun résultat"
+
+
+def default_worker_id():
+    """Identifiant du worker courant (machine:pid)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _cv_path(application):
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], application.cv_filename)
+
+
+# Écriture groupée des résultats : une requête UPDATE exécutée pour toutes les lignes du paquet
+_application_table = Application.__table__
+_job_table = AnalysisJob.__table__
+
+_UPDATE_APPLICATION_RESULT = _application_table.update() \
+    .where(_application_table.c.id == bindparam('b_application_id')) \
+    .values(ai_analysis=bindparam('b_ai_analysis'), ai_score=bindparam('b_ai_score'))
+
+# Colonnes d'un job terminé -> clé de la ligne de résultat (_result_row)
+_JOB_RESULT_COLUMNS = {
+    'ai_analysis': 'b_ai_analysis',
+    'ai_score': 'b_ai_score',
+    'job_hash': 'b_job_hash',
+    'analysis_route': 'b_route',
+    'pages_sent': 'b_pages_sent',
+    'image_bytes': 'b_image_bytes',
+    'payload_bytes': 'b_payload_bytes',
+    'finished_at': 'b_finished_at'
+}
+
+# Seul le worker qui détient le job (RUNNING, même worker_id) peut l'enregistrer
+_OWNED_JOB = and_(_job_table.c.id == bindparam('b_job_id'),
+                  _job_table.c.status == AnalysisJobStatus.RUNNING,
+                  _job_table.c.worker_id == bindparam('b_worker_id'))
+
+_UPDATE_JOB_RESULT = _job_table.update() \
+    .where(_OWNED_JOB) \
+    .values(status=AnalysisJobStatus.DONE, error_message=None,
+            **{column: bindparam(key) for column, key in _JOB_RESULT_COLUMNS.items()})
+
+_UPDATE_JOB_FAILURE = _job_table.update() \
+    .where(_OWNED_JOB) \
+    .values(
+        status=AnalysisJobStatus.FAILED,
+        error_message=bindparam('b_error_message'),
+        finished_at=bindparam('b_finished_at')
+    )
+
+
+def _result_row(job_id, application_id, analysis_result, score, stats=None, offer_hash=None):
+    stats = stats or {}
+    return {
+        'b_job_id': job_id,
+        'b_application_id': application_id,
+        'b_ai_analysis': analysis_result,
+        'b_ai_score': score,
+        'b_job_hash': offer_hash,
+        'b_route': stats.get('route'),
+        'b_pages_sent': stats.get('pages_sent'),
+        'b_image_bytes': stats.get('image_bytes'),
+        'b_payload_bytes': stats.get('payload_bytes'),
+        'b_finished_at': datetime.utcnow()
+    }
+
+
+def _failure_row(job_id, message):
+    return {'b_job_id': job_id, 'b_error_message': message, 'b_finished_at': datetime.utcnow()}
+
+
+def _save_results(rows):
+    """Enregistre les résultats sur les candidatures et sur les jobs (sans commit)"""
+    # Requêtes Core plutôt qu'ORM pour éviter StaleDataError avec les triggers SQL Server
+    if rows:
+        db.session.execute(_UPDATE_APPLICATION_RESULT, rows)
+        db.session.execute(_UPDATE_JOB_RESULT, rows)
+
+
+def _save_result(row):
+    """
+    Enregistre un résultat (sans commit) et renvoie le job terminé, relu par la même requête
+
+    Args:
+        row: Ligne construite par _result_row
+    """
+    db.session.execute(_UPDATE_APPLICATION_RESULT, [row])
+    return update_returning(AnalysisJob, db.update(AnalysisJob)
+                            .where(AnalysisJob.id == row['b_job_id'])
+                            .values(status=AnalysisJobStatus.DONE, error_message=None,
+                                    **{column: row[key] for column, key in _JOB_RESULT_COLUMNS.items()}))[0]
+
+
+def _save_failures(rows):
+    """Passe des jobs au statut FAILED (sans commit)"""
+    if rows:
+        db.session.execute(_UPDATE_JOB_FAILURE, rows)
+
+
+def _owned_job_ids(job_ids, worker_id):
+    """
+    Parmi job_ids, jobs toujours RUNNING pour ce worker ; leurs lignes restent verrouillées
+    jusqu'au commit (requeue_stale_jobs ne peut plus les remettre en file entre-temps)
+
+    Avec SET NOCOUNT ON, le nombre de lignes d'un executemany n'est pas fiable : les jobs
+    détenus sont relus par update_returning_ids.
+    """
+    if not job_ids:
+        return set()
+    return set(update_returning_ids(AnalysisJob, db.update(AnalysisJob)
+                                    .where(AnalysisJob.id.in_(job_ids),
+                                           AnalysisJob.status == AnalysisJobStatus.RUNNING,
+                                           AnalysisJob.worker_id == worker_id)
+                                    .values(finished_at=datetime.utcnow())))
+
+
+def _save_chunk(results, failures, worker_id):
+    """
+    Enregistre les résultats et les échecs d'un paquet (sans commit), pour les seuls jobs
+    que le worker détient encore
+
+    Returns:
+        tuple: (identifiants des jobs terminés avec succès, de tous les jobs enregistrés)
+    """
+    owned = _owned_job_ids([row['b_job_id'] for row in results + failures], worker_id)
+    _save_results([dict(row, b_worker_id=worker_id) for row in results if row['b_job_id'] in owned])
+    _save_failures([dict(row, b_worker_id=worker_id) for row in failures if row['b_job_id'] in owned])
+    return {row['b_job_id'] for row in results} & owned, owned
+
+
+def _save_chunk_by_row(results, failures, worker_id):
+    """
+    Enregistre un paquet ligne par ligne, après l'échec de l'écriture groupée : une ligne
+    rejetée n'entraîne pas la perte des autres analyses
+
+    Un résultat qui ne peut pas être enregistré fait échouer son job ; un job dont l'échec
+    ne peut pas non plus être enregistré reste RUNNING et sera remis en file par
+    requeue_stale_jobs (l'analyse est alors relue dans le cache).
+
+    Returns:
+        tuple: (identifiants des jobs terminés avec succès, de tous les jobs enregistrés)
+    """
+    done, saved = set(), set()
+    failures = list(failures)
+    for row in results:
+        try:
+            row_done, row_saved = _save_chunk([row], [], worker_id)
+            db.session.commit()
+            done |= row_done
+            saved |= row_saved
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Erreur lors de l'enregistrement du résultat du job {row['b_job_id']}: {str(e)}")
+            failures.append(_failure_row(row['b_job_id'], f"Erreur lors de l'enregistrement du résultat: {str(e)}"))
+    for row in failures:
+        try:
+            saved |= _save_chunk([], [row], worker_id)[1]
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Erreur lors de l'enregistrement de l'échec du job {row['b_job_id']}: {str(e)}")
+    return done, saved
+
+
+def enqueue_analysis(application_id):
+    """
+    Met en file d'attente l'analyse d'une candidature
+
+    Si un job est déjà en attente ou en cours pour cette candidature, il est réutilisé
+    plutôt que d'en créer un second. Si le résultat est déjà en cache (même CV, même
+    offre), il est appliqué immédiatement et le job est créé directement au statut DONE.
+
+    Returns:
+        AnalysisJob: le job en attente ou terminé
+    """
+    job = AnalysisJob.query.filter(
+        AnalysisJob.application_id == application_id,
+        AnalysisJob.status.in_(PENDING_STATUSES)
+    ).order_by(AnalysisJob.id.desc()).first()
+
+    if job:
+        return job
+
+    application = Application.query.get(application_id)
+    position = JobPosition.query.get(application.job_position_id)
+    offer_hash = job_hash(position.description, position.requirements)
+    cached = get_cached_analysis(_cv_path(application), position.description, position.requirements)
+
+    job = AnalysisJob(application_id=application_id, status=AnalysisJobStatus.QUEUED, job_hash=offer_hash)
+    db.session.add(job)
+    db.session.flush()
+
+    if cached:
+        analysis_result, score = cached
+        job = _save_result(_result_row(job.id, application_id, analysis_result, score,
+                                       {'route': AnalysisRoute.CACHE}, offer_hash))
+        # Toutes les colonnes viennent d'être relues : détaché, le job n'est pas expiré par le commit
+        db.session.expunge(job)
+
+    db.session.commit()
+    return job
+
+
+def record_analysis_result(application_id, analysis_result, score, stats=None, offer_hash=None, started_at=None):
+    """
+    Enregistre une analyse exécutée hors de la file (analyse en streaming) : résultat sur
+    la candidature et job au statut DONE pour l'historique et les mesures
+
+    Un message d'erreur (voir is_error_result) n'est pas enregistré sur la candidature :
+    le job est créé au statut FAILED.
+
+    Returns:
+        AnalysisJob: le job créé
+    """
+    job = AnalysisJob(application_id=application_id, status=AnalysisJobStatus.RUNNING, attempts=1,
+                      worker_id=default_worker_id(), started_at=started_at or datetime.utcnow(),
+                      job_hash=offer_hash)
+    if is_error_result(analysis_result, score):
+        job.status = AnalysisJobStatus.FAILED
+        job.error_message = analysis_result or EMPTY_ANALYSIS_MESSAGE
+        job.finished_at = datetime.utcnow()
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    db.session.add(job)
+    db.session.flush()
+    job = _save_result(_result_row(job.id, application_id, analysis_result, score, stats, offer_hash))
+    # Toutes les colonnes viennent d'être relues : détaché, le job n'est pas expiré par le commit
+    db.session.expunge(job)
+    db.session.commit()
+    return job
+
+
+def latest_analysis_job(application_id):
+    """Retourne le dernier job d'analyse d'une candidature (ou None)"""
+    return AnalysisJob.query.filter_by(application_id=application_id) \
+        .order_by(AnalysisJob.id.desc()).first()
+
+
+def applications_to_analyze(position, force=False):
+    """
+    Requête des candidatures d'une offre à (ré)analyser
+
+    Sont retenues les candidatures sans score ou dont l'analyse est un message d'erreur, et
+    celles dont le dernier score a été calculé sur une version antérieure de l'offre
+    (empreinte différente). Les scores calculés avant l'enregistrement des empreintes sont
+    considérés à jour. Les candidatures dont une analyse
+    est déjà en file ou en cours sont exclues.
+
+    Args:
+        position: JobPosition
+        force: Réanalyser aussi les candidatures dont le score est à jour
+    """
+    offer_hash = job_hash(position.description, position.requirements)
+    pending = db.select(AnalysisJob.application_id).where(AnalysisJob.status.in_(PENDING_STATUSES))
+
+    query = db.session.query(Application.id).filter(
+        Application.job_position_id == position.id,
+        Application.cv_filename.isnot(None),
+        Application.id.notin_(pending)
+    )
+    if force:
+        return query
+
+    done = AnalysisJob.status == AnalysisJobStatus.DONE
+    fresh = db.select(AnalysisJob.application_id).where(done, AnalysisJob.job_hash == offer_hash)
+    stale = db.select(AnalysisJob.application_id).where(done, AnalysisJob.job_hash != offer_hash)
+    # Avant la file d'attente, l'analyse en ligne enregistrait les messages d'erreur
+    # d'analyze_cv sur la candidature, avec un score de 0
+    inline_error = and_(Application.ai_score == 0,
+                        or_(*[Application.ai_analysis.startswith(prefix) for prefix in ERROR_PREFIXES]))
+    return query.filter(or_(
+        Application.ai_score.is_(None),
+        inline_error,
+        and_(Application.id.in_(stale), Application.id.notin_(fresh))
+    ))
+
+
+def enqueue_job_analyses(position, requested_by=None, force=False):
+    """
+    Met en file d'attente l'analyse de toutes les candidatures à (ré)analyser d'une offre
+
+    Les jobs sont insérés en une seule requête (executemany) et rattachés à un lot
+    dont l'avancement est suivi par batch_progress.
+
+    Returns:
+        AnalysisBatch ou None si aucune candidature n'est à analyser
+    """
+    application_ids = [row.id for row in applications_to_analyze(position, force)]
+    if not application_ids:
+        return None
+
+    batch = AnalysisBatch(job_position_id=position.id, requested_by=requested_by, total=len(application_ids))
+    db.session.add(batch)
+    db.session.flush()
+
+    offer_hash = job_hash(position.description, position.requirements)
+    now = datetime.utcnow()
+    db.session.execute(_job_table.insert(), [
+        {
+            'application_id': application_id,
+            'batch_id': batch.id,
+            'status': AnalysisJobStatus.QUEUED,
+            'attempts': 0,
+            'job_hash': offer_hash,
+            'created_at': now
+        }
+        for application_id in application_ids
+    ])
+    db.session.commit()
+    return batch
+
+
+def latest_analysis_batch(job_position_id):
+    """Retourne le dernier lot d'analyses d'une offre (ou None)"""
+    return AnalysisBatch.query.filter_by(job_position_id=job_position_id) \
+        .order_by(AnalysisBatch.id.desc()).first()
+
+
+def batch_progress(batch):
+    """
+    Avancement d'un lot d'analyses
+
+    Returns:
+        dict: total, nombre de jobs par statut (queued, running, done, failed),
+              completed (done + failed), percent et finished
+    """
+    counts = dict(
+        db.session.query(AnalysisJob.status, db.func.count(AnalysisJob.id))
+        .filter(AnalysisJob.batch_id == batch.id)
+        .group_by(AnalysisJob.status)
+        .all()
+    )
+    progress = {status.lower(): counts.get(status, 0) for status in
+                (AnalysisJobStatus.QUEUED, AnalysisJobStatus.RUNNING, AnalysisJobStatus.DONE, AnalysisJobStatus.FAILED)}
+    completed = progress['done'] + progress['failed']
+    progress.update({
+        'total': batch.total,
+        'completed': completed,
+        'percent': round(100 * completed / batch.total) if batch.total else 100,
+        'finished': completed >= batch.total
+    })
+    return progress
+
+
+def claim_jobs(worker_id, limit=1):
+    """
+    Réclame les plus anciens jobs en attente et les passe au statut RUNNING
+
+    Le SELECT pose un verrou de mise à jour sur les lignes et saute celles verrouillées
+    par les autres workers, ce qui garantit qu'un job n'est exécuté que par un seul worker.
+
+    Returns:
+        list: jobs réclamés (vide si la file est vide)
+    """
+    jobs = AnalysisJob.query \
+        .with_hint(AnalysisJob, CLAIM_HINT, 'mssql') \
+        .with_for_update(skip_locked=True) \
+        .filter(AnalysisJob.status == AnalysisJobStatus.QUEUED) \
+        .order_by(AnalysisJob.id) \
+        .limit(limit) \
+        .all()
+
+    if not jobs:
+        # Libérer la transaction ouverte par le SELECT
+        db.session.rollback()
+        return []
+
+    now = datetime.utcnow()
+    for job in jobs:
+        job.status = AnalysisJobStatus.RUNNING
+        job.worker_id = worker_id
+        job.started_at = now
+        job.attempts = (job.attempts or 0) + 1
+    db.session.commit()
+    return jobs
+
+
+def claim_next_job(worker_id):
+    """
+    Réclame le plus ancien job en attente (voir claim_jobs)
+
+    Returns:
+        AnalysisJob ou None si la file est vide
+    """
+    jobs = claim_jobs(worker_id, 1)
+    return jobs[0] if jobs else None
+
+
+def requeue_stale_jobs():
+    """
+    Remet en file les jobs RUNNING abandonnés (worker arrêté en cours d'analyse)
+
+    Au-delà du nombre maximal de tentatives, le job passe en FAILED.
+
+    Returns:
+        int: nombre de jobs traités
+    """
+    timeout = current_app.config['ANALYSIS_JOB_TIMEOUT']
+    max_attempts = current_app.config['ANALYSIS_JOB_MAX_ATTEMPTS']
+    deadline = datetime.utcnow() - timedelta(seconds=timeout)
+
+    stale = AnalysisJob.query.filter(
+        AnalysisJob.status == AnalysisJobStatus.RUNNING,
+        AnalysisJob.started_at < deadline
+    )
+
+    requeued = stale.filter(AnalysisJob.attempts < max_attempts).update(
+        {'status': AnalysisJobStatus.QUEUED, 'worker_id': None},
+        synchronize_session=False
+    )
+    failed = stale.filter(AnalysisJob.attempts >= max_attempts).update(
+        {
+            'status': AnalysisJobStatus.FAILED,
+            'error_message': "Le worker n'a pas terminé l'analyse dans le délai imparti",
+            'finished_at': datetime.utcnow()
+        },
+        synchronize_session=False
+    )
+    db.session.commit()
+    return requeued + failed
+
+
+def normalize_analysis_text(analysis_result):
+    """Remplace les guillemets et apostrophes typographiques pour éviter les problèmes d'encodage"""
+    if isinstance(analysis_result, str):
+        analysis_result = analysis_result.replace('\u2019', "'")
+        analysis_result = analysis_result.replace('\u2018', "'")
+        analysis_result = analysis_result.replace('\u201c', '"')
+        analysis_result = analysis_result.replace('\u201d', '"')
+    return analysis_result
+
+
+def _analyze_task(app, task):
+    """Appel au modèle pour un job, exécuté dans un thread du pool du worker"""
+    with app.app_context():
+        stats = {}
+        analysis_result, score = analyze_cv(task['cv_path'], task['description'], task['requirements'],
+                                            stats=stats, artifacts=get_artifacts(task['cv_path']))
+        return normalize_analysis_text(analysis_result), score, stats
+
+
+def run_analysis_chunk(jobs, worker_id, executor=None):
+    """
+    Exécute un paquet de jobs réclamés : analyse des CV puis enregistrement groupé des
+    résultats sur les candidatures et sur les jobs
+
+    Les lectures en base et les écritures restent dans le thread appelant ; seuls les appels
+    au modèle sont répartis sur le pool de threads.
+
+    Les jobs que le worker ne détient plus (remis en file après ANALYSIS_JOB_TIMEOUT) ne
+    sont pas enregistrés ; leur analyse est tout de même mise en cache.
+
+    Args:
+        jobs: Jobs réclamés (statut RUNNING)
+        worker_id: Identifiant du worker qui les a réclamés
+        executor: Pool de threads pour les appels au modèle (exécution séquentielle si None)
+
+    Returns:
+        int: nombre d'analyses abouties et enregistrées
+    """
+    if not jobs:
+        return 0
+    job_ids = [job.id for job in jobs]
+    application_ids = {job.application_id for job in jobs}
+    applications = {application.id: application for application in
+                    Application.query.filter(Application.id.in_(application_ids)).all()}
+    position_ids = {application.job_position_id for application in applications.values()}
+    positions = {position.id: position for position in
+                 JobPosition.query.filter(JobPosition.id.in_(position_ids)).all()}
+
+    results, failures, tasks = [], [], []
+    for job in jobs:
+        application = applications.get(job.application_id)
+        if not application or not application.cv_filename:
+            failures.append(_failure_row(job.id, "Aucun CV trouvé pour cette candidature"))
+            continue
+
+        position = positions[application.job_position_id]
+        cv_path = _cv_path(application)
+        if not os.path.exists(cv_path):
+            failures.append(_failure_row(job.id, f"Le fichier CV n'a pas été trouvé à l'emplacement {cv_path}"))
+            continue
+
+        offer_hash = job_hash(position.description, position.requirements)
+        # Le même CV a pu être analysé pour la même offre depuis la mise en file
+        cached = get_cached_analysis(cv_path, position.description, position.requirements)
+        if cached:
+            analysis_result, score = cached
+            results.append(_result_row(job.id, application.id, analysis_result, score,
+                                       {'route': AnalysisRoute.CACHE}, offer_hash))
+            continue
+
+        tasks.append({
+            'job_id': job.id,
+            'application_id': application.id,
+            'cv_path': cv_path,
+            'description': position.description,
+            'requirements': position.requirements,
+            'job_hash': offer_hash
+        })
+
+    app = current_app._get_current_object()
+    if executor is not None:
+        futures = [executor.submit(_analyze_task, app, task) for task in tasks]
+    else:
+        futures = None
+
+    computed = []
+    for index, task in enumerate(tasks):
+        try:
+            if futures is not None:
+                analysis_result, score, stats = futures[index].result()
+            else:
+                analysis_result, score, stats = _analyze_task(app, task)
+        except Exception as e:
+            current_app.logger.error(f"Erreur lors de l'analyse du job {task['job_id']}: {str(e)}")
+            failures.append(_failure_row(task['job_id'], str(e)))
+            continue
+        # analyze_cv signale ses échecs (API indisponible, CV illisible) par un message
+        # d'erreur et un score nul : le job échoue, la candidature n'est pas modifiée
+        if is_error_result(analysis_result, score):
+            current_app.logger.error(f"Échec de l'analyse du job {task['job_id']}: {analysis_result}")
+            failures.append(_failure_row(task['job_id'], analysis_result or EMPTY_ANALYSIS_MESSAGE))
+            continue
+        results.append(_result_row(task['job_id'], task['application_id'], analysis_result, score,
+                                   stats, task['job_hash']))
+        computed.append((task, analysis_result, score, stats))
+
+    try:
+        done, saved = _save_chunk(results, failures, worker_id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Erreur lors de l'enregistrement des résultats d'analyse: {str(e)}")
+        done, saved = _save_chunk_by_row(results, failures, worker_id)
+
+    lost = set(job_ids) - saved
+    if lost:
+        current_app.logger.warning(f"Worker {worker_id}: job(s) {', '.join(str(job_id) for job_id in sorted(lost))} "
+                                   f"non enregistré(s) (remis en file ou enregistrement impossible)")
+
+    # Les analyses payées sont mises en cache même si le job n'a pas pu être enregistré
+    for task, analysis_result, score, stats in computed:
+        store_analysis(task['cv_path'], task['description'], task['requirements'], analysis_result, score,
+                       route=stats.get('route'))
+    return len(done)
+
+
+def run_analysis_job(job, worker_id):
+    """
+    Exécute un job réclamé par worker_id (voir run_analysis_chunk)
+
+    Returns:
+        bool: True si l'analyse a abouti
+    """
+    return run_analysis_chunk([job], worker_id) == 1
+
+
+def run_worker(worker_id=None, poll_interval=None, once=False, concurrency=None):
+    """
+    Boucle principale d'un worker d'analyse
+
+    Args:
+        worker_id: Identifiant enregistré sur les jobs réclamés
+        poll_interval: Attente (en secondes) lorsque la file est vide
+        once: Vider la file puis s'arrêter au lieu d'attendre de nouveaux jobs
+        concurrency: Nombre d'appels simultanés au modèle
+
+    Returns:
+        int: nombre de jobs traités
+    """
+    worker_id = worker_id or default_worker_id()
+    if poll_interval is None:
+        poll_interval = current_app.config['ANALYSIS_WORKER_POLL_INTERVAL']
+    if concurrency is None:
+        concurrency = current_app.config['ANALYSIS_WORKER_CONCURRENCY']
+    # Un job par thread : tous les jobs réclamés démarrent aussitôt, et started_at reste
+    # comparable à ANALYSIS_JOB_TIMEOUT (requeue_stale_jobs)
+    chunk_size = max(concurrency, 1)
+
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='analysis') \
+        if concurrency > 1 else None
+    processed = 0
+    last_recovery = 0
+    try:
+        while True:
+            # La maintenance (jobs abandonnés, éviction du cache) n'a pas besoin de tourner à chaque itération
+            if time.monotonic() - last_recovery > poll_interval * 10:
+                requeue_stale_jobs()
+                prune_cache()
+                last_recovery = time.monotonic()
+
+            jobs = claim_jobs(worker_id, chunk_size)
+            if jobs:
+                current_app.logger.info(f"Worker {worker_id}: analyse de {len(jobs)} job(s) "
+                                        f"({', '.join(str(job.id) for job in jobs)})")
+                run_analysis_chunk(jobs, worker_id, executor)
+                processed += len(jobs)
+                continue
+
+            if once:
+                return processed
+            time.sleep(poll_interval)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
@@ -0,0 +1,96 @@
+"""
+Analyse d'un CV diffusée en direct (server-sent events)
+
+Le texte produit par le modèle est transmis au navigateur fragment par fragment ; le
+résultat complet et le score sont enregistrés à la fin du flux, comme pour une analyse
+exécutée par un worker.
+
+Événements émis :
+    meta    {"route": ...}                       chemin suivi par l'analyse
+    (aucun) {"delta": "..."}                     fragment de texte
+    done    {"ai_score": ..., "job_id": ...}     fin de l'analyse, résultat enregistré
+    error   {"message": "...", "job_id": ...}    échec, la candidature n'est pas modifiée
+                                                 (job_id : analyse déjà en file ou en cours)
+"""
+import json
+import os
+from datetime import datetime
+from flask import current_app
+from app.models.models import db, Application, JobPosition, AnalysisJobStatus
+from app.utils.ai_analysis import AnalysisRoute, stream_analysis, extract_score
+from app.utils.analysis_cache import get_cached_analysis, store_analysis, job_hash
+from app.utils.analysis_queue import (normalize_analysis_text, record_analysis_result, latest_analysis_job,
+                                     PENDING_STATUSES)
+from app.utils.cv_artifacts import get_artifacts
+
+
+def sse_event(data, event=None):
+    """Formate un événement server-sent events (données encodées en JSON)"""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+
+def stream_application_analysis(application_id):
+    """
+    Génère les événements SSE de l'analyse d'une candidature
+
+    À utiliser avec stream_with_context : les lectures en base sont faites avant le premier
+    appel au modèle et la transaction est libérée pendant la génération.
+
+    Yields:
+        str: événements SSE
+    """
+    application = Application.query.get(application_id)
+    position = JobPosition.query.get(application.job_position_id)
+    cv_path = os.path.join(current_app.config['UPLOAD_FOLDER'], application.cv_filename)
+    description, requirements = position.description, position.requirements
+    offer_hash = job_hash(description, requirements)
+
+    if not os.path.exists(cv_path):
+        yield sse_event({'message': "Le fichier CV n'a pas été trouvé"}, 'error')
+        return
+
+    # Un worker détient déjà l'analyse : pas de second appel payant au modèle, dont le
+    # résultat écraserait le sien
+    job = latest_analysis_job(application_id)
+    if job is not None and job.status in PENDING_STATUSES:
+        yield sse_event({'message': "Une analyse de ce CV est déjà en file d'attente ou en cours",
+                         'job_id': job.id}, 'error')
+        return
+
+    started_at = datetime.utcnow()
+    cached = get_cached_analysis(cv_path, description, requirements)
+    # Ne pas garder de connexion ouverte pendant la génération
+    db.session.close()
+
+    stats = {}
+    if cached:
+        analysis_result, score = cached
+        stats['route'] = AnalysisRoute.CACHE
+        yield sse_event({'route': stats['route']}, 'meta')
+        yield sse_event({'delta': analysis_result})
+    else:
+        fragments = []
+        try:
+            artifacts = get_artifacts(cv_path)
+            for index, delta in enumerate(stream_analysis(cv_path, description, requirements, stats, artifacts)):
+                if index == 0:
+                    yield sse_event({'route': stats.get('route')}, 'meta')
+                fragments.append(delta)
+                yield sse_event({'delta': delta})
+        except Exception as e:
+            current_app.logger.error(f"Erreur lors de l'analyse en direct de la candidature {application_id}: {str(e)}")
+            yield sse_event({'message': f"Erreur lors de l'analyse du CV: {str(e)}"}, 'error')
+            return
+
+        analysis_result = normalize_analysis_text("".join(fragments).strip())
+        score = extract_score(analysis_result)
+
+    job = record_analysis_result(application_id, analysis_result, score, stats, offer_hash, started_at)
+    if job.status == AnalysisJobStatus.FAILED:
+        yield sse_event({'message': job.error_message}, 'error')
+        return
+    if not cached:
+        store_analysis(cv_path, description, requirements, analysis_result, score, route=stats.get('route'))
+
+    yield sse_event({'ai_score': score, 'job_id': job.id, 'route': stats.get('route')}, 'done')
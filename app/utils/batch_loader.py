@@ -0,0 +1,80 @@
+"""
+Chargement groupé des objets lus par les templates (identity map propre à la requête HTTP)
+
+Les filtres Jinja get_candidate, get_job, get_application et get_user lisent un objet par
+identifiant. Appelés dans une boucle {% for %}, ils feraient une requête par ligne. La vue
+annonce donc les identifiants dont la page aura besoin (prime) ; au premier filtre appelé
+pour un modèle, tous les identifiants annoncés et non encore chargés sont lus en une
+requête IN (...), et les appels suivants sont servis depuis la mémoire.
+
+Les objets chargés restent dans la session SQLAlchemy de la requête : les relations
+plusieurs-vers-un vers eux (ex. application.candidate) ne déclenchent plus de requête.
+"""
+from collections import defaultdict
+from flask import g
+
+# Identifiants par requête IN (SQL Server accepte au plus 2100 paramètres)
+BATCH_SIZE = 1000
+
+
+class BatchLoader:
+    """Objets par modèle et par identifiant, chargés par lots à la demande"""
+
+    def __init__(self):
+        self._pending = defaultdict(set)   # Modèle -> identifiants annoncés, non chargés
+        self._loaded = defaultdict(dict)   # Modèle -> {identifiant: objet ou None}
+
+    def prime(self, model, ids):
+        """Annonce des identifiants à charger au prochain accès au modèle"""
+        loaded = self._loaded[model]
+        self._pending[model].update(i for i in ids if i is not None and i not in loaded)
+
+    def remember(self, model, objects):
+        """Ajoute des objets déjà chargés par la vue (aucune requête)"""
+        loaded = self._loaded[model]
+        for obj in objects:
+            loaded[obj.id] = obj
+            self._pending[model].discard(obj.id)
+
+    def load(self, model, object_id):
+        """Objet du modèle, ou None s'il n'existe pas"""
+        if object_id is None:
+            return None
+        loaded = self._loaded[model]
+        if object_id not in loaded:
+            self._pending[model].add(object_id)
+            self._fetch(model)
+        return loaded.get(object_id)
+
+    def _fetch(self, model):
+        ids = sorted(self._pending.pop(model, ()))
+        loaded = self._loaded[model]
+        for start in range(0, len(ids), BATCH_SIZE):
+            chunk = ids[start:start + BATCH_SIZE]
+            for obj in model.query.filter(model.id.in_(chunk)):
+                loaded[obj.id] = obj
+            # Identifiants inexistants : mémorisés pour ne pas relancer de requête
+            for object_id in chunk:
+                loaded.setdefault(object_id, None)
+
+
+def batch_loader():
+    """Chargeur de la requête HTTP en cours"""
+    if 'batch_loader' not in g:
+        g.batch_loader = BatchLoader()
+    return g.batch_loader
+
+
+def prime(model, ids):
+    """Annonce les identifiants dont la page aura besoin (voir BatchLoader.prime)"""
+    batch_loader().prime(model, ids)
+
+
+def remember(model, objects):
+    """Ajoute au chargeur des objets déjà lus par la vue (voir BatchLoader.remember)"""
+    batch_loader().remember(model, objects)
+
+
+def load(model, object_id):
+    """Objet par identifiant, lu par lot avec les autres identifiants annoncés"""
+    return batch_loader().load(model, object_id)
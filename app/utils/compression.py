@@ -0,0 +1,69 @@
+"""
+Compression des réponses JSON de l'API REST (gzip, ou brotli si le module est installé)
+
+L'encodage est négocié avec l'en-tête Accept-Encoding du client. Seules les réponses JSON
+de /api/ dont le corps dépasse API_COMPRESS_MIN_SIZE octets sont compressées : les petites
+réponses n'y gagnent rien, et les flux (server-sent events) ne sont jamais mis en mémoire.
+
+Configuration :
+    API_COMPRESS_MIN_SIZE   Taille minimale du corps à compresser, en octets (1024)
+    API_COMPRESS_LEVEL      Niveau gzip de 1 à 9 (6) ; la qualité brotli est fixée à 5
+"""
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Dépendance optionnelle : gzip seul
+    brotli = None
+
+BROTLI_QUALITY = 5
+
+
+def _accepted_encoding():
+    """Meilleur encodage accepté par le client, ou None"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_response(response, min_size, level):
+    """Compresse le corps de la réponse si le client et le type de réponse s'y prêtent"""
+    if not request.path.startswith('/api/') \
+            or response.status_code != 200 \
+            or response.mimetype != 'application/json' \
+            or response.direct_passthrough or response.is_streamed \
+            or 'Content-Encoding' in response.headers:
+        return response
+
+    # La représentation dépend d'Accept-Encoding, même si elle n'est pas compressée
+    response.vary.add('Accept-Encoding')
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    encoding = _accepted_encoding()
+    if encoding == 'br':
+        data = brotli.compress(data, quality=BROTLI_QUALITY)
+    elif encoding == 'gzip':
+        data = gzip.compress(data, compresslevel=level)
+    else:
+        return response
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_app(app):
+    """Active la compression des réponses JSON de l'API"""
+    min_size = app.config.get('API_COMPRESS_MIN_SIZE', 1024)
+    level = app.config.get('API_COMPRESS_LEVEL', 6)
+
+    @app.after_request
+    def compress_api_response(response):
+        return compress_response(response, min_size, level)
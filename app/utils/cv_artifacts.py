@@ -0,0 +1,171 @@
+"""
+Artefacts des CV précalculés à l'ingestion
+
+Juste après le téléversement (et le commit de la candidature), le CV est lu une fois :
+sha256, nombre de pages, couche texte, tri texte/vision et, pour les CV orientés vers le
+modèle Vision, pages rendues en JPEG selon le profil de rendu courant. L'analyse n'a plus
+qu'à appeler le modèle.
+
+Organisation du dossier (CV_ARTIFACTS_FOLDER, par défaut instance/cv_artifacts) :
+    <sha256>/meta.json      sha256, pages, route, profil de rendu, fichiers des pages...
+    <sha256>/text.txt       couche texte des premières pages (si route == text)
+    <sha256>/page-<n>.jpg   pages rendues (si route == vision)
+
+Les artefacts sont indexés par le contenu du CV : un même fichier téléversé deux fois
+n'est traité qu'une fois. Ils sont régénérés si le profil de rendu change.
+"""
+import os
+import json
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from app.utils.ai_analysis import DEFAULT_PROFILE, AnalysisRoute, classify_cv, iter_page_jpegs
+from app.utils.analysis_cache import file_sha256
+
+# Incrémenter si le format des artefacts change
+ARTIFACT_VERSION = 1
+
+# Ingestion en arrière-plan des CV téléversés (créé à la première utilisation)
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def artifacts_folder():
+    """Dossier racine des artefacts pour l'application courante"""
+    return current_app.config['CV_ARTIFACTS_FOLDER']
+
+
+def _read_meta(artifact_dir):
+    try:
+        with open(os.path.join(artifact_dir, 'meta.json'), encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_current(meta, profile):
+    return meta is not None \
+        and meta.get('version') == ARTIFACT_VERSION \
+        and meta.get('profile') == profile.fingerprint()
+
+
+def _with_paths(meta, artifact_dir):
+    """Complète les métadonnées avec le texte et les chemins absolus des pages"""
+    artifacts = dict(meta)
+    artifacts['text'] = ''
+    if meta['route'] == AnalysisRoute.TEXT:
+        with open(os.path.join(artifact_dir, 'text.txt'), encoding='utf-8') as file:
+            artifacts['text'] = file.read()
+    artifacts['page_files'] = [os.path.join(artifact_dir, name) for name in meta['page_files']]
+    return artifacts
+
+
+def ingest_cv(cv_path, folder, profile=None):
+    """
+    Calcule et enregistre les artefacts d'un CV (sans effet s'ils sont déjà à jour)
+
+    Utilisable hors contexte d'application (pool de processus de la commande de rattrapage).
+
+    Args:
+        cv_path: Chemin vers le fichier PDF du CV
+        folder: Dossier racine des artefacts
+        profile: RenderProfile (DEFAULT_PROFILE par défaut)
+
+    Returns:
+        dict: métadonnées des artefacts
+    """
+    profile = profile or DEFAULT_PROFILE
+    sha256 = file_sha256(cv_path)
+    artifact_dir = os.path.join(folder, sha256)
+
+    meta = _read_meta(artifact_dir)
+    if _is_current(meta, profile):
+        return meta
+
+    triage = classify_cv(cv_path, profile.max_pages)
+    meta = {
+        'version': ARTIFACT_VERSION,
+        'sha256': sha256,
+        'profile': profile.fingerprint(),
+        'route': triage['route'],
+        'pages': triage['pages'],
+        'chars_per_page': triage['chars_per_page'],
+        'image_coverage': triage['image_coverage'],
+        'page_files': [],
+        'image_bytes': 0
+    }
+
+    # Écriture dans un dossier temporaire puis renommage : un lecteur ne voit jamais
+    # d'artefacts partiels, et deux ingestions concurrentes du même CV ne se mélangent pas
+    os.makedirs(folder, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix=f'.{sha256[:12]}-', dir=folder)
+    try:
+        if triage['route'] == AnalysisRoute.TEXT:
+            with open(os.path.join(work_dir, 'text.txt'), 'w', encoding='utf-8') as file:
+                file.write(triage['text'])
+        else:
+            for page_number, data in enumerate(iter_page_jpegs(cv_path, profile), start=1):
+                name = f'page-{page_number}.jpg'
+                with open(os.path.join(work_dir, name), 'wb') as file:
+                    file.write(data)
+                meta['page_files'].append(name)
+                meta['image_bytes'] += len(data)
+
+        with open(os.path.join(work_dir, 'meta.json'), 'w', encoding='utf-8') as file:
+            json.dump(meta, file)
+
+        # Remplacer d'éventuels artefacts obsolètes (autre profil de rendu)
+        if os.path.isdir(artifact_dir) and not _is_current(_read_meta(artifact_dir), profile):
+            shutil.rmtree(artifact_dir, ignore_errors=True)
+        try:
+            os.rename(work_dir, artifact_dir)
+        except OSError:
+            # Une autre ingestion du même CV a terminé avant celle-ci
+            shutil.rmtree(work_dir, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+
+    return meta
+
+
+def get_artifacts(cv_path, profile=None):
+    """
+    Artefacts d'un CV pour l'analyse, calculés à la volée s'ils manquent ou sont obsolètes
+
+    Returns:
+        dict: métadonnées avec text et page_files (chemins absolus), ou None si l'ingestion échoue
+    """
+    folder = artifacts_folder()
+    try:
+        meta = ingest_cv(cv_path, folder, profile)
+        return _with_paths(meta, os.path.join(folder, meta['sha256']))
+    except Exception as e:
+        current_app.logger.error(f"Ingestion du CV {cv_path} impossible: {str(e)}")
+        return None
+
+
+def _ingest_in_background(cv_path, folder):
+    try:
+        ingest_cv(cv_path, folder)
+    except Exception as e:
+        print(f"Erreur lors de l'ingestion du CV {cv_path}: {e}")
+
+
+def schedule_ingest(cv_path):
+    """
+    Lance l'ingestion d'un CV en arrière-plan, à appeler après le commit de la candidature
+
+    Le téléversement n'attend pas l'ingestion ; si l'analyse démarre avant la fin,
+    get_artifacts calcule les artefacts elle-même.
+    """
+    global _executor
+    if _executor is None:
+        # Deux téléversements simultanés ne doivent pas créer chacun leur pool
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=current_app.config['CV_INGEST_WORKERS'],
+                                               thread_name_prefix='cv-ingest')
+    _executor.submit(_ingest_in_background, cv_path, artifacts_folder())
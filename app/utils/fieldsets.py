@@ -0,0 +1,77 @@
+"""
+Champs partiels (sparse fieldsets) des réponses de l'API REST
+
+Paramètres de requête :
+    fields   Champs à renvoyer, séparés par des virgules (ex. fields=id,status,ai_score) ;
+             sans ce paramètre, les champs par défaut de la vue (compacts pour les listes,
+             complets pour les fiches)
+    include  Objets liés à inclure (ex. include=candidate,job) ; include= vide : aucun
+
+Chaque ressource décrit ses champs par un dictionnaire {nom: Field(colonnes, valeur)} : la
+requête ORM ne charge que les colonnes des champs demandés (load_only), et les gros textes
+(analyse IA, lettre de motivation, description d'offre) ne sont lus que s'ils sont demandés.
+"""
+from collections import namedtuple
+from flask import request
+
+# Champ d'une ressource : colonnes du modèle à charger et fonction donnant la valeur sérialisée
+Field = namedtuple('Field', ['columns', 'value'])
+
+
+class FieldsetError(ValueError):
+    """Champ ou objet lié inconnu dans fields / include"""
+
+
+def _parse_list(param, available, default):
+    value = request.args.get(param)
+    if value is None:
+        return list(default)
+
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise FieldsetError(f"Valeur(s) inconnue(s) pour {param} : {', '.join(unknown)} "
+                            f"(valeurs possibles : {', '.join(available)})")
+    return names
+
+
+def requested_fields(available, default):
+    """
+    Champs demandés par le paramètre fields, dans l'ordre de `available` (id toujours inclus)
+
+    Raises:
+        FieldsetError: si un champ est inconnu
+    """
+    names = set(_parse_list('fields', available, default)) | {'id'}
+    return [name for name in available if name in names]
+
+
+def requested_includes(available, default):
+    """
+    Objets liés demandés par le paramètre include
+
+    Raises:
+        FieldsetError: si un objet lié est inconnu
+    """
+    return _parse_list('include', available, default)
+
+
+def load_columns(model, spec, fields, extra=()):
+    """
+    Colonnes du modèle à charger pour les champs demandés (arguments de load_only)
+
+    Args:
+        model: Modèle ORM
+        spec: Champs de la ressource {nom: Field}
+        fields: Champs demandés
+        extra: Colonnes toujours nécessaires (clés étrangères des relations, clé de tri)
+    """
+    names = {'id', *extra}
+    for field in fields:
+        names.update(spec[field].columns)
+    return [getattr(model, name) for name in sorted(names)]
+
+
+def serialize_fields(obj, spec, fields):
+    """Valeurs des champs demandés (seules leurs colonnes sont lues)"""
+    return {field: spec[field].value(obj) for field in fields}
@@ -0,0 +1,44 @@
+"""
+Pagination numérotée des pages HTML (Jinja)
+
+Les listes de l'interface RH sont découpées en pages (OFFSET / FETCH, plus un COUNT pour
+le nombre de pages) ; les filtres, la recherche et le tri restent dans l'URL d'une page à
+l'autre. Le composant de navigation est la macro render_pagination de
+templates/macros/pagination.html.
+
+Paramètres de requête :
+    page        Numéro de page, à partir de 1
+    per_page    Éléments par page (HTML_PAGE_SIZE, au plus HTML_MAX_PAGE_SIZE)
+
+L'API REST utilise une pagination par curseur (voir app.utils.pagination).
+"""
+from flask import request, url_for
+
+HTML_PAGE_SIZE = 25
+HTML_MAX_PAGE_SIZE = 100
+
+
+def paginate_query(query, per_page=HTML_PAGE_SIZE):
+    """
+    Page demandée d'une requête triée
+
+    Args:
+        query: Requête Flask-SQLAlchemy, avec un ORDER BY (obligatoire pour OFFSET sous SQL Server)
+        per_page: Taille de page par défaut
+
+    Returns:
+        Pagination: éléments de la page (items), nombre total, pages voisines
+    """
+    return query.paginate(
+        page=request.args.get('page', 1, type=int),
+        per_page=request.args.get('per_page', per_page, type=int),
+        max_per_page=HTML_MAX_PAGE_SIZE,
+        error_out=False  # Page hors limites : page vide plutôt qu'une erreur 404
+    )
+
+
+def page_url(page):
+    """URL de la page `page` de la vue courante, avec les mêmes filtres et tri"""
+    args = request.args.to_dict()
+    args['page'] = page
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
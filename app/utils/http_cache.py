@@ -0,0 +1,72 @@
+"""
+Requêtes conditionnelles (ETag / If-None-Match) sur les listes de l'API REST
+
+L'ETag faible d'une liste est calculé par une seule requête d'agrégat sur la requête filtrée
+de la liste : nombre de lignes et date de dernière modification (max(updated_at), mise à jour
+par les triggers SQL Server) de la table principale et des tables dont la réponse reprend des
+colonnes. S'y ajoutent le chemin, les paramètres de la requête (filtres, curseur, champs) et
+la portée de l'utilisateur. Si le client renvoie cet ETag dans If-None-Match, la réponse est
+un 304 sans lecture ni sérialisation de la page.
+
+L'ETag est faible : la même liste compressée ou non (voir app.utils.compression) reste
+valide, et deux modifications dans la même tranche de précision de DATETIME (1/300 s)
+pourraient ne pas le changer.
+"""
+import json
+import hashlib
+from flask import request, jsonify, current_app
+from sqlalchemy import func
+
+# Incrémenter si le format des réponses change, pour invalider les ETags déjà distribués
+ETAG_VERSION = 1
+
+
+def collection_etag(query, *aggregates, scope=None):
+    """
+    ETag faible d'une liste
+
+    Args:
+        query: Requête filtrée de la liste (les options de chargement et le tri sont ignorés) ;
+            les tables des agrégats doivent y être jointes par l'appelant
+        aggregates: Agrégats supplémentaires (ex. func.max(Candidate.updated_at))
+        scope: Ce qui, en dehors de l'URL, détermine le contenu (rôle, département...)
+
+    Returns:
+        str: valeur de l'ETag (sans guillemets)
+    """
+    row = query.with_entities(func.count(), *aggregates).order_by(None).one()
+    fingerprint = json.dumps([
+        ETAG_VERSION,
+        request.path,
+        sorted(request.args.items(multi=True)),
+        scope,
+        [value.isoformat() if hasattr(value, 'isoformat') else value for value in row]
+    ], default=str)
+    return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+
+
+def conditional_json(etag, build):
+    """
+    Réponse JSON conditionnelle
+
+    Args:
+        etag: ETag de la liste (voir collection_etag)
+        build: Fonction sans argument renvoyant (corps JSON, statut HTTP) ; n'est appelée
+            que si le client n'a pas déjà la liste
+
+    Returns:
+        Response: 304 si If-None-Match correspond, sinon la réponse JSON avec son ETag
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        body, status = build()
+        response = jsonify(body)
+        response.status_code = status
+        if status != 200:
+            return response
+
+    response.set_etag(etag, weak=True)
+    # Le navigateur peut garder la réponse mais doit la revalider à chaque fois
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
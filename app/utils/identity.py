@@ -0,0 +1,109 @@
+"""
+Identité de l'utilisateur des appels à l'API, lue dans les claims du token JWT
+
+Les tokens émis par /api/auth/login et /api/auth/refresh portent le rôle, le département
+et la version des tokens de l'utilisateur (claim "tv") : les endpoints vérifient les droits
+avec current_identity() sans relire la ligne User à chaque requête.
+
+Un changement de rôle, de département ou de mot de passe incrémente User.token_version
+(trigger TR_User_TokenVersion) : les tokens d'accès portant une version antérieure sont
+refusés, et le client obtient des claims à jour via /api/auth/refresh. Les versions sont
+gardées en mémoire TOKEN_VERSION_CACHE_TTL secondes (30 par défaut), délai maximal avant
+qu'un changement soit pris en compte.
+"""
+import time
+import threading
+from collections import namedtuple
+from flask import g, current_app
+from flask_jwt_extended import get_jwt
+from app.models.models import db
+from app.models.auth_models import User
+
+# Au-delà, les entrées expirées du cache des versions sont purgées
+TOKEN_VERSION_CACHE_MAX_ENTRIES = 10000
+
+_versions = {}  # user_id -> (token_version, expiration en time.monotonic)
+_versions_lock = threading.Lock()
+
+
+class Identity(namedtuple('Identity', ['id', 'username', 'email', 'role_id', 'department_id'])):
+    """Utilisateur authentifié, tel que décrit par les claims de son token"""
+    __slots__ = ()
+
+    def is_hr(self):
+        """Vérifie si l'utilisateur a le rôle RH"""
+        return self.role_id == 1  # 1 = RH
+
+    def is_manager(self):
+        """Vérifie si l'utilisateur a le rôle Manager"""
+        return self.role_id == 2  # 2 = MANAGER
+
+
+def identity_claims(user):
+    """Claims supplémentaires des tokens émis pour un utilisateur"""
+    return {
+        'username': user.username,
+        'email': user.email,
+        'role_id': user.role_id,
+        'department_id': user.department_id,
+        'is_hr': user.is_hr(),
+        'tv': user.token_version,
+        'sub': str(user.id)  # Ajouter explicitement le sujet comme chaîne
+    }
+
+
+def current_identity():
+    """
+    Identité de l'utilisateur du token de la requête (dans un endpoint @jwt_required)
+
+    Construite une fois par requête à partir des claims vérifiés, sans accès à la base.
+    """
+    if 'identity' not in g:
+        claims = get_jwt()
+        g.identity = Identity(
+            id=int(claims['sub']),
+            username=claims.get('username'),
+            email=claims.get('email'),
+            role_id=claims.get('role_id'),
+            department_id=claims.get('department_id')
+        )
+    return g.identity
+
+
+def _stored_token_version(user_id):
+    return db.session.query(User.token_version).filter(User.id == user_id).scalar()
+
+
+def current_token_version(user_id):
+    """Version des tokens de l'utilisateur (None s'il n'existe plus), en cache quelques secondes"""
+    now = time.monotonic()
+    cached = _versions.get(user_id)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+
+    version = _stored_token_version(user_id)
+    ttl = current_app.config.get('TOKEN_VERSION_CACHE_TTL', 30)
+    with _versions_lock:
+        if len(_versions) >= TOKEN_VERSION_CACHE_MAX_ENTRIES:
+            for key in [key for key, (_, expires) in _versions.items() if expires <= now]:
+                del _versions[key]
+        _versions[user_id] = (version, now + ttl)
+    return version
+
+
+def is_token_revoked(jwt_payload):
+    """
+    Vérifie si un token d'accès a été émis avec des claims périmés
+
+    Les tokens antérieurs au claim "tv" (sans département) sont refusés. Les tokens de
+    rafraîchissement ne sont pas concernés : /api/auth/refresh relit l'utilisateur.
+    """
+    if jwt_payload.get('type') != 'access':
+        return False
+    if 'tv' not in jwt_payload:
+        return True
+    try:
+        user_id = int(jwt_payload['sub'])
+    except (KeyError, TypeError, ValueError):
+        return True
+    return current_token_version(user_id) != jwt_payload['tv']
@@ -0,0 +1,65 @@
+"""
+Statistiques des candidatures par offre (table JobStats)
+
+La table est tenue à jour par le trigger TR_Application_JobStats (migrations/008_create_job_stats.sql) :
+lire le nombre de candidatures d'une offre coûte une lecture de ligne au lieu d'un COUNT
+sur Application. Ce module la relit et la reconstruit entièrement si besoin
+(`flask rebuild-job-stats`, par exemple après un import fait trigger désactivé).
+"""
+from sqlalchemy import select, case, func, literal
+from app.models.models import db, Application, JobStats
+
+
+def _status_count(status_id):
+    return func.sum(case((Application.status_id == status_id, 1), else_=0))
+
+
+def rebuild_job_stats():
+    """
+    Recalcule JobStats à partir de la table Application, en une transaction
+
+    Returns:
+        int: nombre d'offres ayant au moins une candidature
+    """
+    stats = JobStats.__table__
+    columns = ['job_position_id', 'total'] + list(JobStats.STATUS_COLUMNS.values()) \
+        + ['scored_count', 'score_sum', 'max_score', 'last_application_at']
+    aggregate = select(
+        Application.job_position_id,
+        func.count(Application.id),
+        *[_status_count(status_id) for status_id in JobStats.STATUS_COLUMNS],
+        func.count(Application.ai_score),
+        func.coalesce(func.sum(Application.ai_score), literal(0.0)),
+        func.max(Application.ai_score),
+        func.max(Application.created_at)
+    ).group_by(Application.job_position_id)
+
+    try:
+        db.session.execute(stats.delete())
+        db.session.execute(stats.insert().from_select(columns, aggregate))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return db.session.query(func.count(JobStats.job_position_id)).scalar()
+
+
+def application_count(job):
+    """Nombre de candidatures d'une offre (relation stats chargée avec l'offre de préférence)"""
+    return job.stats.total if job.stats else 0
+
+
+def job_stats_to_dict(job_position_id, stats):
+    """Sérialise les statistiques d'une offre pour l'API (stats peut être None : aucune candidature)"""
+    return {
+        'job_id': job_position_id,
+        'total': stats.total if stats else 0,
+        # submitted, under_review, interview, rejected, accepted
+        'by_status': {column: getattr(stats, column) if stats else 0 for column in JobStats.STATUS_COLUMNS.values()},
+        'scored': stats.scored_count if stats else 0,
+        'average_score': round(stats.average_score, 1) if stats and stats.average_score is not None else None,
+        'max_score': stats.max_score if stats else None,
+        'last_application_at': stats.last_application_at.strftime('%Y-%m-%dT%H:%M:%S')
+            if stats and stats.last_application_at else None
+    }
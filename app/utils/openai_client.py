@@ -0,0 +1,264 @@
+"""
+Client HTTP partagé pour les appels à l'API OpenAI
+
+Une seule session `requests` par processus : les connexions TCP/TLS sont réutilisées
+d'une analyse à l'autre (keep-alive), chaque appel est borné par des timeouts et les
+erreurs transitoires (429, 5xx, coupures réseau) sont retentées avec un backoff
+exponentiel qui respecte l'en-tête Retry-After.
+
+Variables d'environnement :
+    OPENAI_BASE_URL         URL de base de l'API (ex. serveur local de substitution pour les tests)
+    OPENAI_CONNECT_TIMEOUT  Timeout de connexion en secondes (5)
+    OPENAI_READ_TIMEOUT     Timeout de lecture en secondes (120)
+    OPENAI_MAX_RETRIES      Nombre maximal de nouvelles tentatives (3)
+    OPENAI_BACKOFF_FACTOR   Attente de base du backoff exponentiel en secondes (1)
+    OPENAI_MAX_RETRY_WAIT   Attente maximale entre deux tentatives, Retry-After compris (30)
+    OPENAI_POOL_SIZE        Nombre de connexions conservées dans le pool (10)
+    OPENAI_VERIFY_SSL       Vérification des certificats SSL (no)
+    OPENAI_CASSETTE_MODE    off, record ou replay : enregistrement / rejeu des échanges avec l'API (off)
+    OPENAI_CASSETTE_DIR     Dossier des cassettes (instance/openai_cassettes)
+
+En mode record, chaque réponse réussie est enregistrée dans une cassette nommée d'après
+l'empreinte de la requête ; en mode replay, les réponses sont lues dans les cassettes sans
+aucun accès réseau (une requête inconnue lève CassetteMissError). Les réponses en streaming
+sont lues en entier avant d'être enregistrées.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+import requests
+import urllib3
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from requests.adapters import HTTPAdapter
+
+# Désactiver les avertissements liés à la désactivation de la vérification SSL
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+DEFAULT_CASSETTE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                    'instance', 'openai_cassettes')
+
+# Statuts HTTP pour lesquels une nouvelle tentative a du sens
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+class OpenAIAPIError(Exception):
+    """Erreur renvoyée par l'API OpenAI après épuisement des tentatives"""
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+        super().__init__(f"Erreur API OpenAI: {status_code} - {body}")
+
+
+class CassetteMissError(Exception):
+    """Requête absente des cassettes en mode replay"""
+
+
+def _env_float(name, default):
+    return float(os.environ.get(name, default))
+
+
+def base_url():
+    """URL de base de l'API, sans slash final"""
+    return os.environ.get('OPENAI_BASE_URL', DEFAULT_BASE_URL).rstrip('/')
+
+
+def get_session():
+    """
+    Retourne la session HTTP du processus courant
+
+    La session est recréée après un fork (workers gunicorn, pool de processus) pour ne
+    jamais partager de socket entre deux processus.
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            pool_size = int(os.environ.get('OPENAI_POOL_SIZE', '10'))
+            session = requests.Session()
+            # Les nouvelles tentatives sont gérées par chat_completion, pas par urllib3
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.verify = os.environ.get('OPENAI_VERIFY_SSL', 'no').lower() == 'yes'
+            _session = session
+            _session_pid = pid
+
+    return _session
+
+
+def _retry_after(response):
+    """Délai demandé par l'en-tête Retry-After (en secondes ou date HTTP), ou None"""
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_delay(attempt, response=None):
+    """Attente avant la tentative suivante : Retry-After si présent, sinon backoff exponentiel"""
+    max_wait = _env_float('OPENAI_MAX_RETRY_WAIT', '30')
+    delay = _retry_after(response)
+    if delay is None:
+        delay = _env_float('OPENAI_BACKOFF_FACTOR', '1') * (2 ** attempt)
+    return min(delay, max_wait)
+
+
+def cassette_mode():
+    """Mode d'enregistrement / rejeu des échanges avec l'API : off, record ou replay"""
+    return os.environ.get('OPENAI_CASSETTE_MODE', 'off').lower()
+
+
+def _cassette_path(path, payload):
+    """Cassette d'une requête : empreinte du chemin et du corps JSON canonique"""
+    body = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    digest = hashlib.sha256(f"{path}\n{body}".encode('utf-8')).hexdigest()
+    return os.path.join(os.environ.get('OPENAI_CASSETTE_DIR', DEFAULT_CASSETTE_DIR), f"{digest}.json")
+
+
+def _replayed_response(cassette):
+    """Reconstruit une réponse requests à partir d'une cassette"""
+    response = requests.Response()
+    response.status_code = cassette['status_code']
+    response.headers.update(cassette.get('headers', {}))
+    response._content = cassette['body'].encode('utf-8')
+    response._content_consumed = True
+    response.encoding = 'utf-8'
+    return response
+
+
+def _record(path, payload, response):
+    """Enregistre une réponse réussie dans sa cassette"""
+    cassette_path = _cassette_path(path, payload)
+    os.makedirs(os.path.dirname(cassette_path), exist_ok=True)
+    response.encoding = 'utf-8'
+    cassette = {
+        'path': path,
+        'model': payload.get('model'),
+        'stream': bool(payload.get('stream')),
+        'status_code': response.status_code,
+        'headers': {'Content-Type': response.headers.get('Content-Type', 'application/json')},
+        'body': response.text
+    }
+    with open(cassette_path, 'w', encoding='utf-8') as file:
+        json.dump(cassette, file, ensure_ascii=False)
+
+
+def post(path, payload, api_key, stream=False):
+    """
+    Envoie une requête POST à l'API avec timeouts et nouvelles tentatives
+
+    Args:
+        path: Chemin relatif à l'URL de base (ex. "/chat/completions")
+        payload: Corps JSON de la requête
+        api_key: Clé API OpenAI
+        stream: Ne pas lire le corps de la réponse (réponses en streaming)
+
+    Returns:
+        requests.Response: réponse avec un statut 200
+
+    Raises:
+        OpenAIAPIError: si l'API renvoie une erreur après épuisement des tentatives
+        requests.RequestException: si le serveur reste injoignable
+    """
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}"
+    }
+    mode = cassette_mode()
+    if mode == 'replay':
+        cassette_path = _cassette_path(path, payload)
+        if not os.path.exists(cassette_path):
+            raise CassetteMissError(f"Aucune cassette pour cette requête ({os.path.basename(cassette_path)})")
+        with open(cassette_path, encoding='utf-8') as file:
+            return _replayed_response(json.load(file))
+
+    timeout = (_env_float('OPENAI_CONNECT_TIMEOUT', '5'), _env_float('OPENAI_READ_TIMEOUT', '120'))
+    max_retries = int(os.environ.get('OPENAI_MAX_RETRIES', '3'))
+    url = f"{base_url()}{path}"
+    session = get_session()
+
+    attempt = 0
+    while True:
+        try:
+            response = session.post(url, headers=headers, json=payload, timeout=timeout, stream=stream)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= max_retries:
+                raise
+            time.sleep(_backoff_delay(attempt))
+            attempt += 1
+            continue
+
+        if response.status_code == 200:
+            if mode == 'record':
+                _record(path, payload, response)
+            return response
+
+        if response.status_code not in RETRY_STATUSES or attempt >= max_retries:
+            raise OpenAIAPIError(response.status_code, response.text)
+
+        delay = _backoff_delay(attempt, response)
+        # Libérer la connexion pour qu'elle retourne dans le pool
+        response.close()
+        time.sleep(delay)
+        attempt += 1
+
+
+def chat_completion(payload, api_key):
+    """
+    Appelle /chat/completions et retourne la réponse JSON décodée
+    """
+    response = post("/chat/completions", payload, api_key)
+    return response.json()
+
+
+def chat_completion_stream(payload, api_key):
+    """
+    Appelle /chat/completions en streaming (server-sent events) et génère le texte
+    au fur et à mesure de sa production
+
+    Les nouvelles tentatives ne portent que sur l'ouverture du flux : une coupure
+    en cours de génération est remontée à l'appelant.
+
+    Yields:
+        str: fragments successifs du message de l'assistant
+    """
+    response = post("/chat/completions", dict(payload, stream=True), api_key, stream=True)
+    # text/event-stream sans charset : requests supposerait ISO-8859-1
+    response.encoding = 'utf-8'
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith('data:'):
+                continue
+            data = line[len('data:'):].strip()
+            if data == '[DONE]':
+                break
+            chunk = json.loads(data)
+            if not chunk.get('choices'):
+                continue
+            delta = chunk['choices'][0].get('delta', {}).get('content')
+            if delta:
+                yield delta
+    finally:
+        response.close()
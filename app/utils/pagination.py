@@ -0,0 +1,216 @@
+"""
+Pagination par clé (keyset) des listes de l'API REST
+
+Les listes sont triées sur une clé unique (par défaut created_at puis id, du plus récent
+au plus ancien). Le curseur renvoyé au client contient les valeurs de cette clé pour le
+dernier élément de la page ; la page suivante est lue avec un prédicat
+« (created_at, id) < (curseur) » qui s'appuie sur l'index de la clé, au lieu d'un OFFSET
+dont le coût croît avec la profondeur de la page.
+
+Paramètres de requête :
+    limit       Nombre d'éléments par page (DEFAULT_PAGE_SIZE, au plus MAX_PAGE_SIZE)
+    cursor      Curseur next_cursor de la page précédente
+    with_total  1/true : calculer aussi le nombre total d'éléments (requête COUNT supplémentaire)
+
+Réponse : {"items": [...], "next_cursor": "..." ou null, "total": n (si demandé)}
+"""
+import json
+import base64
+from datetime import datetime
+from flask import request
+from sqlalchemy import and_, or_, true, false, cast, DateTime, Integer, Numeric
+from app.models.models import db
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class PaginationError(ValueError):
+    """Paramètres de pagination invalides (limit ou cursor)"""
+
+
+def _is_datetime(column):
+    return isinstance(column.type, DateTime)
+
+
+def _is_number(column):
+    # Float dérive de Numeric
+    return isinstance(column.type, (Integer, Numeric))
+
+
+def _is_nullable(column):
+    return bool(getattr(column.expression, 'nullable', False))
+
+
+def encode_cursor(values):
+    """Encode les valeurs de la clé de tri du dernier élément d'une page"""
+    data = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, order):
+    """
+    Décode un curseur pour la clé de tri donnée
+
+    Raises:
+        PaginationError: si le curseur est illisible ou ne correspond pas à la clé de tri
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        raise PaginationError('Curseur invalide')
+
+    if not isinstance(values, list) or len(values) != len(order):
+        raise PaginationError('Curseur invalide')
+
+    decoded = []
+    for (column, _descending), value in zip(order, values):
+        if value is not None and _is_datetime(column):
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise PaginationError('Curseur invalide')
+        elif value is not None and _is_number(column):
+            # Curseur obtenu avec un autre tri
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise PaginationError('Curseur invalide')
+        decoded.append(value)
+    return decoded
+
+
+def page_args():
+    """
+    Lit les paramètres de pagination de la requête courante
+
+    Returns:
+        tuple: (limit, cursor, with_total)
+
+    Raises:
+        PaginationError: si limit n'est pas un entier positif
+    """
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise PaginationError('Le paramètre limit doit être un entier')
+    if limit < 1:
+        raise PaginationError('Le paramètre limit doit être positif')
+
+    cursor = request.args.get('cursor') or None
+    with_total = request.args.get('with_total', '').lower() in ('1', 'true')
+    return min(limit, MAX_PAGE_SIZE), cursor, with_total
+
+
+def _bound(column, value):
+    """
+    Valeur du curseur comparée à la colonne
+
+    Sur SQL Server, pyodbc envoie les dates en DATETIME2 : comparée telle quelle à une colonne
+    DATETIME (précision 1/300 s), l'égalité échouerait et des lignes seraient sautées ou
+    répétées. La valeur est donc convertie dans le type de la colonne.
+    """
+    if _is_datetime(column) and db.session.get_bind().dialect.name == 'mssql':
+        return cast(value, column.type)
+    return value
+
+
+def _equal(column, value):
+    if value is None:
+        return column.is_(None)
+    return column == _bound(column, value)
+
+
+def _beyond(column, value, descending):
+    """
+    Prédicat « colonne strictement après la valeur » dans le sens du tri
+
+    NULL est traité comme la plus petite valeur, comme le fait SQL Server : en premier
+    dans l'ordre croissant, en dernier dans l'ordre décroissant.
+    """
+    if descending:
+        if value is None:
+            return false()
+        clause = column < _bound(column, value)
+        return or_(clause, column.is_(None)) if _is_nullable(column) else clause
+
+    if value is None:
+        return column.isnot(None) if _is_nullable(column) else true()
+    return column > _bound(column, value)
+
+
+def _after(order, values):
+    """Prédicat « clé de tri strictement après le curseur » dans l'ordre demandé"""
+    clauses = []
+    for position, (column, descending) in enumerate(order):
+        equal = [_equal(previous, value) for (previous, _), value in zip(order[:position], values[:position])]
+        clauses.append(and_(*equal, _beyond(column, values[position], descending)))
+    return or_(*clauses)
+
+
+def keyset_page(query, order, limit, cursor=None, with_total=False):
+    """
+    Lit une page d'une requête ORM avec une pagination par clé
+
+    Args:
+        query: Requête (filtres et options de chargement déjà appliqués, sans tri)
+        order: Clé de tri [(colonne, décroissant), ...] ; la dernière colonne doit être unique (id).
+            Les colonnes NULL sont triées comme le fait SQL Server (NULL en premier en croissant)
+        limit: Nombre maximal d'éléments
+        cursor: Curseur de la page précédente (None pour la première page)
+        with_total: Calculer aussi le nombre total d'éléments de la requête
+
+    Returns:
+        dict: items (objets ORM), next_cursor et, si demandé, total
+
+    Raises:
+        PaginationError: si le curseur est invalide
+    """
+    page = {}
+    if with_total:
+        page['total'] = query.order_by(None).count()
+
+    if cursor:
+        query = query.filter(_after(order, decode_cursor(cursor, order)))
+
+    ordering = [column.desc() if descending else column.asc() for column, descending in order]
+    # Un élément de plus que la page pour savoir s'il existe une page suivante
+    rows = query.order_by(*ordering).limit(limit + 1).all()
+
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column, _ in order])
+
+    page['items'] = items
+    page['next_cursor'] = next_cursor
+    return page
+
+
+def created_at_order(model):
+    """Clé de tri par défaut des listes : du plus récent au plus ancien"""
+    return [(model.created_at, True), (model.id, True)]
+
+
+def paginated_response(query, order, serialize):
+    """
+    Page de la requête selon les paramètres limit / cursor / with_total de la requête HTTP
+
+    Args:
+        query: Requête ORM sans tri
+        order: Clé de tri (voir keyset_page)
+        serialize: Fonction recevant la liste des objets de la page et renvoyant leur
+            représentation JSON (permet de charger des données associées en une requête)
+
+    Returns:
+        tuple: (corps JSON, statut HTTP) ; 400 si les paramètres sont invalides
+    """
+    try:
+        limit, cursor, with_total = page_args()
+        page = keyset_page(query, order, limit, cursor, with_total)
+    except PaginationError as e:
+        return {'message': str(e)}, 400
+
+    page['items'] = serialize(page['items'])
+    return page, 200
@@ -0,0 +1,130 @@
+"""
+Cache en mémoire des tables de référence : départements, rôles et statuts de candidature
+
+Ces tables ne changent que quelques fois par an mais sont lues par presque toutes les
+pages et réponses de l'API. Chaque processus les charge une fois et les garde en mémoire,
+sous forme de tuples immuables (et non d'objets ORM liés à une session).
+
+Invalidation : toute écriture dans ces tables doit appeler bump_version() dans la même
+transaction. La version stockée en base (table ReferenceDataVersion) est alors incrémentée ;
+les autres processus la comparent à la leur au plus toutes les
+REFERENCE_DATA_CHECK_INTERVAL secondes (30 par défaut) et rechargent le cache si elle a changé.
+"""
+import time
+import threading
+from collections import namedtuple
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app.models.models import db, Department, ApplicationStatusModel, ReferenceDataVersion
+from app.models.auth_models import Role
+
+VERSION_NAME = 'reference'
+
+DepartmentRef = namedtuple('DepartmentRef', ['id', 'name', 'description'])
+RoleRef = namedtuple('RoleRef', ['id', 'name', 'description'])
+StatusRef = namedtuple('StatusRef', ['id', 'name', 'description'])
+
+_lock = threading.Lock()
+_cache = {
+    'version': None,       # Version en base au moment du chargement
+    'checked_at': 0.0,     # Dernière comparaison avec la base (time.monotonic)
+    'departments': {},
+    'roles': {},
+    'statuses': {}
+}
+
+
+def _stored_version():
+    return db.session.query(ReferenceDataVersion.version) \
+        .filter(ReferenceDataVersion.name == VERSION_NAME).scalar()
+
+
+def _load(version):
+    _cache['departments'] = {d.id: DepartmentRef(d.id, d.name, d.description)
+                             for d in Department.query.order_by(Department.name)}
+    _cache['roles'] = {r.id: RoleRef(r.id, r.name, r.description) for r in Role.query.order_by(Role.id)}
+    _cache['statuses'] = {s.id: StatusRef(s.id, s.name, s.description)
+                          for s in ApplicationStatusModel.query.order_by(ApplicationStatusModel.id)}
+    _cache['version'] = version
+
+
+def _ensure_fresh():
+    """Recharge le cache s'il est vide ou si la version en base a changé"""
+    interval = current_app.config.get('REFERENCE_DATA_CHECK_INTERVAL', 30)
+    now = time.monotonic()
+    if _cache['version'] is not None and now - _cache['checked_at'] < interval:
+        return
+
+    with _lock:
+        if _cache['version'] is not None and now - _cache['checked_at'] < interval:
+            return
+        # Version lue avant les données : une modification concurrente sera vue au prochain contrôle
+        version = _stored_version() or 0
+        if version != _cache['version']:
+            _load(version)
+        _cache['checked_at'] = now
+
+
+def bump_version():
+    """
+    Signale une modification des tables de référence, à appeler dans la transaction de l'écriture
+
+    La version en base n'est incrémentée qu'au commit de l'appelant ; le cache du processus
+    courant est rechargé à la prochaine lecture.
+    """
+    updated = db.session.execute(
+        db.update(ReferenceDataVersion)
+        .where(ReferenceDataVersion.name == VERSION_NAME)
+        .values(version=ReferenceDataVersion.version + 1, updated_at=datetime.utcnow())
+    ).rowcount
+    if updated == 0:
+        # Ligne absente (base antérieure à la migration 010) : la créer
+        try:
+            with db.session.begin_nested():
+                db.session.add(ReferenceDataVersion(name=VERSION_NAME, version=2))
+        except IntegrityError:
+            pass
+
+    with _lock:
+        _cache['version'] = None
+
+
+def current_version():
+    """Version des données de référence en cache (pour les ETags)"""
+    _ensure_fresh()
+    return _cache['version']
+
+
+def departments():
+    """Départements triés par nom"""
+    _ensure_fresh()
+    return list(_cache['departments'].values())
+
+
+def get_department(department_id):
+    """Département par identifiant (entier ou chaîne, ex. valeur JSON ou de formulaire), ou None"""
+    try:
+        department_id = int(department_id)
+    except (TypeError, ValueError):
+        return None
+    _ensure_fresh()
+    return _cache['departments'].get(department_id)
+
+
+def department_name(department_id, default="Non spécifié"):
+    """Nom d'un département, ou `default` s'il n'existe pas"""
+    department = get_department(department_id) if department_id else None
+    return department.name if department else default
+
+
+def roles():
+    """Rôles utilisateur triés par identifiant"""
+    _ensure_fresh()
+    return list(_cache['roles'].values())
+
+
+def application_statuses():
+    """Statuts de candidature de la table ApplicationStatus, triés par identifiant"""
+    _ensure_fresh()
+    return list(_cache['statuses'].values())
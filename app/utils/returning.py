@@ -0,0 +1,100 @@
+"""
+Mises à jour qui renvoient les lignes modifiées, en un aller-retour avec la base
+
+Les tables Application et InterviewRequest ont des triggers (updated_at, JobStats) : une mise
+à jour par l'ORM provoque des StaleDataError, et une mise à jour directe suivie d'un
+refresh() coûte une requête de plus. update_returning() exécute la mise à jour et relit les
+lignes modifiées dans le même lot, puis les charge comme objets ORM.
+
+Sous SQL Server, une clause OUTPUT sans INTO est refusée sur une table qui a des triggers :
+les identifiants modifiés sont donc écrits dans une variable table, et les lignes relues à
+partir de celle-ci, après l'exécution des triggers (updated_at à jour). Les autres bases
+utilisent UPDATE ... RETURNING.
+
+update_returning_ids() ne renvoie que les identifiants des lignes modifiées (mises à jour en
+masse, où relire toutes les colonnes serait inutile).
+"""
+from sqlalchemy import text
+from app.models.models import db
+
+
+def _primary_key(model):
+    return model.__table__.primary_key.columns.values()[0]
+
+
+def _mssql_update_into(model, statement, dialect):
+    """
+    UPDATE ... OUTPUT inserted.id INTO @ids, précédé de la déclaration de @ids
+
+    Returns:
+        tuple: (texte SQL, paramètres nommés)
+    """
+    table = model.__table__
+    pk = _primary_key(model)
+    preparer = dialect.identifier_preparer
+
+    # Paramètres nommés (:nom) pour que text() les reconnaisse ; listes IN (...) développées
+    named_dialect = type(dialect)(paramstyle='named')
+    compiled = statement.returning(pk).compile(dialect=named_dialect,
+                                               compile_kwargs={'render_postcompile': True})
+    output = f"OUTPUT inserted.{preparer.format_column(pk)}"
+    if output not in compiled.string:
+        raise ValueError(f"Clause OUTPUT introuvable dans la mise à jour de {table.name}")
+
+    sql = (
+        f"DECLARE @ids TABLE ([id] INT PRIMARY KEY);\n"
+        f"{compiled.string.replace(output, output + ' INTO @ids', 1)};\n"
+    )
+    return sql, compiled.params
+
+
+def _mssql_statement(model, statement, dialect):
+    """Lot T-SQL : UPDATE ... OUTPUT inserted.id INTO @ids, puis SELECT des lignes modifiées"""
+    table = model.__table__
+    preparer = dialect.identifier_preparer
+    sql, params = _mssql_update_into(model, statement, dialect)
+    columns = ', '.join(f"[t].{preparer.format_column(column)}" for column in table.columns)
+    sql += (
+        f"SELECT {columns} FROM {preparer.format_table(table)} [t] "
+        f"WHERE [t].{preparer.format_column(_primary_key(model))} IN (SELECT [id] FROM @ids)"
+    )
+    return text(sql).bindparams(**params).columns(*table.columns)
+
+
+def update_returning(model, statement):
+    """
+    Exécute une mise à jour et renvoie les objets modifiés, relus par la même requête
+
+    Les objets déjà présents dans la session sont mis à jour (pas de refresh() à faire).
+    La transaction n'est pas validée : l'appelant fait le commit.
+
+    Args:
+        model: Modèle mis à jour (clé primaire entière unique)
+        statement: db.update(model).where(...).values(...), sans paramètres libres
+
+    Returns:
+        list: Objets modifiés (liste vide si aucune ligne ne correspond)
+    """
+    dialect = db.session.get_bind().dialect
+    if dialect.name == 'mssql':
+        returning = _mssql_statement(model, statement, dialect)
+    else:
+        returning = statement.returning(*model.__table__.columns)
+
+    query = db.select(model).from_statement(returning).execution_options(populate_existing=True)
+    return db.session.scalars(query).all()
+
+
+def update_returning_ids(model, statement):
+    """
+    Exécute une mise à jour et renvoie les identifiants des lignes modifiées, triés
+
+    Même contrat que update_returning (pas de commit, pas de paramètres libres).
+    """
+    dialect = db.session.get_bind().dialect
+    if dialect.name == 'mssql':
+        sql, params = _mssql_update_into(model, statement, dialect)
+        returning = text(sql + "SELECT [id] FROM @ids").bindparams(**params)
+    else:
+        returning = statement.returning(_primary_key(model))
+    return sorted(db.session.scalars(returning).all())
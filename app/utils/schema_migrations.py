@@ -0,0 +1,106 @@
+"""
+Application des scripts SQL Server du dossier migrations/ (`flask db-upgrade`)
+
+Les scripts sont numérotés (001_..., 002_...) et appliqués dans l'ordre. Chaque script
+appliqué est enregistré dans la table SchemaMigration (créée au premier passage) : les
+suivants ne sont exécutés qu'une fois. Les scripts étant idempotents (IF NOT EXISTS), une
+base dont une partie des scripts a été appliquée à la main peut être mise à jour sans
+précaution particulière.
+
+Comme sqlcmd, le script est découpé en lots sur les lignes GO. Chaque script est exécuté
+dans sa propre transaction, avec son enregistrement dans SchemaMigration.
+"""
+import hashlib
+import os
+import re
+from sqlalchemy import text
+from app.models.models import db
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                              'migrations')
+
+# Séparateur de lots (ligne contenant seulement GO, insensible à la casse)
+_BATCH_SEPARATOR = re.compile(r'^\s*GO\s*;?\s*$', re.IGNORECASE | re.MULTILINE)
+_MIGRATION_NAME = re.compile(r'^\d{3}_.+\.sql$')
+
+_CREATE_TABLE = """
+IF OBJECT_ID(N'[dbo].[SchemaMigration]', N'U') IS NULL
+    CREATE TABLE [dbo].[SchemaMigration](
+        [name] NVARCHAR(255) NOT NULL PRIMARY KEY,
+        [checksum] CHAR(64) NOT NULL,
+        [applied_at] DATETIME NOT NULL DEFAULT GETDATE()
+    );
+"""
+
+
+def migration_files(directory=MIGRATIONS_DIR):
+    """Scripts de migration, triés par numéro"""
+    return sorted(name for name in os.listdir(directory) if _MIGRATION_NAME.match(name))
+
+
+def split_batches(sql):
+    """Lots d'un script T-SQL, séparés par les lignes GO (lots vides ignorés)"""
+    return [batch.strip() for batch in _BATCH_SEPARATOR.split(sql) if batch.strip()]
+
+
+def _checksum(sql):
+    return hashlib.sha256(sql.encode('utf-8')).hexdigest()
+
+
+def applied_migrations():
+    """Scripts déjà appliqués : {nom: empreinte SHA-256 du script au moment de l'application}"""
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql(_CREATE_TABLE)
+        rows = connection.execute(text("SELECT [name], [checksum] FROM [dbo].[SchemaMigration]"))
+        return {name: checksum for name, checksum in rows}
+
+
+def pending_migrations(directory=MIGRATIONS_DIR):
+    """Scripts non encore appliqués, dans l'ordre"""
+    applied = applied_migrations()
+    return [name for name in migration_files(directory) if name not in applied]
+
+
+def modified_migrations(directory=MIGRATIONS_DIR):
+    """Scripts appliqués dont le contenu a changé depuis (à vérifier, jamais réappliqués)"""
+    applied = applied_migrations()
+    modified = []
+    for name in migration_files(directory):
+        if name in applied:
+            with open(os.path.join(directory, name), encoding='utf-8-sig') as f:
+                if _checksum(f.read()) != applied[name].strip():
+                    modified.append(name)
+    return modified
+
+
+def apply_migration(name, directory=MIGRATIONS_DIR):
+    """Exécute un script et l'enregistre dans SchemaMigration, en une transaction"""
+    with open(os.path.join(directory, name), encoding='utf-8-sig') as f:
+        sql = f.read()
+
+    with db.engine.begin() as connection:
+        for batch in split_batches(sql):
+            connection.exec_driver_sql(batch)
+        connection.execute(
+            text("INSERT INTO [dbo].[SchemaMigration] ([name], [checksum]) VALUES (:name, :checksum)"),
+            {'name': name, 'checksum': _checksum(sql)}
+        )
+
+
+def upgrade(directory=MIGRATIONS_DIR, on_apply=None):
+    """
+    Applique les scripts en attente, dans l'ordre ; s'arrête au premier échec
+
+    Args:
+        on_apply: Fonction appelée avec le nom de chaque script avant son exécution
+
+    Returns:
+        list: Noms des scripts appliqués
+    """
+    applied = []
+    for name in pending_migrations(directory):
+        if on_apply:
+            on_apply(name)
+        apply_migration(name, directory)
+        applied.append(name)
+    return applied
@@ -0,0 +1,109 @@
+"""
+Restriction des requêtes au périmètre de l'utilisateur
+
+Les RH voient toutes les offres et candidatures ; un manager ne voit que celles de son
+département, et ses propres demandes d'entretien. Le critère est ajouté à la requête SQL elle-même (jointure sur JobPosition) :
+le contrôle d'accès et la lecture des données se font en une requête, et une candidature
+hors du périmètre est traitée comme inexistante (404) plutôt que lue puis refusée.
+
+Les fonctions acceptent l'identité des claims JWT (app.utils.identity) comme l'utilisateur
+connecté de Flask-Login : seuls is_hr() et department_id sont utilisés.
+"""
+from sqlalchemy import select, true
+from sqlalchemy.orm import load_only
+from app.models.models import JobPosition, Application
+from app.models.auth_models import InterviewRequest
+
+
+def is_unrestricted(user):
+    """Vérifie si l'utilisateur voit toutes les données (RH)"""
+    return user.is_hr()
+
+
+def scope_jobs(query, user):
+    """Restreint une requête sur JobPosition aux offres visibles par l'utilisateur"""
+    if is_unrestricted(user):
+        return query
+    # Un manager sans département ne voit rien (department_id IS NULL ne correspond à aucune offre)
+    return query.filter(JobPosition.department_id == user.department_id)
+
+
+def scope_applications(query, user):
+    """
+    Restreint une requête sur Application aux candidatures visibles par l'utilisateur
+
+    Pour un manager, JobPosition est jointe à la requête : les filtres et tris de l'appelant
+    peuvent l'utiliser sans nouvelle jointure.
+    """
+    if is_unrestricted(user):
+        return query
+    return query.join(Application.job_position).filter(JobPosition.department_id == user.department_id)
+
+
+def application_scope_condition(user):
+    """
+    Critère de périmètre sur Application, sans jointure (clause WHERE d'un UPDATE)
+
+    Toujours vrai pour les RH ; pour un manager, les offres de son département en sous-requête.
+    """
+    if is_unrestricted(user):
+        return true()
+    return Application.job_position_id.in_(
+        select(JobPosition.id).where(JobPosition.department_id == user.department_id)
+    )
+
+
+def scope_by_job(query, user, job_id_column):
+    """
+    Restreint une requête sur une table liée à une offre (ex. AnalysisBatch.job_position_id)
+
+    Args:
+        query: Requête à restreindre
+        user: Utilisateur
+        job_id_column: Colonne de la requête contenant l'identifiant de l'offre
+    """
+    if is_unrestricted(user):
+        return query
+    return query.join(JobPosition, JobPosition.id == job_id_column) \
+        .filter(JobPosition.department_id == user.department_id)
+
+
+def scope_by_application(query, user, application_id_column):
+    """Restreint une requête sur une table liée à une candidature (ex. AnalysisJob.application_id)"""
+    if is_unrestricted(user):
+        return query
+    return scope_by_job(query.join(Application, Application.id == application_id_column),
+                        user, Application.job_position_id)
+
+
+def scope_interview_requests(query, user):
+    """Restreint une requête sur InterviewRequest : toutes pour les RH, les siennes pour un manager"""
+    if is_unrestricted(user):
+        return query
+    return query.filter(InterviewRequest.manager_id == user.id)
+
+
+def scoped_application(user, application_id, *columns):
+    """
+    Candidature visible par l'utilisateur, en une requête
+
+    Args:
+        user: Utilisateur (identité JWT ou utilisateur Flask-Login)
+        application_id: Identifiant de la candidature
+        columns: Colonnes de Application à charger (toutes si aucune)
+
+    Returns:
+        Application, ou None si elle n'existe pas ou est hors du périmètre de l'utilisateur
+    """
+    query = scope_applications(Application.query, user)
+    if columns:
+        query = query.options(load_only(Application.id, *columns))
+    return query.filter(Application.id == application_id).first()
+
+
+def scoped_job(user, job_id, *columns):
+    """Offre visible par l'utilisateur, ou None (voir scoped_application)"""
+    query = scope_jobs(JobPosition.query, user)
+    if columns:
+        query = query.options(load_only(JobPosition.id, *columns))
+    return query.filter(JobPosition.id == job_id).first()
@@ -1,8 +1,15 @@
 """
 Filtres personnalisés pour les templates Jinja2
+
+Les filtres get_* lisent les objets par lots (voir app.utils.batch_loader) : la vue annonce
+les identifiants de la page avec prime() pour qu'une boucle du template ne coûte qu'une
+requête par modèle.
 """
 from app.models.models import Candidate, JobPosition, ApplicationStatus, Application
 from app.models.auth_models import User
+from app.utils import reference_data
+from app.utils.batch_loader import load
+from app.utils.html_pagination import page_url
 
 def init_app(app):
     """Initialise les filtres personnalisés pour l'application Flask"""
@@ -10,22 +17,22 @@ def init_app(app):
     @app.template_filter('get_candidate')
     def get_candidate(candidate_id):
         """Récupère un objet Candidate à partir de son ID"""
-        return Candidate.query.get(candidate_id)
+        return load(Candidate, candidate_id)
     
     @app.template_filter('get_job')
     def get_job(job_id):
         """Récupère un objet JobPosition à partir de son ID"""
-        return JobPosition.query.get(job_id)
+        return load(JobPosition, job_id)
         
     @app.template_filter('get_application')
     def get_application(application_id):
         """Récupère un objet Application à partir de son ID"""
-        return Application.query.get(application_id)
+        return load(Application, application_id)
     
     @app.template_filter('get_user')
     def get_user(user_id):
         """Récupère un objet User à partir de son ID"""
-        return User.query.get(user_id)
+        return load(User, user_id)
     
     @app.template_filter('get_status_name')
     def get_status_name(status_id):
@@ -39,6 +46,14 @@ def init_app(app):
         }
         return status_map.get(status_id, "Inconnu")
     
+    @app.template_filter('department_name')
+    def department_name(department_id):
+        """Nom d'un département à partir de son ID (cache des données de référence)"""
+        return reference_data.department_name(department_id)
+    
+    # URL d'une autre page de la liste courante (macro render_pagination)
+    app.add_template_global(page_url, 'page_url')
+    
     @app.template_filter('nl2br')
     def nl2br(value):
         """Convertit les sauts de ligne en balises <br>"""
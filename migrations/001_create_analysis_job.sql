@@ -0,0 +1,29 @@
+-- File d'attente des analyses IA de CV (consommée par `flask analysis-worker`)
+IF OBJECT_ID(N'[dbo].[AnalysisJob]', N'U') IS NULL
+BEGIN
+    CREATE TABLE [dbo].[AnalysisJob](
+        [id] INT IDENTITY(1,1) PRIMARY KEY,
+        [application_id] INT NOT NULL,
+        [status] NVARCHAR(20) NOT NULL DEFAULT 'QUEUED',  -- QUEUED, RUNNING, DONE, FAILED
+        [attempts] INT NOT NULL DEFAULT 0,
+        [worker_id] NVARCHAR(100) NULL,
+        [error_message] NVARCHAR(MAX) NULL,
+        [ai_analysis] NVARCHAR(MAX) NULL,
+        [ai_score] FLOAT NULL,
+        [created_at] DATETIME NOT NULL DEFAULT GETDATE(),
+        [started_at] DATETIME NULL,
+        [finished_at] DATETIME NULL,
+        CONSTRAINT FK_AnalysisJob_Application FOREIGN KEY ([application_id])
+            REFERENCES [dbo].[Application]([id])
+    );
+END
+GO
+
+-- Les workers cherchent le plus ancien job QUEUED : index sur (status, id)
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_AnalysisJob_Status' AND object_id = OBJECT_ID(N'[dbo].[AnalysisJob]'))
+    CREATE INDEX IDX_AnalysisJob_Status ON [dbo].[AnalysisJob]([status], [id]);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_AnalysisJob_Application' AND object_id = OBJECT_ID(N'[dbo].[AnalysisJob]'))
+    CREATE INDEX IDX_AnalysisJob_Application ON [dbo].[AnalysisJob]([application_id]);
+GO
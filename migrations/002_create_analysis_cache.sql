@@ -0,0 +1,23 @@
+-- Cache des résultats d'analyse IA, indexé par sha256(CV + offre + modèle + version du prompt)
+IF OBJECT_ID(N'[dbo].[AnalysisCache]', N'U') IS NULL
+BEGIN
+    CREATE TABLE [dbo].[AnalysisCache](
+        [id] INT IDENTITY(1,1) PRIMARY KEY,
+        [cache_key] NVARCHAR(64) NOT NULL,
+        [cv_sha256] NVARCHAR(64) NOT NULL,
+        [model] NVARCHAR(50) NOT NULL,
+        [prompt_version] INT NOT NULL,
+        [ai_analysis] NVARCHAR(MAX) NOT NULL,
+        [ai_score] FLOAT NULL,
+        [hit_count] INT NOT NULL DEFAULT 0,
+        [created_at] DATETIME NOT NULL DEFAULT GETDATE(),
+        [last_used_at] DATETIME NOT NULL DEFAULT GETDATE(),
+        CONSTRAINT UQ_AnalysisCache_Key UNIQUE ([cache_key])
+    );
+END
+GO
+
+-- L'éviction supprime les entrées les moins récemment utilisées
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_AnalysisCache_LastUsed' AND object_id = OBJECT_ID(N'[dbo].[AnalysisCache]'))
+    CREATE INDEX IDX_AnalysisCache_LastUsed ON [dbo].[AnalysisCache]([last_used_at]);
+GO
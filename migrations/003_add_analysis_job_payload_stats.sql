@@ -0,0 +1,12 @@
+-- Taille de la requête envoyée au modèle Vision, pour ajuster le profil de rendu des pages
+IF COL_LENGTH(N'[dbo].[AnalysisJob]', N'pages_sent') IS NULL
+    ALTER TABLE [dbo].[AnalysisJob] ADD [pages_sent] INT NULL;
+GO
+
+IF COL_LENGTH(N'[dbo].[AnalysisJob]', N'image_bytes') IS NULL
+    ALTER TABLE [dbo].[AnalysisJob] ADD [image_bytes] INT NULL;
+GO
+
+IF COL_LENGTH(N'[dbo].[AnalysisJob]', N'payload_bytes') IS NULL
+    ALTER TABLE [dbo].[AnalysisJob] ADD [payload_bytes] INT NULL;
+GO
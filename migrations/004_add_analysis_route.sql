@@ -0,0 +1,8 @@
+-- Chemin suivi par l'analyse : text, vision, text_fallback ou cache (voir app.utils.ai_analysis.AnalysisRoute)
+IF COL_LENGTH(N'[dbo].[AnalysisJob]', N'analysis_route') IS NULL
+    ALTER TABLE [dbo].[AnalysisJob] ADD [analysis_route] NVARCHAR(20) NULL;
+GO
+
+IF COL_LENGTH(N'[dbo].[AnalysisCache]', N'analysis_route') IS NULL
+    ALTER TABLE [dbo].[AnalysisCache] ADD [analysis_route] NVARCHAR(20) NULL;
+GO
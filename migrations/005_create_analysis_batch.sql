@@ -0,0 +1,35 @@
+-- Analyses groupées des candidatures d'une offre (POST /api/jobs/<id>/analyze-all)
+IF OBJECT_ID(N'[dbo].[AnalysisBatch]', N'U') IS NULL
+BEGIN
+    CREATE TABLE [dbo].[AnalysisBatch](
+        [id] INT IDENTITY(1,1) PRIMARY KEY,
+        [job_position_id] INT NOT NULL,
+        [requested_by] INT NULL,
+        [total] INT NOT NULL DEFAULT 0,
+        [created_at] DATETIME NOT NULL DEFAULT GETDATE(),
+        CONSTRAINT FK_AnalysisBatch_JobPosition FOREIGN KEY ([job_position_id])
+            REFERENCES [dbo].[JobPosition]([id]),
+        CONSTRAINT FK_AnalysisBatch_User FOREIGN KEY ([requested_by])
+            REFERENCES [dbo].[User]([id])
+    );
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_AnalysisBatch_JobPosition' AND object_id = OBJECT_ID(N'[dbo].[AnalysisBatch]'))
+    CREATE INDEX IDX_AnalysisBatch_JobPosition ON [dbo].[AnalysisBatch]([job_position_id], [id]);
+GO
+
+IF COL_LENGTH(N'[dbo].[AnalysisJob]', N'batch_id') IS NULL
+    ALTER TABLE [dbo].[AnalysisJob] ADD [batch_id] INT NULL
+        CONSTRAINT FK_AnalysisJob_AnalysisBatch FOREIGN KEY REFERENCES [dbo].[AnalysisBatch]([id]);
+GO
+
+-- Empreinte de l'offre analysée : un score calculé sur une ancienne version de l'offre est obsolète
+IF COL_LENGTH(N'[dbo].[AnalysisJob]', N'job_hash') IS NULL
+    ALTER TABLE [dbo].[AnalysisJob] ADD [job_hash] NVARCHAR(64) NULL;
+GO
+
+-- Avancement d'un lot : comptage des jobs par statut
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_AnalysisJob_Batch' AND object_id = OBJECT_ID(N'[dbo].[AnalysisJob]'))
+    CREATE INDEX IDX_AnalysisJob_Batch ON [dbo].[AnalysisJob]([batch_id], [status]);
+GO
@@ -0,0 +1,16 @@
+-- Pagination par clé des listes de l'API (app.utils.pagination) : tri sur (created_at, id)
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_Application_CreatedAt' AND object_id = OBJECT_ID(N'[dbo].[Application]'))
+    CREATE INDEX IDX_Application_CreatedAt ON [dbo].[Application]([created_at] DESC, [id] DESC);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_Candidate_CreatedAt' AND object_id = OBJECT_ID(N'[dbo].[Candidate]'))
+    CREATE INDEX IDX_Candidate_CreatedAt ON [dbo].[Candidate]([created_at] DESC, [id] DESC);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_JobPosition_CreatedAt' AND object_id = OBJECT_ID(N'[dbo].[JobPosition]'))
+    CREATE INDEX IDX_JobPosition_CreatedAt ON [dbo].[JobPosition]([created_at] DESC, [id] DESC);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_InterviewRequest_CreatedAt' AND object_id = OBJECT_ID(N'[dbo].[InterviewRequest]'))
+    CREATE INDEX IDX_InterviewRequest_CreatedAt ON [dbo].[InterviewRequest]([created_at] DESC, [id] DESC);
+GO
@@ -0,0 +1,13 @@
+-- Filtres et tris de GET /api/applications (voir app.api.applications.filter_applications)
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_Application_JobPosition' AND object_id = OBJECT_ID(N'[dbo].[Application]'))
+    CREATE INDEX IDX_Application_JobPosition ON [dbo].[Application]([job_position_id], [created_at] DESC, [id] DESC);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_Application_Status' AND object_id = OBJECT_ID(N'[dbo].[Application]'))
+    CREATE INDEX IDX_Application_Status ON [dbo].[Application]([status_id], [created_at] DESC, [id] DESC);
+GO
+
+-- Tri par score et filtres min_score / max_score
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_Application_Score' AND object_id = OBJECT_ID(N'[dbo].[Application]'))
+    CREATE INDEX IDX_Application_Score ON [dbo].[Application]([ai_score] DESC, [id] DESC);
+GO
@@ -0,0 +1,110 @@
+-- Statistiques des candidatures par offre (modèle JobStats), tenues à jour par trigger
+IF OBJECT_ID(N'[dbo].[JobStats]', N'U') IS NULL
+BEGIN
+    CREATE TABLE [dbo].[JobStats](
+        [job_position_id] INT NOT NULL PRIMARY KEY,
+        [total] INT NOT NULL DEFAULT 0,
+        [submitted] INT NOT NULL DEFAULT 0,
+        [under_review] INT NOT NULL DEFAULT 0,
+        [interview] INT NOT NULL DEFAULT 0,
+        [rejected] INT NOT NULL DEFAULT 0,
+        [accepted] INT NOT NULL DEFAULT 0,
+        [scored_count] INT NOT NULL DEFAULT 0,
+        [score_sum] FLOAT NOT NULL DEFAULT 0,
+        [max_score] FLOAT NULL,
+        [last_application_at] DATETIME NULL,
+        CONSTRAINT FK_JobStats_JobPosition FOREIGN KEY ([job_position_id])
+            REFERENCES [dbo].[JobPosition]([id]) ON DELETE CASCADE
+    );
+
+    -- Remplissage initial (équivalent à `flask rebuild-job-stats`)
+    INSERT INTO [dbo].[JobStats]([job_position_id], [total], [submitted], [under_review], [interview],
+                                 [rejected], [accepted], [scored_count], [score_sum], [max_score], [last_application_at])
+    SELECT [job_position_id],
+           COUNT(*),
+           SUM(CASE WHEN [status_id] = 1 THEN 1 ELSE 0 END),
+           SUM(CASE WHEN [status_id] = 2 THEN 1 ELSE 0 END),
+           SUM(CASE WHEN [status_id] = 3 THEN 1 ELSE 0 END),
+           SUM(CASE WHEN [status_id] = 4 THEN 1 ELSE 0 END),
+           SUM(CASE WHEN [status_id] = 5 THEN 1 ELSE 0 END),
+           COUNT([ai_score]),
+           ISNULL(SUM([ai_score]), 0),
+           MAX([ai_score]),
+           MAX([created_at])
+    FROM [dbo].[Application]
+    GROUP BY [job_position_id];
+END
+GO
+
+-- Mise à jour incrémentale : les lignes ajoutées (inserted) comptent +1, les lignes retirées
+-- (deleted) -1, par offre. Le maximum et la date de dernière candidature ne se décrémentent
+-- pas : ils ne sont recalculés que pour les offres dont la valeur maximale a été retirée.
+CREATE OR ALTER TRIGGER [dbo].[TR_Application_JobStats] ON [dbo].[Application]
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF NOT EXISTS (SELECT 1 FROM inserted) AND NOT EXISTS (SELECT 1 FROM deleted)
+        RETURN;
+
+    -- Mises à jour sans effet sur les statistiques (updated_at, analyse, lettre...)
+    IF EXISTS (SELECT 1 FROM inserted) AND EXISTS (SELECT 1 FROM deleted)
+       AND NOT (UPDATE([status_id]) OR UPDATE([ai_score]) OR UPDATE([job_position_id]))
+        RETURN;
+
+    WITH [changes] AS (
+        SELECT [job_position_id], 1 AS [sign], [status_id], [ai_score], [created_at] FROM inserted
+        UNION ALL
+        SELECT [job_position_id], -1, [status_id], [ai_score], [created_at] FROM deleted
+    ), [delta] AS (
+        SELECT [job_position_id],
+               SUM([sign]) AS [total],
+               SUM(CASE WHEN [status_id] = 1 THEN [sign] ELSE 0 END) AS [submitted],
+               SUM(CASE WHEN [status_id] = 2 THEN [sign] ELSE 0 END) AS [under_review],
+               SUM(CASE WHEN [status_id] = 3 THEN [sign] ELSE 0 END) AS [interview],
+               SUM(CASE WHEN [status_id] = 4 THEN [sign] ELSE 0 END) AS [rejected],
+               SUM(CASE WHEN [status_id] = 5 THEN [sign] ELSE 0 END) AS [accepted],
+               SUM(CASE WHEN [ai_score] IS NOT NULL THEN [sign] ELSE 0 END) AS [scored_count],
+               SUM([sign] * ISNULL([ai_score], 0)) AS [score_sum],
+               MAX(CASE WHEN [sign] = 1 THEN [ai_score] END) AS [max_added],
+               MAX(CASE WHEN [sign] = 1 THEN [created_at] END) AS [last_added]
+        FROM [changes]
+        GROUP BY [job_position_id]
+    )
+    -- HOLDLOCK : deux insertions simultanées pour une offre sans statistiques ne créent qu'une ligne
+    MERGE [dbo].[JobStats] WITH (HOLDLOCK) AS [target]
+    USING [delta] AS [source]
+        ON [target].[job_position_id] = [source].[job_position_id]
+    WHEN MATCHED THEN UPDATE SET
+        [total] = [target].[total] + [source].[total],
+        [submitted] = [target].[submitted] + [source].[submitted],
+        [under_review] = [target].[under_review] + [source].[under_review],
+        [interview] = [target].[interview] + [source].[interview],
+        [rejected] = [target].[rejected] + [source].[rejected],
+        [accepted] = [target].[accepted] + [source].[accepted],
+        [scored_count] = [target].[scored_count] + [source].[scored_count],
+        [score_sum] = [target].[score_sum] + [source].[score_sum],
+        [max_score] = CASE WHEN [source].[max_added] > [target].[max_score] OR [target].[max_score] IS NULL
+                           THEN [source].[max_added] ELSE [target].[max_score] END,
+        [last_application_at] = CASE WHEN [source].[last_added] > [target].[last_application_at] OR [target].[last_application_at] IS NULL
+                                     THEN [source].[last_added] ELSE [target].[last_application_at] END
+    WHEN NOT MATCHED THEN
+        INSERT ([job_position_id], [total], [submitted], [under_review], [interview], [rejected], [accepted],
+                [scored_count], [score_sum], [max_score], [last_application_at])
+        VALUES ([source].[job_position_id], [source].[total], [source].[submitted], [source].[under_review],
+                [source].[interview], [source].[rejected], [source].[accepted], [source].[scored_count],
+                [source].[score_sum], [source].[max_added], [source].[last_added]);
+
+    -- Le score maximal ou la candidature la plus récente d'une offre a été retiré : recalcul
+    UPDATE [stats] SET
+        [max_score] = (SELECT MAX([a].[ai_score]) FROM [dbo].[Application] [a]
+                       WHERE [a].[job_position_id] = [stats].[job_position_id]),
+        [last_application_at] = (SELECT MAX([a].[created_at]) FROM [dbo].[Application] [a]
+                                 WHERE [a].[job_position_id] = [stats].[job_position_id])
+    FROM [dbo].[JobStats] [stats]
+    WHERE EXISTS (SELECT 1 FROM deleted [d]
+                  WHERE [d].[job_position_id] = [stats].[job_position_id]
+                    AND ([d].[ai_score] >= [stats].[max_score] OR [d].[created_at] >= [stats].[last_application_at]));
+END
+GO
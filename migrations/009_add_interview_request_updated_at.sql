@@ -0,0 +1,18 @@
+-- Date de dernière modification des demandes d'entretien (ETags de GET /api/interview-requests)
+IF COL_LENGTH(N'[dbo].[InterviewRequest]', N'updated_at') IS NULL
+    ALTER TABLE [dbo].[InterviewRequest] ADD [updated_at] DATETIME NOT NULL
+        CONSTRAINT DF_InterviewRequest_UpdatedAt DEFAULT GETDATE();
+GO
+
+CREATE OR ALTER TRIGGER [dbo].[TR_InterviewRequest_UpdatedAt] ON [dbo].[InterviewRequest]
+AFTER UPDATE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    -- La mise à jour faite par le trigger ne le redéclenche pas (RECURSIVE_TRIGGERS désactivé)
+    UPDATE [ir] SET [updated_at] = GETDATE()
+    FROM [dbo].[InterviewRequest] [ir]
+    JOIN inserted [i] ON [i].[id] = [ir].[id];
+END
+GO
@@ -0,0 +1,15 @@
+-- Version des tables de référence, pour invalider le cache en mémoire de chaque processus
+-- (voir app.utils.reference_data)
+IF OBJECT_ID(N'[dbo].[ReferenceDataVersion]', N'U') IS NULL
+BEGIN
+    CREATE TABLE [dbo].[ReferenceDataVersion](
+        [name] NVARCHAR(50) NOT NULL PRIMARY KEY,
+        [version] INT NOT NULL DEFAULT 1,
+        [updated_at] DATETIME NOT NULL DEFAULT GETDATE()
+    );
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM [dbo].[ReferenceDataVersion] WHERE [name] = N'reference')
+    INSERT INTO [dbo].[ReferenceDataVersion]([name], [version]) VALUES (N'reference', 1);
+GO
@@ -0,0 +1,27 @@
+-- Version des tokens JWT d'un utilisateur (claim "tv", voir app.utils.identity) :
+-- incrémentée quand le rôle, le département ou le mot de passe change, ce qui invalide
+-- les tokens d'accès déjà émis avec les anciens claims
+IF COL_LENGTH(N'[dbo].[User]', N'token_version') IS NULL
+    ALTER TABLE [dbo].[User] ADD [token_version] INT NOT NULL
+        CONSTRAINT DF_User_TokenVersion DEFAULT 1;
+GO
+
+CREATE OR ALTER TRIGGER [dbo].[TR_User_TokenVersion] ON [dbo].[User]
+AFTER UPDATE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF NOT (UPDATE([role_id]) OR UPDATE([department_id]) OR UPDATE([password_hash]))
+        RETURN;
+
+    -- La mise à jour faite par le trigger ne le redéclenche pas (RECURSIVE_TRIGGERS désactivé)
+    UPDATE [u] SET [token_version] = [u].[token_version] + 1
+    FROM [dbo].[User] [u]
+    JOIN inserted [i] ON [i].[id] = [u].[id]
+    JOIN deleted [d] ON [d].[id] = [i].[id]
+    WHERE [i].[role_id] <> [d].[role_id]
+       OR ISNULL([i].[department_id], 0) <> ISNULL([d].[department_id], 0)
+       OR [i].[password_hash] <> [d].[password_hash];
+END
+GO
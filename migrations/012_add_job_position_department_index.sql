@@ -0,0 +1,5 @@
+-- Périmètre des managers : offres de leur département (voir app.utils.scoping), puis leurs
+-- candidatures par IDX_Application_JobPosition
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_JobPosition_Department' AND object_id = OBJECT_ID(N'[dbo].[JobPosition]'))
+    CREATE INDEX IDX_JobPosition_Department ON [dbo].[JobPosition]([department_id]) INCLUDE ([is_active]);
+GO
@@ -0,0 +1,61 @@
+-- Index des prédicats fréquents que ne couvrent pas 006, 007 et 012
+-- (plans avant / après : tools/capture_query_plans.py)
+--
+-- Les index filtrés exigent ANSI_NULLS et QUOTED_IDENTIFIER à ON dans les sessions qui
+-- modifient la table : l'application les active à la connexion (app/__init__.py).
+
+-- Listes par offre (filtre job_id, périmètre des managers) : colonnes des listes incluses,
+-- la candidature n'est plus relue dans l'index cluster pour chaque ligne (index de 007 recréé)
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_Application_JobPosition' AND object_id = OBJECT_ID(N'[dbo].[Application]'))
+    CREATE INDEX IDX_Application_JobPosition ON [dbo].[Application]([job_position_id], [created_at] DESC, [id] DESC)
+        INCLUDE ([candidate_id], [status_id], [ai_score], [cv_filename]);
+ELSE IF NOT EXISTS (
+        SELECT 1 FROM sys.index_columns [ic]
+        JOIN sys.indexes [i] ON [i].[object_id] = [ic].[object_id] AND [i].[index_id] = [ic].[index_id]
+        WHERE [i].[name] = 'IDX_Application_JobPosition' AND [i].[object_id] = OBJECT_ID(N'[dbo].[Application]')
+          AND [ic].[is_included_column] = 1 AND COL_NAME([ic].[object_id], [ic].[column_id]) = 'status_id'
+    )
+    CREATE INDEX IDX_Application_JobPosition ON [dbo].[Application]([job_position_id], [created_at] DESC, [id] DESC)
+        INCLUDE ([candidate_id], [status_id], [ai_score], [cv_filename])
+        WITH (DROP_EXISTING = ON);
+GO
+
+-- Comptages par offre et par statut (tableau de bord manager, JobStats, mise à jour en masse)
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_Application_JobPosition_Status' AND object_id = OBJECT_ID(N'[dbo].[Application]'))
+    CREATE INDEX IDX_Application_JobPosition_Status ON [dbo].[Application]([job_position_id], [status_id]) INCLUDE ([ai_score]);
+GO
+
+-- Candidatures d'un candidat (GET /api/candidates/<id>) et jointures Candidate -> Application
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_Application_Candidate' AND object_id = OBJECT_ID(N'[dbo].[Application]'))
+    CREATE INDEX IDX_Application_Candidate ON [dbo].[Application]([candidate_id]) INCLUDE ([job_position_id], [status_id]);
+GO
+
+-- Candidatures sans score d'une offre (analyse groupée, voir applications_to_analyze) :
+-- index filtré, limité aux lignes encore à analyser
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_Application_Unscored' AND object_id = OBJECT_ID(N'[dbo].[Application]'))
+    CREATE INDEX IDX_Application_Unscored ON [dbo].[Application]([job_position_id], [id])
+        INCLUDE ([cv_filename])
+        WHERE [ai_score] IS NULL;
+GO
+
+-- Recherche du candidat par email au dépôt d'une candidature
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_Candidate_Email' AND object_id = OBJECT_ID(N'[dbo].[Candidate]'))
+    CREATE INDEX IDX_Candidate_Email ON [dbo].[Candidate]([email]);
+GO
+
+-- Demandes d'entretien d'un manager, de la plus récente à la plus ancienne
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_InterviewRequest_Manager' AND object_id = OBJECT_ID(N'[dbo].[InterviewRequest]'))
+    CREATE INDEX IDX_InterviewRequest_Manager ON [dbo].[InterviewRequest]([manager_id], [created_at] DESC, [id] DESC)
+        INCLUDE ([application_id], [status]);
+GO
+
+-- Demande existante pour une candidature, jointures InterviewRequest -> Application
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_InterviewRequest_Application' AND object_id = OBJECT_ID(N'[dbo].[InterviewRequest]'))
+    CREATE INDEX IDX_InterviewRequest_Application ON [dbo].[InterviewRequest]([application_id]) INCLUDE ([status]);
+GO
+
+-- Utilisateurs d'un département (managers)
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_User_Department' AND object_id = OBJECT_ID(N'[dbo].[User]'))
+    CREATE INDEX IDX_User_Department ON [dbo].[User]([department_id]) INCLUDE ([role_id])
+        WHERE [department_id] IS NOT NULL;
+GO
@@ -0,0 +1,78 @@
+"""
+Application de test sur une base SQLite temporaire, sans SQL Server
+
+API REST et pages du site (Flask-Login, filtres des templates) sont enregistrées comme
+dans create_app.
+
+Données de référence : rôles RH et MANAGER, deux départements, les cinq statuts de
+candidature et un utilisateur RH (rh / secret).
+"""
+import datetime
+
+import pytest
+from flask import Flask
+from flask_login import LoginManager
+from sqlalchemy import event
+
+from app.api import api_bp
+from app.api.config import configure_api
+from app.auth import bp as auth_bp
+from app.manager import bp as manager_bp
+from app.routes import main, candidate, hr, hr_interview
+from app.utils import template_filters
+from app.models.auth_models import Role, User
+from app.models.models import db, ApplicationStatusModel, Department
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask('app', instance_path=str(tmp_path))
+    app.config.update(
+        TESTING=True,
+        SECRET_KEY='test',
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'test.db'}",
+        UPLOAD_FOLDER=str(tmp_path / 'uploads'),
+        CV_ARTIFACTS_FOLDER=str(tmp_path / 'cv_artifacts'),
+    )
+    db.init_app(app)
+    template_filters.init_app(app)
+
+    login_manager = LoginManager()
+    login_manager.init_app(app)
+    login_manager.login_view = 'auth.login'
+
+    @login_manager.user_loader
+    def load_user(user_id):
+        return db.session.get(User, int(user_id))
+
+    configure_api(app)
+    app.register_blueprint(main.bp)
+    app.register_blueprint(candidate.bp)
+    app.register_blueprint(hr.bp)
+    app.register_blueprint(hr_interview.bp)
+    app.register_blueprint(auth_bp, url_prefix='/auth')
+    app.register_blueprint(manager_bp, url_prefix='/manager')
+    app.register_blueprint(api_bp)
+
+    with app.app_context():
+        # GETDATE() des valeurs par défaut (created_at, updated_at) n'existe pas sous SQLite
+        @event.listens_for(db.engine, 'connect')
+        def on_connect(dbapi_connection, connection_record):
+            dbapi_connection.create_function(
+                'getdate', 0, lambda: datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f'))
+
+        db.create_all()
+        db.session.add_all([Role(id=1, name='RH'), Role(id=2, name='MANAGER')])
+        db.session.add_all([Department(id=1, name='Informatique'), Department(id=2, name='Marketing')])
+        for status_id, name in enumerate(['Soumise', 'Analyse', 'Entretien', 'Rejetée', 'Acceptée'], 1):
+            db.session.add(ApplicationStatusModel(id=status_id, name=name))
+        hr_user = User(username='rh', email='rh@example.com', role_id=1)
+        hr_user.set_password('secret')
+        db.session.add(hr_user)
+        db.session.commit()
+
+    # Hors du contexte : chaque requête du client de test a son propre contexte (g, session)
+    yield app
+
+    with app.app_context():
+        db.drop_all()
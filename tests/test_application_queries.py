@@ -0,0 +1,75 @@
+"""
+Nombre de requêtes SQL des listes de candidatures de l'API
+
+GET /api/applications et GET /api/applications/department/<id> chargent les candidats,
+offres et départements avec les candidatures : le nombre de requêtes d'un appel ne doit pas
+dépendre du nombre de candidatures renvoyées (pas de N+1).
+
+Base SQLite temporaire, sans SQL Server :
+    python -m pytest tests
+"""
+import pytest
+from sqlalchemy import event
+
+from app.models.models import db, Application, Candidate, JobPosition
+
+N = 4
+
+
+def add_applications(count):
+    """Ajoute `count` candidatures, chacune avec son candidat et sa propre offre"""
+    start = db.session.query(db.func.count(Application.id)).scalar()
+    for i in range(start, start + count):
+        candidate = Candidate(first_name=f'Prénom{i}', last_name='Nom', email=f'candidat{i}@example.com')
+        job = JobPosition(title=f'Offre {i}', description='Description', requirements='Prérequis',
+                          department_id=1 + i % 2)
+        db.session.add_all([candidate, job])
+        db.session.flush()
+        db.session.add(Application(candidate_id=candidate.id, job_position_id=job.id,
+                                   cv_filename=f'cv{i}.pdf', status_id=1 + i % 5,
+                                   ai_score=float(i) if i % 3 else None))
+    db.session.commit()
+
+
+def count_queries(client, url, headers):
+    """Nombre d'instructions SQL exécutées par un appel de l'API, et sa réponse"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with client.application.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get(url, headers=headers)
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return len(statements), response.get_json()
+
+
+@pytest.mark.parametrize('url, per_department', [
+    ('/api/applications', False),
+    ('/api/applications/department/1', True),
+])
+def test_application_list_query_count_does_not_grow(app, url, per_department):
+    client = app.test_client()
+    response = client.post('/api/auth/login', json={'username': 'rh', 'password': 'secret'})
+    headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+    with app.app_context():
+        add_applications(N)
+    # Premier appel : remplit les caches du processus (données de référence, version du token)
+    client.get(url, headers=headers)
+    small_count, small = count_queries(client, url, headers)
+
+    with app.app_context():
+        add_applications(2 * N)
+    large_count, large = count_queries(client, url, headers)
+
+    expected = N // 2 if per_department else N
+    assert len(small['items']) == expected
+    assert len(large['items']) == 3 * expected
+    assert all(item['candidate'] and item['job'] for item in large['items'])
+    assert large_count == small_count, (small_count, large_count)
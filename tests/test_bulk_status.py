@@ -0,0 +1,82 @@
+"""
+Mise à jour en masse des statuts de candidature (PUT /api/applications/status)
+
+Le périmètre de l'utilisateur, la validation des ids et du filtre et l'exclusion des
+candidatures qui ont déjà le statut demandé sont appliqués par l'UPDATE lui-même.
+"""
+import pytest
+
+from app.models.auth_models import User
+from app.models.models import db, Application, ApplicationStatus, Candidate, JobPosition
+
+URL = '/api/applications/status'
+
+
+@pytest.fixture
+def applications(app):
+    """
+    Quatre candidatures : 1 et 2 sur une offre du département 1, 3 et 4 sur une offre du
+    département 2 ; la candidature 2 est déjà rejetée
+    """
+    with app.app_context():
+        manager = User(username='manager', email='manager@example.com', role_id=2, department_id=1)
+        manager.set_password('secret')
+        candidate = Candidate(first_name='Prénom', last_name='Nom', email='candidat@example.com')
+        jobs = [JobPosition(title=f'Offre {department_id}', description='Description',
+                            requirements='Prérequis', department_id=department_id)
+                for department_id in (1, 2)]
+        db.session.add_all([manager, candidate, *jobs])
+        db.session.flush()
+        statuses = [ApplicationStatus.SUBMITTED, ApplicationStatus.REJECTED,
+                    ApplicationStatus.SUBMITTED, ApplicationStatus.SUBMITTED]
+        for i, status_id in enumerate(statuses):
+            db.session.add(Application(id=i + 1, candidate_id=candidate.id,
+                                       job_position_id=jobs[i // 2].id,
+                                       cv_filename=f'cv{i}.pdf', status_id=status_id))
+        db.session.commit()
+
+
+def login(client, username):
+    response = client.post('/api/auth/login', json={'username': username, 'password': 'secret'})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+def statuses(app):
+    with app.app_context():
+        return dict(db.session.query(Application.id, Application.status_id).all())
+
+
+def test_ids_outside_scope_are_not_updated(app, applications):
+    client = app.test_client()
+    response = client.put(URL, headers=login(client, 'manager'),
+                          json={'status': 'rejected', 'ids': [1, 3, 4]})
+
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert response.get_json()['updated_ids'] == [1]
+    assert statuses(app) == {1: ApplicationStatus.REJECTED, 2: ApplicationStatus.REJECTED,
+                             3: ApplicationStatus.SUBMITTED, 4: ApplicationStatus.SUBMITTED}
+
+
+def test_applications_already_in_status_are_not_returned(app, applications):
+    client = app.test_client()
+    response = client.put(URL, headers=login(client, 'rh'),
+                          json={'status': ApplicationStatus.REJECTED, 'filter': {'job_id': 1}})
+
+    assert response.status_code == 200, response.get_data(as_text=True)
+    data = response.get_json()
+    assert data['updated_ids'] == [1]
+    assert data['count'] == 1
+
+
+@pytest.mark.parametrize('body', [
+    {'status': 'rejected', 'filter': {}},
+    {'status': 'rejected', 'filter': {'job_id': ''}},
+    {'status': 'rejected', 'ids': list(range(1, 1002))},
+])
+def test_invalid_selection_is_rejected(app, applications, body):
+    client = app.test_client()
+    response = client.put(URL, headers=login(client, 'rh'), json=body)
+
+    assert response.status_code == 400, response.get_data(as_text=True)
+    assert all(status_id != ApplicationStatus.REJECTED or application_id == 2
+               for application_id, status_id in statuses(app).items())
@@ -0,0 +1,68 @@
+"""
+Nombre de requêtes SQL des pages RH
+
+La liste /hr/applications affiche le candidat et l'offre de chaque candidature par les
+filtres get_candidate et get_job : les identifiants de la page sont chargés en une requête
+par modèle (app.utils.batch_loader), quel que soit le nombre de lignes affichées.
+"""
+from sqlalchemy import event
+
+from app.models.auth_models import User
+from app.models.models import db, Application, Candidate, JobPosition
+
+N = 12
+
+
+def add_applications(count):
+    """Ajoute `count` candidatures, chacune avec son candidat et sa propre offre"""
+    start = db.session.query(db.func.count(Application.id)).scalar()
+    for i in range(start, start + count):
+        candidate = Candidate(first_name=f'Prénom{i}', last_name='Nom', email=f'candidat{i}@example.com')
+        job = JobPosition(title=f'Offre {i}', description='Description', requirements='Prérequis',
+                          department_id=1 + i % 2)
+        db.session.add_all([candidate, job])
+        db.session.flush()
+        db.session.add(Application(candidate_id=candidate.id, job_position_id=job.id,
+                                   cv_filename=f'cv{i}.pdf', status_id=1 + i % 5))
+    db.session.commit()
+
+
+def count_queries(client, url):
+    """Nombre d'instructions SQL exécutées pour afficher une page, et son HTML"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with client.application.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return len(statements), response.get_data(as_text=True)
+
+
+def test_hr_application_list_query_count_does_not_grow(app):
+    client = app.test_client()
+    with app.app_context():
+        hr_id = db.session.query(User.id).filter_by(username='rh').scalar()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(hr_id)
+        session['_fresh'] = True
+
+    with app.app_context():
+        add_applications(3)
+    # Premier appel : remplit les caches du processus (données de référence)
+    client.get('/hr/applications')
+    small_count, small = count_queries(client, '/hr/applications')
+
+    with app.app_context():
+        add_applications(N - 3)
+    large_count, large = count_queries(client, '/hr/applications')
+
+    assert small.count('Prénom') == 3
+    assert all(f'Prénom{i}' in large and f'Offre {i}' in large for i in range(N))
+    assert large_count == small_count, (small_count, large_count)
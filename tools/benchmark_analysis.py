@@ -0,0 +1,118 @@
+"""
+Mesure des temps de l'analyse de CV, étape par étape, sur un corpus de PDF
+
+Étapes mesurées (voir app.utils.ai_analysis.add_timing) :
+    triage     lecture de la couche texte et tri texte / vision
+    rasterize  rendu des pages (pdf2image / Poppler)
+    encode     encodage JPEG dans le budget d'octets, puis base64
+    http       appel à l'API (envoi de la requête et attente de la réponse)
+    parse      lecture de la réponse et extraction du score
+
+Sans accès réseau, utiliser --fake (serveur local de substitution démarré dans le
+processus) ou OPENAI_CASSETTE_MODE=replay avec des cassettes enregistrées au préalable.
+
+Utilisation :
+    python tools/benchmark_analysis.py chemin/vers/cvs --fake --repeat 3
+    python tools/benchmark_analysis.py chemin/vers/cvs --route vision --json resultats.json
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STAGES = ('triage', 'rasterize', 'encode', 'http', 'parse')
+
+DEFAULT_DESCRIPTION = "Développeur Python confirmé pour une application web de recrutement (Flask, SQL Server)."
+DEFAULT_REQUIREMENTS = "3 ans d'expérience en Python, Flask, SQLAlchemy, SQL Server ; notions de React appréciées."
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark du pipeline d'analyse de CV")
+    parser.add_argument('corpus', help="Dossier contenant les CV (PDF) ou fichier PDF")
+    parser.add_argument('--repeat', type=int, default=1, help="Nombre d'analyses par CV")
+    parser.add_argument('--route', choices=('auto', 'vision'), default='auto',
+                        help="auto : tri texte / vision habituel ; vision : forcer le rendu des pages")
+    parser.add_argument('--description', default=DEFAULT_DESCRIPTION, help="Description du poste")
+    parser.add_argument('--requirements', default=DEFAULT_REQUIREMENTS, help="Exigences du poste")
+    parser.add_argument('--fake', action='store_true', help="Utiliser le serveur OpenAI local de substitution")
+    parser.add_argument('--fake-latency', type=float, default=0.5, help="Latence du serveur de substitution, en secondes")
+    parser.add_argument('--json', dest='json_path', help="Enregistrer les mesures détaillées dans ce fichier")
+    return parser.parse_args(argv)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(options):
+    if options.fake:
+        from fake_openai_server import parse_args as fake_args, start_in_thread
+        server, url = start_in_thread(fake_args(['--port', '0', '--latency', str(options.fake_latency),
+                                                 '--jitter', '0']))
+        os.environ['OPENAI_BASE_URL'] = url
+        os.environ.setdefault('OPENAI_API_KEY', 'fake')
+        print(f"Serveur de substitution : {url}")
+
+    from app.utils.ai_analysis import analyze_cv, is_error_result, AnalysisRoute
+
+    if os.path.isdir(options.corpus):
+        pdf_paths = sorted(glob.glob(os.path.join(options.corpus, '*.pdf')))
+    else:
+        pdf_paths = [options.corpus]
+    if not pdf_paths:
+        print(f"Aucun PDF trouvé dans {options.corpus}")
+        return []
+
+    # Sans artefacts, analyze_cv fait le tri lui-même ; une route imposée force le rendu
+    artifacts = {'route': AnalysisRoute.VISION} if options.route == 'vision' else None
+
+    measures = []
+    print(f"{'CV':40} {'route':14} {'pages':>5} {'Ko':>7} " + " ".join(f"{stage:>9}" for stage in STAGES) + f" {'total':>9}")
+    for pdf_path in pdf_paths:
+        for _ in range(options.repeat):
+            stats = {}
+            started = time.perf_counter()
+            analysis, score = analyze_cv(pdf_path, options.description, options.requirements,
+                                         stats=stats, artifacts=artifacts)
+            total = time.perf_counter() - started
+
+            timings = stats.get('timings', {})
+            measure = {
+                'file': os.path.basename(pdf_path),
+                'route': stats.get('route'),
+                'pages_sent': stats.get('pages_sent', 0),
+                'payload_bytes': stats.get('payload_bytes', 0),
+                'score': score,
+                'error': analysis if is_error_result(analysis, score) else None,
+                'timings': {stage: timings.get(stage, 0.0) for stage in STAGES},
+                'total': total
+            }
+            measures.append(measure)
+            print(f"{measure['file'][:40]:40} {str(measure['route']):14} {measure['pages_sent']:>5} "
+                  f"{measure['payload_bytes'] / 1024:>7.0f} "
+                  + " ".join(f"{measure['timings'][stage]:>9.3f}" for stage in STAGES)
+                  + f" {total:>9.3f}" + (" ERREUR" if measure['error'] else ""))
+
+    print(f"\n{len(measures)} analyse(s), {sum(1 for m in measures if m['error'])} en erreur")
+    print(f"{'étape':10} {'moyenne':>9} {'p50':>9} {'p95':>9} {'cumul':>9}")
+    for stage in STAGES + ('total',):
+        values = [m['total'] if stage == 'total' else m['timings'][stage] for m in measures]
+        print(f"{stage:10} {statistics.mean(values):>9.3f} {percentile(values, 0.5):>9.3f} "
+              f"{percentile(values, 0.95):>9.3f} {sum(values):>9.3f}")
+
+    if options.json_path:
+        with open(options.json_path, 'w', encoding='utf-8') as file:
+            json.dump(measures, file, ensure_ascii=False, indent=2)
+        print(f"Mesures enregistrées dans {options.json_path}")
+    return measures
+
+
+if __name__ == '__main__':
+    run(parse_args())
@@ -0,0 +1,376 @@
+"""
+Plans d'exécution SQL Server des requêtes fréquentes, avant et après un jeu d'index
+
+Les requêtes mesurées reprennent les prédicats des chemins les plus sollicités (listes par
+offre et par département, tableau de bord manager, analyse groupée, dépôt de candidature,
+demandes d'entretien, mise à jour en masse des statuts). Pour chacune, le script enregistre
+le plan estimé (SHOWPLAN_XML, fichier .sqlplan lisible dans SSMS), son coût, les opérateurs
+d'accès aux tables (Index Seek, Scan, Key Lookup...) et la durée médiane d'exécution.
+
+À utiliser sur une base de test : --generate y insère un jeu de données repérable
+(offres « Plans ... », candidats plans-...@example.invalid), retiré par --cleanup.
+
+Utilisation :
+    python tools/capture_query_plans.py --generate 200000
+    python tools/capture_query_plans.py --label before
+    flask db-upgrade
+    python tools/capture_query_plans.py --label after
+    python tools/capture_query_plans.py --compare before after
+    python tools/capture_query_plans.py --cleanup
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SHOWPLAN_NS = '{http://schemas.microsoft.com/sqlserver/2004/07/showplan}'
+DEFAULT_OUTPUT = os.path.join('instance', 'query_plans')
+
+# Repères du jeu de données généré
+JOB_PREFIX = 'Plans '
+EMAIL_DOMAIN = '@example.invalid'
+MANAGER_PREFIX = 'plans_manager_'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Plans d'exécution des requêtes fréquentes (SQL Server)")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument('--generate', type=int, metavar='N', help="Générer N candidatures de test")
+    action.add_argument('--cleanup', action='store_true', help="Supprimer le jeu de données généré")
+    action.add_argument('--label', help="Capturer les plans sous ce nom (ex. before, after)")
+    action.add_argument('--compare', nargs=2, metavar=('AVANT', 'APRES'), help="Comparer deux captures")
+    parser.add_argument('--applications-per-job', type=int, default=200,
+                        help="Candidatures par offre générée (--generate)")
+    parser.add_argument('--repeat', type=int, default=5, help="Exécutions par requête pour la durée médiane")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Dossier des captures")
+    return parser.parse_args(argv)
+
+
+# Jeu de données ---------------------------------------------------------------------------
+
+# Suite d'entiers 1..@n, sans table auxiliaire
+_NUMBERS = """
+WITH [numbers] AS (
+    SELECT TOP (@n) ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) AS [n]
+    FROM sys.all_objects [a] CROSS JOIN sys.all_objects [b] CROSS JOIN sys.all_objects [c]
+)
+"""
+
+_GENERATE = [
+    # Offres, réparties entre les départements existants
+    """
+    DECLARE @n INT = :jobs;
+    DECLARE @departments INT = (SELECT COUNT(*) FROM [dbo].[Department]);
+    """ + _NUMBERS + """
+    INSERT INTO [dbo].[JobPosition]([title], [description], [requirements], [is_active], [department_id], [created_at])
+    SELECT :job_prefix + CAST([numbers].[n] AS NVARCHAR(10)), N'Offre générée', N'Prérequis générés', 1,
+           [d].[id], DATEADD(MINUTE, -[numbers].[n], GETDATE())
+    FROM [numbers]
+    JOIN (SELECT [id], ROW_NUMBER() OVER (ORDER BY [id]) - 1 AS [k] FROM [dbo].[Department]) [d]
+        ON [d].[k] = [numbers].[n] % @departments;
+    """,
+    # Candidats
+    """
+    DECLARE @n INT = :applications;
+    """ + _NUMBERS + """
+    INSERT INTO [dbo].[Candidate]([first_name], [last_name], [email], [created_at])
+    SELECT N'Prénom', N'Nom ' + CAST([n] AS NVARCHAR(10)),
+           'plans-' + CAST([n] AS VARCHAR(10)) + :email_domain, DATEADD(MINUTE, -[n], GETDATE())
+    FROM [numbers];
+    """,
+    # Une candidature par candidat : statuts variés, un tiers sans score
+    """
+    WITH [jobs] AS (
+        SELECT [id], ROW_NUMBER() OVER (ORDER BY [id]) - 1 AS [k], COUNT(*) OVER () AS [total]
+        FROM [dbo].[JobPosition] WHERE [title] LIKE :job_pattern
+    ), [candidates] AS (
+        SELECT [id], ROW_NUMBER() OVER (ORDER BY [id]) AS [n]
+        FROM [dbo].[Candidate] WHERE [email] LIKE 'plans-%' + :email_domain
+    )
+    INSERT INTO [dbo].[Application]([candidate_id], [job_position_id], [cv_filename], [status_id],
+                                    [ai_score], [created_at])
+    SELECT [c].[id], [j].[id], 'plans.pdf', 1 + [c].[n] % 5,
+           CASE WHEN [c].[n] % 3 = 0 THEN NULL ELSE [c].[n] % 100 END,
+           DATEADD(MINUTE, -[c].[n], GETDATE())
+    FROM [candidates] [c]
+    JOIN [jobs] [j] ON [j].[k] = [c].[n] % [j].[total];
+    """,
+    # Un manager par département (mot de passe inutilisable)
+    """
+    INSERT INTO [dbo].[User]([username], [password_hash], [email], [role_id], [department_id], [created_at])
+    SELECT :manager_prefix + CAST([d].[id] AS NVARCHAR(10)), '!',
+           :manager_prefix + CAST([d].[id] AS NVARCHAR(10)) + :email_domain, 2, [d].[id], GETDATE()
+    FROM [dbo].[Department] [d]
+    WHERE NOT EXISTS (SELECT 1 FROM [dbo].[User] [u]
+                      WHERE [u].[username] = :manager_prefix + CAST([d].[id] AS NVARCHAR(10)));
+    """,
+    # Une demande d'entretien pour une candidature sur dix, par le manager du département
+    """
+    INSERT INTO [dbo].[InterviewRequest]([application_id], [manager_id], [requested_date], [status], [created_at])
+    SELECT [a].[id], [u].[id], DATEADD(DAY, 7, [a].[created_at]),
+           CASE [a].[id] % 4 WHEN 0 THEN 'PENDING' WHEN 1 THEN 'APPROVED' WHEN 2 THEN 'REFUSED' ELSE 'COMPLETED' END,
+           [a].[created_at]
+    FROM [dbo].[Application] [a]
+    JOIN [dbo].[JobPosition] [j] ON [j].[id] = [a].[job_position_id]
+    JOIN [dbo].[User] [u] ON [u].[username] = :manager_prefix + CAST([j].[department_id] AS NVARCHAR(10))
+    WHERE [j].[title] LIKE :job_pattern AND [a].[id] % 10 = 0;
+    """
+]
+
+_CLEANUP = [
+    """
+    DELETE [ir] FROM [dbo].[InterviewRequest] [ir]
+    JOIN [dbo].[Application] [a] ON [a].[id] = [ir].[application_id]
+    JOIN [dbo].[JobPosition] [j] ON [j].[id] = [a].[job_position_id]
+    WHERE [j].[title] LIKE :job_pattern;
+    """,
+    """
+    DELETE [aj] FROM [dbo].[AnalysisJob] [aj]
+    JOIN [dbo].[Application] [a] ON [a].[id] = [aj].[application_id]
+    JOIN [dbo].[JobPosition] [j] ON [j].[id] = [a].[job_position_id]
+    WHERE [j].[title] LIKE :job_pattern;
+    """,
+    """
+    DELETE [a] FROM [dbo].[Application] [a]
+    JOIN [dbo].[JobPosition] [j] ON [j].[id] = [a].[job_position_id]
+    WHERE [j].[title] LIKE :job_pattern;
+    """,
+    "DELETE FROM [dbo].[JobPosition] WHERE [title] LIKE :job_pattern;",
+    "DELETE FROM [dbo].[Candidate] WHERE [email] LIKE 'plans-%' + :email_domain;",
+    "DELETE FROM [dbo].[User] WHERE [username] LIKE :manager_pattern;"
+]
+
+_STATISTICS_TABLES = ('Application', 'Candidate', 'JobPosition', 'InterviewRequest', 'User')
+
+
+def _like_prefix(prefix):
+    """Motif LIKE des valeurs commençant par prefix (_, % et [ pris littéralement)"""
+    for character in '[%_':
+        prefix = prefix.replace(character, f'[{character}]')
+    return prefix + '%'
+
+
+def _dataset_params(**extra):
+    return dict(job_prefix=JOB_PREFIX, email_domain=EMAIL_DOMAIN, manager_prefix=MANAGER_PREFIX,
+                job_pattern=_like_prefix(JOB_PREFIX), manager_pattern=_like_prefix(MANAGER_PREFIX), **extra)
+
+
+def generate(db, applications, applications_per_job):
+    from sqlalchemy import text
+
+    jobs = max(1, applications // applications_per_job)
+    params = _dataset_params(applications=applications, jobs=jobs)
+    started = time.perf_counter()
+    with db.engine.begin() as connection:
+        if not connection.execute(text("SELECT COUNT(*) FROM [dbo].[Department]")).scalar():
+            raise SystemExit("Aucun département : créer les départements avant de générer les données")
+        for statement in _GENERATE:
+            connection.execute(text(statement), params)
+    _update_statistics(db)
+    print(f"{jobs} offre(s) et {applications} candidature(s) générées en {time.perf_counter() - started:.1f} s")
+
+
+def cleanup(db):
+    from sqlalchemy import text
+
+    with db.engine.begin() as connection:
+        for statement in _CLEANUP:
+            connection.execute(text(statement), _dataset_params())
+    _update_statistics(db)
+    print("Jeu de données généré supprimé")
+
+
+def _update_statistics(db):
+    # Statistiques à jour : les plans estimés ne dépendent pas de la date du dernier recalcul automatique
+    with db.engine.begin() as connection:
+        for table in _STATISTICS_TABLES:
+            connection.exec_driver_sql(f"UPDATE STATISTICS [dbo].[{table}] WITH FULLSCAN")
+
+
+# Requêtes mesurées ------------------------------------------------------------------------
+
+def _sample(db):
+    """Valeurs des paramètres : l'offre, le département, le manager... les plus chargés"""
+    from sqlalchemy import func
+    from app.models.models import Application, Candidate, JobPosition
+    from app.models.auth_models import InterviewRequest
+
+    job_id, = db.session.query(Application.job_position_id) \
+        .group_by(Application.job_position_id).order_by(func.count().desc()).first()
+    department_id = db.session.query(JobPosition.department_id).filter(JobPosition.id == job_id).scalar()
+    manager_id = db.session.query(InterviewRequest.manager_id) \
+        .group_by(InterviewRequest.manager_id).order_by(func.count().desc()).limit(1).scalar()
+    application_id, candidate_id = db.session.query(Application.id, Application.candidate_id) \
+        .filter(Application.job_position_id == job_id).order_by(Application.id.desc()).first()
+    email = db.session.query(Candidate.email).filter(Candidate.id == candidate_id).scalar()
+    return {
+        'job_id': job_id,
+        'department_id': department_id,
+        'manager_id': manager_id or 0,
+        'application_id': application_id,
+        'candidate_id': candidate_id,
+        'email': email
+    }
+
+
+def build_queries(db, sample):
+    """Requêtes (nom -> requête SQLAlchemy), écrites comme dans l'application"""
+    from sqlalchemy import func
+    from app.models.models import Application, Candidate, JobPosition
+    from app.models.auth_models import InterviewRequest, User
+    from app.utils.analysis_queue import applications_to_analyze
+
+    list_columns = (Application.id, Application.candidate_id, Application.job_position_id,
+                    Application.status_id, Application.cv_filename, Application.ai_score, Application.created_at)
+    newest = (Application.created_at.desc(), Application.id.desc())
+    department_jobs = db.select(JobPosition.id).where(JobPosition.department_id == sample['department_id'])
+
+    return {
+        # GET /api/applications?job_id=...
+        'applications_by_job': db.select(*list_columns)
+            .where(Application.job_position_id == sample['job_id']).order_by(*newest).limit(50),
+        # GET /api/applications d'un manager (app.utils.scoping.scope_applications)
+        'applications_by_department': db.select(*list_columns)
+            .join(JobPosition, JobPosition.id == Application.job_position_id)
+            .where(JobPosition.department_id == sample['department_id']).order_by(*newest).limit(50),
+        # Tableau de bord manager : candidatures par offre et par statut
+        'dashboard_counts': db.select(Application.job_position_id, Application.status_id, func.count())
+            .where(Application.job_position_id.in_(department_jobs))
+            .group_by(Application.job_position_id, Application.status_id),
+        # Analyse groupée : requête réelle d'applications_to_analyze (sans score, message
+        # d'erreur ou empreinte de l'offre obsolète, hors analyses en cours)
+        'applications_to_analyze': applications_to_analyze(db.session.get(JobPosition, sample['job_id'])).statement,
+        # PUT /api/applications/status avec filtre (prédicat de l'UPDATE)
+        'bulk_status_filter': db.select(Application.id)
+            .where(Application.job_position_id == sample['job_id'], Application.status_id.in_([1, 2]),
+                   Application.ai_score <= 40),
+        # POST /api/applications : candidat existant
+        'candidate_by_email': db.select(Candidate.id).where(Candidate.email == sample['email']),
+        # GET /api/candidates/<id> : ses candidatures
+        'applications_by_candidate': db.select(*list_columns)
+            .where(Application.candidate_id == sample['candidate_id']),
+        # Demandes d'entretien d'un manager (scope_interview_requests)
+        'interview_requests_by_manager': db.select(InterviewRequest.id, InterviewRequest.application_id,
+                                                   InterviewRequest.status, InterviewRequest.created_at)
+            .where(InterviewRequest.manager_id == sample['manager_id'])
+            .order_by(InterviewRequest.created_at.desc(), InterviewRequest.id.desc()).limit(50),
+        # POST /api/interview-requests : demande existante pour la candidature
+        'interview_request_by_application': db.select(InterviewRequest.id, InterviewRequest.status)
+            .where(InterviewRequest.application_id == sample['application_id']).limit(1),
+        # Managers d'un département
+        'users_by_department': db.select(User.id, User.role_id)
+            .where(User.department_id == sample['department_id'])
+    }
+
+
+# Plans --------------------------------------------------------------------------------------
+
+def summarize_plan(plan_xml):
+    """Coût estimé, opérateurs d'accès aux tables et index manquants signalés d'un plan XML"""
+    root = ET.fromstring(plan_xml)
+    statement = root.find(f'.//{SHOWPLAN_NS}StmtSimple')
+    operators = []
+    for relop in root.iter(f'{SHOWPLAN_NS}RelOp'):
+        for child in relop:
+            target = child.find(f'{SHOWPLAN_NS}Object')
+            if target is None:
+                continue
+            operator = 'Key Lookup' if child.get('Lookup') in ('1', 'true') else relop.get('PhysicalOp')
+            name = (target.get('Index') or target.get('Table') or '').strip('[]')
+            operators.append(f"{operator} {name}")
+            break
+    return {
+        'cost': float(statement.get('StatementSubTreeCost', 0)) if statement is not None else None,
+        'estimated_rows': float(statement.get('StatementEstRows', 0)) if statement is not None else None,
+        'operators': operators,
+        'missing_indexes': len(list(root.iter(f'{SHOWPLAN_NS}MissingIndexGroup')))
+    }
+
+
+def capture(db, label, output, repeat):
+    """Enregistre plan, résumé et durée médiane de chaque requête sous output/label"""
+    sample = _sample(db)
+    queries = build_queries(db, sample)
+    directory = os.path.join(output, label)
+    os.makedirs(directory, exist_ok=True)
+
+    connection = db.engine.raw_connection()
+    results = {'label': label, 'sample': sample, 'queries': {}}
+    try:
+        cursor = connection.cursor()
+        for name, query in queries.items():
+            # Valeurs littérales : SHOWPLAN_XML ne s'applique pas aux requêtes paramétrées par le driver
+            sql = str(query.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+
+            cursor.execute("SET SHOWPLAN_XML ON")
+            plan_xml = cursor.execute(sql).fetchone()[0]
+            cursor.execute("SET SHOWPLAN_XML OFF")
+            with open(os.path.join(directory, f"{name}.sqlplan"), 'w', encoding='utf-8') as file:
+                file.write(plan_xml)
+
+            durations = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                rows = cursor.execute(sql).fetchall()
+                durations.append((time.perf_counter() - started) * 1000)
+
+            summary = summarize_plan(plan_xml)
+            summary.update(sql=sql, rows=len(rows), median_ms=statistics.median(durations))
+            results['queries'][name] = summary
+            print(f"{name:34} coût {summary['cost']:>10.4f} {summary['median_ms']:>9.1f} ms  "
+                  + ", ".join(summary['operators']))
+    finally:
+        connection.close()
+
+    path = os.path.join(output, f"{label}.json")
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+    print(f"Plans enregistrés dans {directory}, résumé dans {path}")
+    return results
+
+
+def compare(output, before_label, after_label):
+    """Affiche, requête par requête, le coût, la durée et les opérateurs avant / après"""
+    with open(os.path.join(output, f"{before_label}.json"), encoding='utf-8') as file:
+        before = json.load(file)['queries']
+    with open(os.path.join(output, f"{after_label}.json"), encoding='utf-8') as file:
+        after = json.load(file)['queries']
+
+    print(f"{'requête':34} {'coût avant':>11} {'coût après':>11} {'ms avant':>9} {'ms après':>9}")
+    for name in before:
+        if name not in after:
+            continue
+        b, a = before[name], after[name]
+        print(f"{name:34} {b['cost']:>11.4f} {a['cost']:>11.4f} {b['median_ms']:>9.1f} {a['median_ms']:>9.1f}")
+        if b['operators'] != a['operators']:
+            print(f"{'':36}avant : {', '.join(b['operators'])}")
+            print(f"{'':36}après : {', '.join(a['operators'])}")
+
+
+def run(options):
+    if options.compare:
+        compare(options.output, *options.compare)
+        return
+
+    from app import create_app
+    from app.models.models import db
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name != 'mssql':
+            raise SystemExit("Ce script capture des plans SQL Server (SHOWPLAN_XML)")
+        if options.generate:
+            generate(db, options.generate, options.applications_per_job)
+        elif options.cleanup:
+            cleanup(db)
+        else:
+            capture(db, options.label, options.output, options.repeat)
+
+
+if __name__ == '__main__':
+    run(parse_args())
@@ -0,0 +1,198 @@
+"""
+Serveur local de substitution à l'API OpenAI (/v1/chat/completions)
+
+Permet d'exercer le pipeline d'analyse (workers, streaming, benchmarks, tests de charge)
+sans accès réseau ni clé API. Les réponses suivent le format attendu par l'application :
+
+    SCORE: <score>
+
+    ANALYSE:
+    <texte>
+
+Le score est dérivé de l'empreinte de la requête : une même requête obtient toujours
+la même réponse.
+
+Utilisation :
+    python tools/fake_openai_server.py --port 8765 --latency 2 --error-rate 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake flask analysis-worker
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_ANALYSIS = """Le profil du candidat présente une bonne adéquation avec le poste.
+
+Points forts :
+- Expérience significative sur des missions comparables
+- Compétences techniques en phase avec les exigences du poste
+
+Compétences à développer :
+- Connaissance du secteur d'activité à approfondir
+
+Recommandation : inviter le candidat à un entretien."""
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Répond aux requêtes chat/completions selon la configuration du serveur"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.options.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status, message, headers=None):
+        self._send_json(status, {'error': {'message': message, 'type': 'fake_server_error'}}, headers)
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/models'):
+            self._send_json(200, {'object': 'list', 'data': [{'id': 'gpt-4o', 'object': 'model'}]})
+        else:
+            self._error(404, f"Chemin inconnu: {self.path}")
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        raw_body = self.rfile.read(length)
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._error(404, f"Chemin inconnu: {self.path}")
+            return
+
+        options = self.server.options
+        try:
+            payload = json.loads(raw_body)
+        except ValueError:
+            self._error(400, "Corps JSON invalide")
+            return
+
+        # Latence simulée (jusqu'au premier octet)
+        time.sleep(max(0.0, random.gauss(options.latency, options.jitter)))
+
+        roll = random.random()
+        if roll < options.rate_limit_rate:
+            self._error(429, "Rate limit reached (simulé)", {'Retry-After': str(options.retry_after)})
+            return
+        if roll < options.rate_limit_rate + options.error_rate:
+            self._error(random.choice([500, 502, 503]), "Erreur serveur simulée")
+            return
+
+        digest = hashlib.sha256(raw_body).hexdigest()
+        score = options.min_score + int(digest[:8], 16) % (options.max_score - options.min_score + 1)
+        content = f"SCORE: {score}\n\nANALYSE:\n{CANNED_ANALYSIS}"
+        completion_id = f"chatcmpl-fake-{digest[:12]}"
+        model = payload.get('model', 'gpt-4o')
+
+        with self.server.stats_lock:
+            self.server.stats['requests'] += 1
+            self.server.stats['bytes_received'] += length
+
+        if payload.get('stream'):
+            self._stream(completion_id, model, content)
+        else:
+            self._send_json(200, {
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': content},
+                    'finish_reason': 'stop'
+                }],
+                'usage': {'prompt_tokens': length // 4, 'completion_tokens': len(content) // 4,
+                          'total_tokens': (length + len(content)) // 4}
+            })
+
+    def _stream(self, completion_id, model, content):
+        """Réponse server-sent events, découpée en fragments de quelques caractères"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta, finish_reason=None):
+            chunk = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+            }
+            return f"data: {json.dumps(chunk)}\n\n".encode('utf-8')
+
+        self.wfile.write(event({'role': 'assistant', 'content': ''}))
+        size = self.server.options.chunk_chars
+        for start in range(0, len(content), size):
+            self.wfile.write(event({'content': content[start:start + size]}))
+            self.wfile.flush()
+            time.sleep(self.server.options.chunk_delay)
+        self.wfile.write(event({}, 'stop'))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serveur local de substitution à l'API OpenAI")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=1.0, help="Latence moyenne avant réponse, en secondes")
+    parser.add_argument('--jitter', type=float, default=0.2, help="Écart type de la latence, en secondes")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Proportion de réponses 5xx")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Proportion de réponses 429")
+    parser.add_argument('--retry-after', type=int, default=1, help="Valeur de l'en-tête Retry-After des 429")
+    parser.add_argument('--min-score', type=int, default=20)
+    parser.add_argument('--max-score', type=int, default=95)
+    parser.add_argument('--chunk-chars', type=int, default=12, help="Taille des fragments en streaming")
+    parser.add_argument('--chunk-delay', type=float, default=0.02, help="Délai entre deux fragments, en secondes")
+    parser.add_argument('--verbose', action='store_true', help="Journaliser chaque requête")
+    return parser.parse_args(argv)
+
+
+def make_server(options):
+    """Crée le serveur (sans le démarrer) ; options : résultat de parse_args"""
+    server = ThreadingHTTPServer((options.host, options.port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    server.options = options
+    server.stats = {'requests': 0, 'bytes_received': 0}
+    server.stats_lock = threading.Lock()
+    return server
+
+
+def start_in_thread(options):
+    """Démarre le serveur dans un thread d'arrière-plan et retourne son URL de base"""
+    server = make_server(options)
+    thread = threading.Thread(target=server.serve_forever, name='fake-openai', daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/v1"
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    server = make_server(options)
+    print(f"Serveur OpenAI de substitution sur http://{options.host}:{options.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"Arrêt ({server.stats['requests']} requête(s) traitée(s))")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()